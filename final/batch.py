@@ -0,0 +1,133 @@
+"""Run simulations without user interaction.
+
+Used in the Logic Simulator project to run scripted simulations, for example
+on machines without a display, and write the monitored signals to a file.
+
+Classes
+-------
+BatchRunner - runs a simulation and writes the signal traces.
+"""
+import random
+import sys
+
+from vcd import VcdWriter
+
+
+class BatchRunner:
+
+    """Run a simulation and write the signal traces.
+
+    The simulation is run from a cold start-up for a given number of cycles,
+    after setting the given switches, and the signals of the monitors are
+    written either as text, one line for each monitor, or as a VCD file if
+    the output path ends in .vcd.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    set_switches(self, switch_settings): Sets switches from a list of
+                                         "NAME=LEVEL" strings.
+
+    get_trace_string(self, signal_list): Returns the text of a signal trace.
+
+    write_traces(self, file): Writes the signal traces of the monitors as
+                              text.
+
+    run(self, cycles, output_path, seed): Runs the simulation and writes the
+                                          signal traces.
+    """
+
+    # Errors, also used as exit statuses by logsim.py
+    [NO_ERROR, DEFINITION_ERROR, SWITCH_ERROR, OSCILLATION_ERROR,
+     OUTPUT_ERROR] = range(5)
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the trace characters."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        self.trace_characters = {devices.LOW: "0", devices.HIGH: "1",
+                                 devices.RISING: "/", devices.FALLING: "\\",
+                                 devices.BLANK: "x"}
+
+    def set_switches(self, switch_settings):
+        """Set switches from a list of "NAME=LEVEL" strings.
+
+        LEVEL is 0 or 1. Return True if successful.
+        """
+        for switch_setting in switch_settings:
+            name, separator, level = switch_setting.partition("=")
+            if not separator or level not in ["0", "1"]:
+                print("Error! Invalid switch setting: " + switch_setting,
+                      file=sys.stderr)
+                return False
+            switch_id = self.names.query(name)
+            signal = self.devices.HIGH if level == "1" else self.devices.LOW
+            if switch_id is None or not self.devices.set_switch(switch_id,
+                                                                signal):
+                print("Error! Invalid switch: " + name, file=sys.stderr)
+                return False
+        return True
+
+    def get_trace_string(self, signal_list):
+        """Return the text of a signal trace, one character per cycle."""
+        return "".join([self.trace_characters[signal]
+                        for signal in signal_list])
+
+    def write_traces(self, file):
+        """Write the signal traces of the monitors as text.
+
+        Each line holds the signal name and the signal trace of a monitor.
+        """
+        for (device_id, output_id), signal_list in (
+                self.monitors.monitors_dictionary.items()):
+            signal_name = self.devices.get_signal_name(device_id, output_id)
+            file.write(signal_name + " " +
+                       self.get_trace_string(signal_list) + "\n")
+
+    def run(self, cycles, output_path=None, seed=None):
+        """Run the simulation and write the signal traces.
+
+        The traces are written to standard output if no output path is
+        given. A VCD file is written while the simulation runs, and only the
+        signal changes are kept in memory. The random cold start-up state is
+        reproducible if a seed is given. Return NO_ERROR if successful, or the
+        corresponding error if not.
+        """
+        if seed is not None:
+            random.seed(seed)
+        self.devices.cold_startup()
+        write_vcd = output_path is not None and output_path.endswith(".vcd")
+        if write_vcd:
+            self.monitors.set_change_recording(True)
+        self.monitors.reset_monitors()
+        vcd_writer = None
+        try:
+            if write_vcd:
+                vcd_writer = VcdWriter(self.names, self.devices,
+                                       self.monitors, output_path)
+            if not self.network.execute_cycles(cycles, self.monitors):
+                print("Error! Network oscillating.", file=sys.stderr)
+                return self.OSCILLATION_ERROR
+            # A VCD file is already written while running
+            if output_path is None:
+                self.write_traces(sys.stdout)
+            elif not write_vcd:
+                with open(output_path, "w") as file:
+                    self.write_traces(file)
+        except OSError:
+            print("Error! Could not write to " + output_path,
+                  file=sys.stderr)
+            return self.OUTPUT_ERROR
+        finally:
+            if vcd_writer is not None:
+                vcd_writer.close()
+        return self.NO_ERROR
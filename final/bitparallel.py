@@ -0,0 +1,511 @@
+"""Simulate many scenarios of a network at once.
+
+Used in the Logic Simulator project to run the same network under many switch
+assignments or cold start-up states.
+
+Classes
+-------
+BitParallelSimulator - simulates one scenario of the network per bit lane.
+"""
+import collections
+import random
+
+
+class BitParallelSimulator:
+
+    """Simulate one scenario of the network per bit lane.
+
+    Every output signal is stored as two integers, used as bit vectors with
+    one bit per scenario (lane). The target bit holds the level the signal is
+    moving towards and the edge bit is set while the signal is RISING or
+    FALLING:
+
+        LOW = (0, 0), HIGH = (1, 0), RISING = (1, 1), FALLING = (0, 1).
+
+    Each device is executed for all the lanes with a few bitwise operations.
+    The devices are executed in the order of the levelized engine, so every
+    lane gives the same signals as network.execute_levelized would for that
+    scenario.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    lanes: number of scenarios simulated at once.
+
+    Public methods
+    --------------
+    load_state(self): Copies the signals and device states of the devices
+                      into every lane.
+
+    cold_startup(self, seeds=None): Simulates cold start-up independently in
+                                    every lane.
+
+    set_switch(self, switch_id, switch_state, lane=None): Sets the switch in
+                                                          one or all lanes.
+
+    set_switch_patterns(self, switch_ids, first_pattern=0): Assigns a
+                                 different pattern of switch states to every
+                                 lane.
+
+    set_stuck_faults(self, faults): Holds outputs stuck at a level in some
+                                    lanes.
+
+    get_output_signal(self, device_id, output_id, lane): Returns the signal
+                                          level at the given output and lane.
+
+    execute_network(self): Executes all the lanes for one simulation cycle.
+
+    record_signals(self): Records the current signals of all the monitors.
+
+    reset_monitors(self): Clears the recorded signals.
+
+    get_monitors_dictionary(self, lane): Returns the recorded signals of one
+                                         lane like monitors_dictionary.
+    """
+
+    def __init__(self, names, devices, network, monitors, lanes=64):
+        """Compile the network into bitwise steps.
+
+        Raise ValueError if an input of the network is unconnected.
+        """
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.lanes = lanes
+        self.mask = (1 << lanes) - 1  # all lanes set
+
+        if not network.check_network():
+            raise ValueError("all inputs must be connected")
+        network.build_fanout()
+        network.levelize()
+
+        # Assign a slot to every output, the signal of a slot is
+        # (self.targets[slot], self.edges[slot])
+        self.output_slots = {}  # {(device_id, output_id): slot}
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                self.output_slots[(device.device_id, output_id)] = len(
+                    self.output_slots)
+        self.targets = [0] * len(self.output_slots)
+        self.edges = [0] * len(self.output_slots)
+
+        self.switch_ids = devices.find_devices(devices.SWITCH)
+        self.switch_states = {}  # {switch_id: lanes where the switch is on}
+        self.d_types = [
+            (device_id,
+             [self.get_input_slot(device_id, input_id)
+              for input_id in [devices.CLK_ID, devices.DATA_ID,
+                               devices.SET_ID, devices.CLEAR_ID]],
+             self.output_slots[(device_id, devices.Q_ID)],
+             self.output_slots[(device_id, devices.QBAR_ID)])
+            for device_id in devices.find_devices(devices.D_TYPE)]
+        self.dtype_memory = {}  # {device_id: lanes where memory is HIGH}
+
+        # clock_phases[device_id][counter] holds the lanes where the clock
+        # counter is equal to counter
+        self.clock_ids = devices.find_devices(devices.CLOCK)
+        self.clock_phases = {}
+        self.source_slots = [
+            self.output_slots[(device_id, None)]
+            for device_kind in [devices.CLOCK, devices.RC, devices.SIGGEN]
+            for device_id in devices.find_devices(device_kind)]
+
+        # Gate steps are (output slot, input slots, operation, inverted), and
+        # levels are lists of blocks of steps as in network.schedule
+        operations = {
+            devices.AND: ("and", False),
+            devices.NAND: ("and", True),
+            devices.OR: ("or", False),
+            devices.NOR: ("or", True),
+            devices.XOR: ("xor", False),
+        }
+        self.levels = []
+        for level in network.schedule:
+            blocks = []
+            for sequential, steps in level:
+                gate_steps = []
+                for step in steps:
+                    device = step[0]
+                    (operation, inverted) = operations[device.device_kind]
+                    gate_steps.append((
+                        self.output_slots[(device.device_id, None)],
+                        [self.get_input_slot(device.device_id, input_id)
+                         for input_id in device.inputs],
+                        operation, inverted))
+                blocks.append(gate_steps)
+            self.levels.append(blocks)
+
+        # traces stores {(device_id, output_id): [(target, edge, steady)]},
+        # where steady holds the lanes that settled on the cycle
+        self.traces = collections.OrderedDict()
+        self.steady_lanes = self.mask
+
+        # Stuck-at faults hold an output at a level in some lanes.
+        # stuck_high and stuck_low store {slot: lanes stuck at the level}.
+        self.stuck_high = {}
+        self.stuck_low = {}
+        self.stuck_slots = set()
+
+        self.load_state()
+
+    def get_input_slot(self, device_id, input_id):
+        """Return the slot of the output connected to the given input."""
+        return self.output_slots[self.network.get_connected_output(
+            device_id, input_id)]
+
+    def set_signal(self, slot, signal, lanes):
+        """Set the signal at the given slot in the given lanes."""
+        if signal in [self.devices.HIGH, self.devices.RISING]:
+            self.targets[slot] |= lanes
+        else:
+            self.targets[slot] &= ~lanes
+        if signal in [self.devices.RISING, self.devices.FALLING]:
+            self.edges[slot] |= lanes
+        else:
+            self.edges[slot] &= ~lanes
+
+    def load_state(self):
+        """Copy the signals and device states of the devices into every lane.
+
+        All the lanes start from the current state of the Device objects.
+        """
+        devices = self.devices
+        for (device_id, output_id), slot in self.output_slots.items():
+            self.set_signal(slot,
+                            devices.get_device(device_id).outputs[output_id],
+                            self.mask)
+        for switch_id in self.switch_ids:
+            self.set_switch(switch_id,
+                            devices.get_device(switch_id).switch_state)
+        for device_id, sources, q_slot, qbar_slot in self.d_types:
+            if devices.get_device(device_id).dtype_memory == devices.HIGH:
+                self.dtype_memory[device_id] = self.mask
+            else:
+                self.dtype_memory[device_id] = 0
+        for device_id in self.clock_ids:
+            device = devices.get_device(device_id)
+            phases = [0] * (device.clock_half_period + 1)
+            phases[device.clock_counter] = self.mask
+            self.clock_phases[device_id] = phases
+        # RCs and signal generators start in the same state in every lane,
+        # so their counters are shared
+        self.rc_counters = {
+            device_id: devices.get_device(device_id).clock_counter
+            for device_id in devices.find_devices(devices.RC)}
+        self.siggen_counters = {
+            device_id: devices.get_device(device_id).clock_counter
+            for device_id in devices.find_devices(devices.SIGGEN)}
+        self.run_once = devices.run_once
+        self.apply_stuck_faults()
+
+    def cold_startup(self, seeds=None):
+        """Simulate cold start-up independently in every lane.
+
+        If a list of seeds is given, lane i is started up as if
+        random.seed(seeds[i]) was followed by devices.cold_startup().
+        """
+        devices = self.devices
+        for device_id, sources, q_slot, qbar_slot in self.d_types:
+            self.dtype_memory[device_id] = 0
+        for device_id in self.clock_ids:
+            phases = self.clock_phases[device_id]
+            phases[:] = [0] * len(phases)
+
+        for lane in range(self.lanes):
+            if seeds is None:
+                generator = random
+            else:
+                generator = random.Random(seeds[lane])
+            lane_bit = 1 << lane
+            # Draw the random states in the order of devices.cold_startup
+            for device in devices.devices_list:
+                device_id = device.device_id
+                if device.device_kind == devices.D_TYPE:
+                    if generator.choice([devices.LOW,
+                                         devices.HIGH]) == devices.HIGH:
+                        self.dtype_memory[device_id] |= lane_bit
+                elif device.device_kind == devices.CLOCK:
+                    clock_signal = generator.choice([devices.LOW,
+                                                     devices.HIGH])
+                    self.set_signal(self.output_slots[(device_id, None)],
+                                    clock_signal, lane_bit)
+                    counter = generator.randrange(device.clock_half_period)
+                    self.clock_phases[device_id][counter] |= lane_bit
+
+        for device_id in self.siggen_counters:
+            device = devices.get_device(device_id)
+            if device.sequence_2_repeat[0] == "1":
+                initial_signal = devices.HIGH
+            else:
+                initial_signal = devices.LOW
+            self.set_signal(self.output_slots[(device_id, None)],
+                            initial_signal, self.mask)
+            self.siggen_counters[device_id] = 0
+        for device_id in self.rc_counters:
+            self.set_signal(self.output_slots[(device_id, None)],
+                            devices.HIGH, self.mask)
+            self.rc_counters[device_id] = 0
+        self.run_once = False
+        self.apply_stuck_faults()
+
+    def set_switch(self, switch_id, switch_state, lane=None):
+        """Set the switch to switch_state in the given lane, or in all lanes.
+
+        Return True if successful.
+        """
+        if switch_id not in self.switch_ids:
+            return False
+        if switch_state not in [self.devices.LOW, self.devices.HIGH]:
+            return False
+        if lane is None:
+            lanes = self.mask
+        elif lane in range(self.lanes):
+            lanes = 1 << lane
+        else:
+            return False
+        on_lanes = self.switch_states.get(switch_id, 0)
+        if switch_state == self.devices.HIGH:
+            self.switch_states[switch_id] = on_lanes | lanes
+        else:
+            self.switch_states[switch_id] = on_lanes & ~lanes
+        return True
+
+    def set_switch_patterns(self, switch_ids, first_pattern=0):
+        """Assign a different pattern of switch states to every lane.
+
+        Lane i uses the binary digits of first_pattern + i, with the least
+        significant digit setting the first switch. Running the patterns in
+        blocks of lanes sweeps all the switch combinations. Return True if
+        successful.
+        """
+        if any(switch_id not in self.switch_ids for switch_id in switch_ids):
+            return False
+        for bit, switch_id in enumerate(switch_ids):
+            on_lanes = 0
+            for lane in range(self.lanes):
+                if (first_pattern + lane) >> bit & 1:
+                    on_lanes |= 1 << lane
+            self.switch_states[switch_id] = on_lanes
+        return True
+
+    def set_stuck_faults(self, faults):
+        """Hold outputs stuck at a level in some lanes.
+
+        faults is a list of (device_id, output_id, level, lanes), where level
+        is LOW or HIGH and lanes has a bit set for every lane with the fault.
+        The faults replace any set before. Return True if successful.
+        """
+        stuck_high = {}
+        stuck_low = {}
+        for device_id, output_id, level, lanes in faults:
+            slot = self.output_slots.get((device_id, output_id))
+            if slot is None:
+                return False
+            if level == self.devices.HIGH:
+                stuck_high[slot] = stuck_high.get(slot, 0) | lanes
+            elif level == self.devices.LOW:
+                stuck_low[slot] = stuck_low.get(slot, 0) | lanes
+            else:
+                return False
+        self.stuck_high = stuck_high
+        self.stuck_low = stuck_low
+        self.stuck_slots = set(stuck_high) | set(stuck_low)
+        self.apply_stuck_faults()
+        return True
+
+    def apply_stuck_faults(self):
+        """Set the stuck outputs to their levels in the faulty lanes."""
+        for slot in self.stuck_slots:
+            high = self.stuck_high.get(slot, 0)
+            low = self.stuck_low.get(slot, 0)
+            self.targets[slot] = (self.targets[slot] | high) & ~low
+            self.edges[slot] &= ~(high | low)
+
+    def get_output_signal(self, device_id, output_id, lane):
+        """Return the signal level at the given output and lane.
+
+        Return None if any of the specified IDs or the lane is invalid.
+        """
+        slot = self.output_slots.get((device_id, output_id))
+        if slot is None or lane not in range(self.lanes):
+            return None
+        return self.decode_signal(self.targets[slot], self.edges[slot], lane)
+
+    def decode_signal(self, target, edge, lane):
+        """Return the signal level of a lane of a pair of bit vectors."""
+        if target >> lane & 1:
+            if edge >> lane & 1:
+                return self.devices.RISING
+            return self.devices.HIGH
+        if edge >> lane & 1:
+            return self.devices.FALLING
+        return self.devices.LOW
+
+    def update_output(self, slot, target):
+        """Update the signal at the slot in the direction of the target lanes.
+
+        Record the lanes where the signal has changed. Stuck outputs keep
+        their level.
+        """
+        if slot in self.stuck_slots:
+            target = ((target | self.stuck_high.get(slot, 0))
+                      & ~self.stuck_low.get(slot, 0))
+        edge = self.targets[slot] ^ target
+        self.changed_lanes |= edge | self.edges[slot]
+        self.targets[slot] = target
+        self.edges[slot] = edge
+
+    def update_sources(self):
+        """Update the clock, RC and siggen signals for a new cycle.
+
+        The rules are those of network.update_clocks, network.update_rcs and
+        network.update_siggen.
+        """
+        for device_id in self.clock_ids:
+            phases = self.clock_phases[device_id]
+            half_period = len(phases) - 1
+            slot = self.output_slots[(device_id, None)]
+            # HIGH goes FALLING and LOW goes RISING in the lanes that are due
+            toggled = phases[half_period] & ~self.edges[slot]
+            self.targets[slot] ^= toggled
+            self.edges[slot] |= toggled
+            # Every counter moves on by one, and the due ones restart from 1
+            phases[:] = ([0, phases[0] | phases[half_period]]
+                         + phases[1:half_period])
+
+        for device_id in self.rc_counters:
+            device = self.devices.get_device(device_id)
+            if self.rc_counters[device_id] == device.rc_period:
+                self.rc_counters[device_id] = 0
+                self.set_signal(self.output_slots[(device_id, None)],
+                                self.devices.FALLING, self.mask)
+            self.rc_counters[device_id] += 1
+
+        if not self.run_once:
+            self.run_once = True
+        else:
+            self.update_siggen()
+        self.apply_stuck_faults()
+
+    def update_siggen(self):
+        """Set the signal generators to the next value in their sequences."""
+        for device_id in self.siggen_counters:
+            sequence = self.devices.get_device(device_id).sequence_2_repeat
+            counter = self.siggen_counters[device_id] + 1
+            if counter == len(sequence):
+                counter = 0
+            self.siggen_counters[device_id] = counter
+            if sequence[counter] == "1":
+                signal = self.devices.RISING
+            else:
+                signal = self.devices.FALLING
+            self.set_signal(self.output_slots[(device_id, None)], signal,
+                            self.mask)
+
+    def execute_gate(self, step):
+        """Execute a gate step in all the lanes.
+
+        The rule is the one of network.execute_gate, applied to the raw
+        input signals, so a RISING or FALLING input is neither HIGH nor LOW
+        and the inputs of an XOR are compared as they are.
+        """
+        (output_slot, input_slots, operation, inverted) = step
+        targets = self.targets
+        edges = self.edges
+        if operation == "and":  # the lanes where every input is HIGH
+            target = self.mask
+            for input_slot in input_slots:
+                target &= targets[input_slot] & ~edges[input_slot]
+        elif operation == "or":  # the lanes where an input is not LOW
+            target = 0
+            for input_slot in input_slots:
+                target |= targets[input_slot] | edges[input_slot]
+        else:
+            [first_slot, second_slot] = input_slots
+            target = ((targets[first_slot] ^ targets[second_slot])
+                      | (edges[first_slot] ^ edges[second_slot]))
+        if inverted:
+            target ^= self.mask
+        self.update_output(output_slot, target)
+
+    def execute_d_types(self):
+        """Execute the D-types in all the lanes, one after the other.
+
+        The rule is the one of network.execute_d_type.
+        """
+        targets = self.targets
+        edges = self.edges
+        for device_id, sources, q_slot, qbar_slot in self.d_types:
+            [clk_slot, data_slot, set_slot, clear_slot] = sources
+            memory = self.dtype_memory[device_id]
+            latch = targets[clk_slot] & edges[clk_slot]  # clock RISING
+            # A rising or falling data signal is read at its level before
+            # the edge
+            data = targets[data_slot] ^ edges[data_slot]
+            memory = (memory & ~latch) | (data & latch)
+            memory |= targets[set_slot] & ~edges[set_slot]  # SET is HIGH
+            memory &= ~(targets[clear_slot] & ~edges[clear_slot])
+            self.dtype_memory[device_id] = memory
+            self.update_output(q_slot, memory)
+            self.update_output(qbar_slot, memory ^ self.mask)
+
+    def execute_network(self):
+        """Execute all the lanes for one simulation cycle.
+
+        steady_lanes is set to the lanes that settled. Return True if every
+        lane settled.
+        """
+        self.update_sources()
+        for _ in range(self.network.iteration_limit):
+            self.changed_lanes = 0
+            for switch_id in self.switch_ids:
+                self.update_output(self.output_slots[(switch_id, None)],
+                                   self.switch_states[switch_id])
+            self.execute_d_types()
+            # Complete the clock, RC and siggen transitions
+            for slot in self.source_slots:
+                self.changed_lanes |= self.edges[slot]
+                self.edges[slot] = 0
+            for level in self.levels:
+                for steps in level:
+                    for step in steps:
+                        self.execute_gate(step)
+            if not self.changed_lanes:
+                break
+        self.steady_lanes = self.mask & ~self.changed_lanes
+        return self.steady_lanes == self.mask
+
+    def record_signals(self):
+        """Record the current signals of all the monitors in all the lanes.
+
+        The monitored outputs are those of monitors.monitors_dictionary.
+        """
+        for monitor in self.monitors.monitors_dictionary:
+            slot = self.output_slots[monitor]
+            self.traces.setdefault(monitor, []).append(
+                (self.targets[slot], self.edges[slot], self.steady_lanes))
+
+    def reset_monitors(self):
+        """Clear the recorded signals of all the lanes."""
+        self.traces = collections.OrderedDict()
+
+    def get_monitors_dictionary(self, lane):
+        """Return the recorded signals of one lane.
+
+        The result has the form of monitors.monitors_dictionary. Cycles on
+        which the lane did not settle are recorded as BLANK.
+        """
+        monitors_dictionary = collections.OrderedDict()
+        for monitor, trace in self.traces.items():
+            signal_list = []
+            for target, edge, steady_lanes in trace:
+                if steady_lanes >> lane & 1:
+                    signal_list.append(self.decode_signal(target, edge, lane))
+                else:
+                    signal_list.append(self.devices.BLANK)
+            monitors_dictionary[monitor] = signal_list
+        return monitors_dictionary
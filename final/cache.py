@@ -0,0 +1,127 @@
+"""Cache built netlists on disk.
+
+Used in the Logic Simulator project to skip scanning and parsing definition
+files that have not changed since they were last loaded.
+
+Classes
+-------
+NetlistCache - stores and loads built netlists keyed by file content.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+
+class NetlistCache:
+
+    """Store and load built netlists keyed by file content.
+
+    A netlist is the names, devices, network and monitors built by
+    parse.Parser.parse_network. It is pickled into one entry per definition
+    file, tagged with a hash of the contents of the file and a hash of the
+    simulator source code. An entry is only used if both hashes still match,
+    so editing the definition file or upgrading the simulator invalidates it.
+
+    Parameters
+    ----------
+    cache_directory: directory holding the cache entries. Defaults to
+                     ~/.cache/logsim.
+
+    Public methods
+    --------------
+    get_entry_path(self, path): Returns the path of the cache entry for a
+                                definition file.
+
+    get_key(self, path): Returns the cache key of a definition file.
+
+    load(self, path): Returns the cached netlist of a definition file.
+
+    store(self, path, names, devices, network, monitors): Stores the netlist
+                                                   of a definition file.
+    """
+
+    # Increase when the format of the entries changes
+    CACHE_FORMAT = 1
+
+    # Modules whose code determines the built netlist
+    SOURCE_FILES = ["names.py", "devices.py", "scheduler.py", "network.py",
+                    "monitors.py", "compact.py", "scanner.py", "parse.py",
+                    "cache.py"]
+
+    def __init__(self, cache_directory=None):
+        """Set up the cache directory and the simulator version hash."""
+        if cache_directory is None:
+            cache_directory = os.path.join(os.path.expanduser("~"),
+                                           ".cache", "logsim")
+        self.cache_directory = cache_directory
+
+        source_hash = hashlib.sha256(str(self.CACHE_FORMAT).encode())
+        source_directory = os.path.dirname(os.path.abspath(__file__))
+        for file_name in self.SOURCE_FILES:
+            with open(os.path.join(source_directory, file_name), "rb") as file:
+                source_hash.update(file.read())
+        self.version = source_hash.hexdigest()
+
+    def get_entry_path(self, path):
+        """Return the path of the cache entry for a definition file.
+
+        Each definition file has a single entry, named after its absolute
+        path, which is overwritten when the file changes.
+        """
+        path_hash = hashlib.sha256(os.path.abspath(path).encode())
+        return os.path.join(self.cache_directory,
+                            path_hash.hexdigest() + ".pickle")
+
+    def get_key(self, path):
+        """Return the cache key of a definition file.
+
+        The key is a hash of the contents of the file and of the simulator
+        version.
+        """
+        key = hashlib.sha256(self.version.encode())
+        with open(path, "rb") as file:
+            key.update(file.read())
+        return key.hexdigest()
+
+    def load(self, path):
+        """Return the cached netlist of a definition file.
+
+        Return a list of [names, devices, network, monitors], or None if
+        there is no up to date entry for the file.
+        """
+        try:
+            key = self.get_key(path)
+            with open(self.get_entry_path(path), "rb") as file:
+                [entry_key, netlist] = pickle.load(file)
+        except Exception:  # any missing, corrupt or incompatible entry
+            return None
+        if entry_key != key:  # stale entry
+            return None
+        return netlist
+
+    def store(self, path, names, devices, network, monitors):
+        """Store the netlist of a definition file.
+
+        The netlist must have been parsed successfully. Return True if
+        successful.
+        """
+        entry_path = self.get_entry_path(path)
+        temporary_path = None
+        try:
+            key = self.get_key(path)
+            os.makedirs(self.cache_directory, exist_ok=True)
+            # Write to a temporary file of this run first, so that
+            # concurrent runs never load or write into a partly written entry
+            with tempfile.NamedTemporaryFile(dir=self.cache_directory,
+                                             suffix=".tmp",
+                                             delete=False) as file:
+                temporary_path = file.name
+                pickle.dump([key, [names, devices, network, monitors]], file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, entry_path)
+        except (OSError, pickle.PicklingError):
+            if temporary_path is not None and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return False
+        return True
@@ -0,0 +1,268 @@
+"""Generate and compile a simulation kernel for a network.
+
+Used in the Logic Simulator project to simulate a fixed network quickly,
+without the dispatch and lookups of the generic engines.
+
+Classes
+-------
+GeneratedKernel - generates, compiles and runs the kernel of a network.
+"""
+
+
+class GeneratedKernel:
+
+    """Generate, compile and run the simulation kernel of a network.
+
+    The kernel is a Python function written for one network. It executes
+    the settling iterations of network.execute_sweep, with the rules of
+    execute_switch, execute_d_type, execute_clock and execute_gate inlined
+    as straight-line code in the order of the sweep. Every output signal is
+    held in a local variable while the kernel runs, and update_signal is
+    replaced by a lookup in a table for each direction. The signals and
+    device states stay in the Device objects: they are loaded when the
+    kernel is called and stored when it returns, so the kernel gives the
+    same signals as the sweep and other engines can take over at any cycle.
+
+    The kernel only covers a complete network. The clocks, RCs and signal
+    generators are still updated by the network before the kernel is
+    called.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class, with its evaluation
+             order built, see network.build_fanout.
+
+    Public methods
+    --------------
+    generate_source(self): Returns the source code of the kernel.
+
+    execute_cycle(self, iteration_limit): Settles the signals for one
+                                          simulation cycle.
+    """
+
+    def __init__(self, devices, network):
+        """Generate the source code of the kernel and compile it."""
+        self.devices = devices
+        self.network = network
+
+        # The devices executed by the kernel, in the order of the sweep, and
+        # those whose outputs they read. Each output is held in the local
+        # variable of its slot.
+        self.device_list = [devices.get_device(device_id)
+                            for device_id in network.evaluation_order]
+        self.read_devices = []
+        self.output_slots = {}  # {(device_id, output_id): slot}
+        for device in self.device_list:
+            self.add_outputs(device)
+        for device in self.device_list:
+            for connected_output in device.inputs.values():
+                if connected_output not in self.output_slots:
+                    self.add_outputs(devices.get_device(connected_output[0]))
+                    self.read_devices.append(connected_output[0])
+
+        self.source = self.generate_source()
+        namespace = {}
+        exec(compile(self.source, "<generated kernel>", "exec"), namespace)
+        self.kernel = namespace["make_kernel"](
+            self.device_list + [devices.get_device(device_id)
+                                for device_id in self.read_devices])
+
+    def add_outputs(self, device):
+        """Assign a slot to every output of the device."""
+        for output_id in device.outputs:
+            self.output_slots[(device.device_id, output_id)] = len(
+                self.output_slots)
+
+    def get_signal(self, device, input_id):
+        """Return the local variable holding the signal at the input."""
+        return "s" + str(self.output_slots[device.inputs[input_id]])
+
+    def get_output(self, device, output_id=None):
+        """Return the local variable holding the signal at the output."""
+        return "s" + str(self.output_slots[(device.device_id, output_id)])
+
+    def generate_update(self, signal, table):
+        """Return the lines updating a signal in the direction of a table.
+
+        The table is UP or DOWN, or a variable holding one of them.
+        """
+        return ["new = " + table + "[" + signal + "]",
+                "if new != " + signal + ":",
+                "    " + signal + " = new",
+                "    steady = False"]
+
+    def generate_device(self, device):
+        """Return the lines executing the device, as execute_device does."""
+        devices = self.devices
+        LOW = repr(devices.LOW)
+        HIGH = repr(devices.HIGH)
+        RISING = repr(devices.RISING)
+        FALLING = repr(devices.FALLING)
+        device_kind = device.device_kind
+        table = {devices.LOW: "DOWN", devices.HIGH: "UP"}
+
+        if device_kind == devices.D_TYPE:
+            memory = "memory" + str(device.device_id)
+            [clock, data, set_signal, clear] = [
+                self.get_signal(device, input_id) for input_id in [
+                    devices.CLK_ID, devices.DATA_ID, devices.SET_ID,
+                    devices.CLEAR_ID]]
+            q = self.get_output(device, devices.Q_ID)
+            qbar = self.get_output(device, devices.QBAR_ID)
+            # A rising or falling data signal is read at its level before
+            # the edge
+            lines = [
+                "if " + clock + " == " + RISING + ":",
+                "    if " + data + " == " + HIGH + " or " + data + " == "
+                + FALLING + ":",
+                "        " + memory + " = " + HIGH,
+                "    else:",
+                "        " + memory + " = " + LOW,
+                "if " + set_signal + " == " + HIGH + ":",
+                "    " + memory + " = " + HIGH,
+                "if " + clear + " == " + HIGH + ":",
+                "    " + memory + " = " + LOW,
+                "if " + memory + " == " + LOW + ":",
+                "    new_q = DOWN[" + q + "]",
+                "    new_qbar = UP[" + qbar + "]",
+                "elif " + memory + " == " + HIGH + ":",
+                "    new_q = UP[" + q + "]",
+                "    new_qbar = DOWN[" + qbar + "]",
+                "else:",
+                "    new_q = UP[" + q + "]",
+                "    new_qbar = UP[" + qbar + "]"]
+            for (signal, new) in [(q, "new_q"), (qbar, "new_qbar")]:
+                lines.extend(["if " + new + " != " + signal + ":",
+                              "    " + signal + " = " + new,
+                              "    steady = False"])
+            return lines
+
+        output = self.get_output(device)
+        if device_kind == devices.SWITCH:
+            return self.generate_update(output,
+                                        "target" + str(device.device_id))
+
+        elif device_kind in [devices.CLOCK, devices.RC, devices.SIGGEN]:
+            # Complete the transitions set by the network
+            return ["if " + output + " == " + RISING + ":",
+                    "    " + output + " = " + HIGH,
+                    "    steady = False",
+                    "elif " + output + " == " + FALLING + ":",
+                    "    " + output + " = " + LOW,
+                    "    steady = False"]
+
+        inputs = [self.get_signal(device, input_id)
+                  for input_id in device.inputs]
+        if device_kind == devices.XOR:
+            # Output is high only if both inputs are different
+            return (["if " + inputs[0] + " == " + inputs[1] + ":"]
+                    + ["    " + line
+                       for line in self.generate_update(output, "DOWN")]
+                    + ["else:"]
+                    + ["    " + line
+                       for line in self.generate_update(output, "UP")])
+
+        (x, y) = {
+            devices.AND: (devices.HIGH, devices.HIGH),
+            devices.OR: (devices.LOW, devices.LOW),
+            devices.NAND: (devices.HIGH, devices.LOW),
+            devices.NOR: (devices.LOW, devices.HIGH),
+        }[device_kind]
+        # If all the inputs are x, the output is y, else it is the inverse
+        condition = " or ".join(signal + " != " + repr(x)
+                                for signal in inputs)
+        return (["if " + condition + ":"]
+                + ["    " + line for line in self.generate_update(
+                    output, table[self.network.invert_signal(y)])]
+                + ["else:"]
+                + ["    " + line
+                   for line in self.generate_update(output, table[y])])
+
+    def generate_source(self):
+        """Return the source code of the kernel.
+
+        The source defines make_kernel, which takes the Device objects and
+        returns the kernel. The kernel returns True if the signals settle,
+        False if they oscillate, and None without changing anything if a
+        signal is not one of LOW, HIGH, RISING or FALLING.
+        """
+        devices = self.devices
+        device_count = len(self.device_list) + len(self.read_devices)
+        device_names = ["device" + str(index)
+                        for index in range(device_count)]
+        # The Device objects are bound in the closure of the kernel
+        lines = ["def make_kernel(device_list):"]
+        if device_names:
+            lines.append("    [" + ", ".join(device_names)
+                         + "] = device_list")
+        # update_signal, indexed by the old signal, for targets HIGH and LOW
+        up = [None] * 4
+        down = [None] * 4
+        for signal in [devices.LOW, devices.FALLING]:
+            up[signal] = devices.RISING
+            down[signal] = devices.LOW
+        for signal in [devices.HIGH, devices.RISING]:
+            up[signal] = devices.HIGH
+            down[signal] = devices.FALLING
+        lines.extend(["    UP = " + repr(tuple(up)),
+                      "    DOWN = " + repr(tuple(down)),
+                      "    VALID = " + repr(frozenset(range(4))),
+                      "",
+                      "    def execute_cycle(iteration_limit):"])
+
+        body = []
+        device_index = {}
+        for index, device in enumerate(self.device_list + [
+                devices.get_device(device_id)
+                for device_id in self.read_devices]):
+            device_index[device.device_id] = index
+            for output_id in device.outputs:
+                body.append(self.get_output(device, output_id) + " = "
+                            + device_names[index] + ".outputs["
+                            + repr(output_id) + "]")
+        signals = ["s" + str(slot) for slot in range(len(self.output_slots))]
+        body.extend(["if not VALID.issuperset((" + "".join(
+                         signal + ", " for signal in signals) + ")):",
+                     "    return None"])
+        for device in self.device_list:
+            name = device_names[device_index[device.device_id]]
+            if device.device_kind == devices.SWITCH:
+                body.append("target" + str(device.device_id) + " = DOWN if "
+                            + name + ".switch_state == " + repr(devices.LOW)
+                            + " else UP")
+            elif device.device_kind == devices.D_TYPE:
+                body.append("memory" + str(device.device_id) + " = " + name
+                            + ".dtype_memory")
+
+        body.extend(["steady = True",
+                     "for iteration in range(iteration_limit):",
+                     "    steady = True"])
+        for device in self.device_list:
+            body.extend("    " + line
+                        for line in self.generate_device(device))
+        body.extend(["    if steady:",
+                     "        break"])
+
+        for device in self.device_list:
+            name = device_names[device_index[device.device_id]]
+            for output_id in device.outputs:
+                body.append(name + ".outputs[" + repr(output_id) + "] = "
+                            + self.get_output(device, output_id))
+            if device.device_kind == devices.D_TYPE:
+                body.append(name + ".dtype_memory = memory"
+                            + str(device.device_id))
+        body.append("return steady")
+
+        lines.extend("        " + line for line in body)
+        lines.extend(["", "    return execute_cycle", ""])
+        return "\n".join(lines)
+
+    def execute_cycle(self, iteration_limit):
+        """Settle the signals for one simulation cycle.
+
+        Return True if the signals settle within iteration_limit iterations,
+        False if they oscillate, or None if the kernel cannot be used
+        because a signal is invalid.
+        """
+        return self.kernel(iteration_limit)
@@ -0,0 +1,399 @@
+"""Store and execute the network as compact NumPy arrays.
+
+Used in the Logic Simulator project to simulate large networks quickly.
+
+Classes
+-------
+CompactNetwork - executes the network on a struct-of-arrays signal store.
+"""
+import numpy as np
+
+
+class CompactNetwork:
+
+    """Execute the network on a struct-of-arrays signal store.
+
+    All the output signals of the network are held in one contiguous int8
+    array, and every connection is replaced by the index of the output it
+    reads. Devices are executed with vectorized operations, one group of
+    devices of the same kind at a time. Logic gates are grouped by the
+    levels of the levelized schedule, so the signals produced are those of
+    the levelized engine.
+
+    The arrays hold the state of the network while the compact mode is in
+    use. store_state writes the state back into the Device objects.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class, with a complete
+             levelized schedule.
+
+    Public methods
+    --------------
+    load_state(self): Copies the signals and internal device states from
+                      the Device objects into the arrays.
+
+    store_state(self): Copies the signals and internal device states from
+                       the arrays into the Device objects.
+
+    cold_startup(self): Reloads the states set by devices.cold_startup.
+
+    get_state(self): Returns a snapshot of the signals and device states.
+
+    get_output_signal(self, device_id, output_id): Returns the signal level
+                                                   at the given output.
+
+    update_clocks(self): If it is time to do so, sets clock signals to
+                         RISING or FALLING.
+
+    update_rcs(self): If it is time to do so, sets RC signals to FALLING.
+
+    update_siggen(self): Sets signal generator signals to the next value in
+                         their sequences.
+
+    execute_iteration(self): Executes all the devices for one settling
+                             iteration.
+    """
+
+    def __init__(self, devices, network):
+        """Build the signal array, index arrays and lookup tables."""
+        self.devices = devices
+        self.network = network
+        self.steady_state = True
+
+        # Assign a slot of the signal array to every output, and two
+        # constant slots used to pad gates with fewer inputs
+        self.output_slots = {}  # {(device_id, output_id): slot}
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                self.output_slots[(device.device_id, output_id)] = len(
+                    self.output_slots)
+        self.low_slot = len(self.output_slots)
+        self.high_slot = self.low_slot + 1
+        self.signals = np.empty(self.high_slot + 1, dtype=np.int8)
+
+        # level_table maps a signal to the level it is moving towards, and
+        # step_table[signal, target] gives the result of update_signal
+        LOW = devices.LOW
+        HIGH = devices.HIGH
+        RISING = devices.RISING
+        FALLING = devices.FALLING
+        self.level_table = np.array(
+            [LOW, HIGH, HIGH, LOW, devices.BLANK], dtype=np.int8)
+        self.step_table = np.empty((len(devices.signal_types), 2),
+                                   dtype=np.int8)
+        self.step_table[:] = devices.BLANK
+        self.step_table[[LOW, FALLING], LOW] = LOW
+        self.step_table[[LOW, FALLING], HIGH] = RISING
+        self.step_table[[HIGH, RISING], LOW] = FALLING
+        self.step_table[[HIGH, RISING], HIGH] = HIGH
+
+        self.switch_devices = [
+            devices.get_device(device_id)
+            for device_id in devices.find_devices(devices.SWITCH)]
+        [self.switch_slots] = self.get_slots(devices.SWITCH, [None])
+
+        d_type_ids = devices.find_devices(devices.D_TYPE)
+        [self.clk_slots, self.set_slots, self.clear_slots,
+         self.data_slots] = [
+            self.get_input_slots(d_type_ids, input_id)
+            for input_id in devices.dtype_input_ids]
+        [self.q_slots, self.qbar_slots] = self.get_slots(
+            devices.D_TYPE, devices.dtype_output_ids)
+        self.dtype_memory = np.zeros(len(d_type_ids), dtype=np.int8)
+        self.dtype_waves = self.get_dtype_waves(d_type_ids)
+
+        [self.clock_slots] = self.get_slots(devices.CLOCK, [None])
+        self.clock_counter = np.zeros(len(self.clock_slots), dtype=np.int64)
+        self.clock_half_period = np.array(
+            [devices.get_device(device_id).clock_half_period
+             for device_id in devices.find_devices(devices.CLOCK)],
+            dtype=np.int64)
+
+        [self.rc_slots] = self.get_slots(devices.RC, [None])
+        self.rc_counter = np.zeros(len(self.rc_slots), dtype=np.int64)
+        self.rc_period = np.array(
+            [devices.get_device(device_id).rc_period
+             for device_id in devices.find_devices(devices.RC)],
+            dtype=np.int64)
+
+        # The sequences of all the signal generators are stored end to end
+        [self.siggen_slots] = self.get_slots(devices.SIGGEN, [None])
+        sequences = [devices.get_device(device_id).sequence_2_repeat
+                     for device_id in devices.find_devices(devices.SIGGEN)]
+        self.siggen_counter = np.zeros(len(sequences), dtype=np.int64)
+        self.siggen_length = np.array([len(sequence)
+                                       for sequence in sequences],
+                                      dtype=np.int64)
+        self.siggen_offset = np.zeros(len(sequences), dtype=np.int64)
+        self.siggen_offset[1:] = np.cumsum(self.siggen_length)[:-1]
+        self.siggen_bits = np.array(
+            [bit == "1" for sequence in sequences for bit in sequence],
+            dtype=bool)
+
+        self.source_slots = np.concatenate(
+            [self.clock_slots, self.rc_slots, self.siggen_slots])
+
+        # Each level of the schedule becomes a list of gate groups, see
+        # execute_group. The sequential block keeps one group per gate, so
+        # that its gates are executed one after the other as in the sweep.
+        self.levels = []
+        for level in network.schedule:
+            groups = {}  # {device_kind: steps} for the feed-forward gates
+            sequential_groups = []
+            for sequential, steps in level:
+                if sequential:
+                    sequential_groups.extend(self.make_group([step])
+                                             for step in steps)
+                else:
+                    for step in steps:
+                        groups.setdefault(step[0].device_kind,
+                                          []).append(step)
+            self.levels.append(sequential_groups + [
+                self.make_group(steps) for steps in groups.values()])
+
+        self.load_state()
+
+    def get_slots(self, device_kind, output_ids):
+        """Return an array of output slots for each of the given outputs.
+
+        Each array holds the slots of the given output of all the devices of
+        the given kind, in the order of find_devices.
+        """
+        device_ids = self.devices.find_devices(device_kind)
+        return [np.array([self.output_slots[(device_id, output_id)]
+                          for device_id in device_ids], dtype=np.int64)
+                for output_id in output_ids]
+
+    def get_input_slots(self, device_ids, input_id):
+        """Return the array of output slots connected to the given input."""
+        return np.array(
+            [self.output_slots[self.network.get_connected_output(
+                device_id, input_id)] for device_id in device_ids],
+            dtype=np.int64)
+
+    def get_dtype_waves(self, d_type_ids):
+        """Return the D-types split into waves that can be executed at once.
+
+        The sweep executes the D-types one after the other, so a D-type sees
+        the new outputs of the D-types before it and the old outputs of the
+        D-types after it. A D-type is placed in a later wave than the
+        D-types before it that it reads, and in no later wave than the
+        D-types after it that it reads. Each wave is an array of positions in
+        the D-type arrays.
+        """
+        position = {device_id: index
+                    for index, device_id in enumerate(d_type_ids)}
+        readers = [[] for _ in d_type_ids]  # D-types reading each D-type
+        wave_of = []
+        for index, device_id in enumerate(d_type_ids):
+            wave = 0
+            for connected_output in self.devices.get_device(
+                    device_id).inputs.values():
+                source_index = position.get(connected_output[0])
+                if source_index is None or source_index == index:
+                    continue
+                if source_index < index:
+                    wave = max(wave, wave_of[source_index] + 1)
+                else:
+                    readers[source_index].append(index)
+            for reader_index in readers[index]:
+                wave = max(wave, wave_of[reader_index])
+            wave_of.append(wave)
+        waves = [[] for _ in range(max(wave_of, default=-1) + 1)]
+        for index, wave in enumerate(wave_of):
+            waves[wave].append(index)
+        return [np.array(wave, dtype=np.int64) for wave in waves]
+
+    def make_group(self, steps):
+        """Return a group of gates of the same kind from the compiled steps.
+
+        A group is (output slots, input slots, x, y), where the input slots
+        array has one row per gate. Gates with fewer inputs are padded with
+        the constant slot of level x, which does not change their output.
+        """
+        (device, sources, x, y) = steps[0]
+        width = max(len(step[1]) for step in steps)
+        if x == self.devices.HIGH:
+            padding = self.high_slot
+        else:
+            padding = self.low_slot
+        output_slots = np.array(
+            [self.output_slots[(step[0].device_id, None)] for step in steps],
+            dtype=np.int64)
+        input_slots = np.full((len(steps), width), padding, dtype=np.int64)
+        for row, step in enumerate(steps):
+            device = step[0]
+            for column, input_id in enumerate(device.inputs):
+                input_slots[row, column] = self.output_slots[
+                    device.inputs[input_id]]
+        return (output_slots, input_slots, x, y)
+
+    def load_state(self):
+        """Copy the signals and internal device states into the arrays."""
+        for (device_id, output_id), slot in self.output_slots.items():
+            self.signals[slot] = self.devices.get_device(
+                device_id).outputs[output_id]
+        self.signals[self.low_slot] = self.devices.LOW
+        self.signals[self.high_slot] = self.devices.HIGH
+        self.cold_startup()
+
+    def cold_startup(self):
+        """Reload the states set by devices.cold_startup into the arrays.
+
+        These are the memories of the D-types, and the outputs and counters
+        of the clocks, RCs and signal generators.
+        """
+        devices = self.devices
+        self.dtype_memory[:] = [
+            devices.get_device(device_id).dtype_memory
+            for device_id in devices.find_devices(devices.D_TYPE)]
+        for device_kind, slots, counter in [
+                (devices.CLOCK, self.clock_slots, self.clock_counter),
+                (devices.RC, self.rc_slots, self.rc_counter),
+                (devices.SIGGEN, self.siggen_slots, self.siggen_counter)]:
+            device_list = [devices.get_device(device_id)
+                           for device_id in devices.find_devices(device_kind)]
+            self.signals[slots] = [device.outputs[None]
+                                   for device in device_list]
+            counter[:] = [device.clock_counter for device in device_list]
+
+    def store_state(self):
+        """Copy the signals and internal device states into the devices."""
+        devices = self.devices
+        for (device_id, output_id), slot in self.output_slots.items():
+            devices.get_device(device_id).outputs[output_id] = int(
+                self.signals[slot])
+        for device_id, memory in zip(devices.find_devices(devices.D_TYPE),
+                                     self.dtype_memory.tolist()):
+            devices.get_device(device_id).dtype_memory = memory
+        for device_kind, counter in [(devices.CLOCK, self.clock_counter),
+                                     (devices.RC, self.rc_counter),
+                                     (devices.SIGGEN, self.siggen_counter)]:
+            for device_id, count in zip(devices.find_devices(device_kind),
+                                        counter.tolist()):
+                devices.get_device(device_id).clock_counter = count
+
+    def get_state(self):
+        """Return a hashable snapshot of the signals and device states."""
+        return b"".join([self.signals.tobytes(), self.dtype_memory.tobytes(),
+                         self.clock_counter.tobytes(),
+                         self.rc_counter.tobytes(),
+                         self.siggen_counter.tobytes()])
+
+    def get_output_signal(self, device_id, output_id):
+        """Return the signal level at the given output.
+
+        Return None if either of the specified IDs is invalid.
+        """
+        slot = self.output_slots.get((device_id, output_id))
+        if slot is None:
+            return None
+        return int(self.signals[slot])
+
+    def update_clocks(self):
+        """If it is time to do so, set clock signals to RISING or FALLING."""
+        signals = self.signals[self.clock_slots]
+        due = self.clock_counter == self.clock_half_period
+        signals[due & (signals == self.devices.HIGH)] = self.devices.FALLING
+        signals[due & (signals == self.devices.LOW)] = self.devices.RISING
+        self.signals[self.clock_slots] = signals
+        self.clock_counter[due] = 0
+        self.clock_counter += 1
+
+    def update_rcs(self):
+        """If it is time to do so, set RC signals to FALLING."""
+        due = self.rc_counter == self.rc_period
+        self.signals[self.rc_slots[due]] = self.devices.FALLING
+        self.rc_counter[due] = 0
+        self.rc_counter += 1
+
+    def update_siggen(self):
+        """Set signal generator signals to the next value in their sequence."""
+        self.siggen_counter += 1
+        self.siggen_counter[self.siggen_counter == self.siggen_length] = 0
+        bits = self.siggen_bits[self.siggen_offset + self.siggen_counter]
+        self.signals[self.siggen_slots] = np.where(
+            bits, self.devices.RISING, self.devices.FALLING)
+
+    def update_outputs(self, slots, targets):
+        """Update the signals at the given slots in the direction of targets.
+
+        Set steady_state to False if any of the signals has changed.
+        """
+        signals = self.signals[slots]
+        updated_signals = self.step_table[signals, targets]
+        if not np.array_equal(signals, updated_signals):
+            self.steady_state = False
+            self.signals[slots] = updated_signals
+
+    def execute_group(self, group):
+        """Execute a group of gates of the same kind.
+
+        The rule is the one of network.execute_gate, applied to the raw
+        input signals, so a RISING or FALLING input is not equal to x and
+        the inputs of an XOR are compared as they are.
+        """
+        (output_slots, input_slots, x, y) = group
+        input_signals = self.signals[input_slots]
+        if x is None:  # XOR, output is high only if both inputs are different
+            targets = np.where(input_signals[:, 0] != input_signals[:, 1],
+                               self.devices.HIGH, self.devices.LOW)
+        else:
+            targets = np.where((input_signals == x).all(axis=1), y,
+                               self.network.invert_signal(y))
+        self.update_outputs(output_slots, targets)
+
+    def execute_d_types(self):
+        """Execute the D-types and update their outputs, one wave at a time.
+
+        The rule is the one of network.execute_d_type, and the waves give the
+        signals of executing the D-types one after the other, see
+        get_dtype_waves.
+        """
+        devices = self.devices
+        signals = self.signals
+        for wave in self.dtype_waves:
+            memory = self.dtype_memory[wave]
+            latch = signals[self.clk_slots[wave]] == devices.RISING
+            # A rising or falling data signal is read at its level before
+            # the edge
+            data = signals[self.data_slots[wave]]
+            memory[latch & ((data == devices.HIGH)
+                            | (data == devices.FALLING))] = devices.HIGH
+            memory[latch & ((data == devices.LOW)
+                            | (data == devices.RISING))] = devices.LOW
+            memory[signals[self.set_slots[wave]] == devices.HIGH] = (
+                devices.HIGH)
+            memory[signals[self.clear_slots[wave]] == devices.HIGH] = (
+                devices.LOW)
+            self.dtype_memory[wave] = memory
+            self.update_outputs(self.q_slots[wave], memory)
+            self.update_outputs(self.qbar_slots[wave], np.where(
+                memory == devices.HIGH, devices.LOW, devices.HIGH))
+
+    def execute_iteration(self):
+        """Execute all the devices for one settling iteration.
+
+        The boundary devices are executed in the order of the sweep, then
+        each level of gates is executed once. Return True if successful. Set
+        steady_state to False if any signal has changed.
+        """
+        self.steady_state = True
+        switch_states = [device.switch_state
+                         for device in self.switch_devices]
+        self.update_outputs(self.switch_slots, switch_states)
+        self.execute_d_types()
+
+        # Complete the clock, RC and siggen transitions
+        source_signals = self.signals[self.source_slots]
+        settled_signals = self.level_table[source_signals]
+        if not np.array_equal(source_signals, settled_signals):
+            self.steady_state = False
+            self.signals[self.source_slots] = settled_signals
+
+        for groups in self.levels:
+            for group in groups:
+                self.execute_group(group)
+        return True
@@ -10,24 +10,41 @@ Devices - makes and stores all the devices in the logic network.
 """
 import random
 
+from scheduler import SourceScheduler
+
 
 class Device:
 
     """Store device properties.
 
+    The counters of clocks and RCs count the cycles of the source
+    scheduler, so they do not need to be incremented on every cycle, and
+    setting the counter or the period of a clock or RC schedules its next
+    switch (see scheduler.SourceScheduler).
+
     Parameters
     ----------
     device_id: device ID.
+    scheduler: instance of the scheduler.SourceScheduler() class, or None.
 
     Public methods
     --------------
-    No public methods.
+    is_scheduled(self): Returns True if the device is a clock or RC counted by
+                        the scheduler.
     """
 
-    def __init__(self, device_id):
+    def __init__(self, device_id, scheduler=None):
         """Initialise device properties."""
 
         self.device_id = device_id
+        self.scheduler = scheduler
+        # The counter was counter_base on cycle counter_cycle of the
+        # scheduler, and the device is next due on due_cycle
+        self.counter_base = None
+        self.counter_cycle = 0
+        self.due_cycle = None
+        self.stored_half_period = None
+        self.stored_rc_period = None
 
         # inputs dictionary stores
         # {input_id: (connected_output_device_id, connected_output_port_id)}
@@ -37,12 +54,52 @@ class Device:
         self.outputs = {}
 
         self.device_kind = None
-        self.clock_half_period = None
-        self.clock_counter = None
         self.switch_state = None
         self.dtype_memory = None
         self.sequence_2_repeat = None
-        self.rc_period = None
+
+    def is_scheduled(self):
+        """Return True if the device is a clock or RC counted by the
+        scheduler."""
+        return (self.scheduler is not None
+                and self.device_kind in self.scheduler.device_kinds)
+
+    @property
+    def clock_counter(self):
+        """Counter of a clock, RC or signal generator."""
+        if self.counter_base is None or not self.is_scheduled():
+            return self.counter_base
+        return self.counter_base + self.scheduler.cycle - self.counter_cycle
+
+    @clock_counter.setter
+    def clock_counter(self, counter):
+        self.counter_base = counter
+        if self.scheduler is not None:
+            self.counter_cycle = self.scheduler.cycle
+        if self.is_scheduled():
+            self.scheduler.schedule_device(self)
+
+    @property
+    def clock_half_period(self):
+        """Number of cycles between the switches of a clock."""
+        return self.stored_half_period
+
+    @clock_half_period.setter
+    def clock_half_period(self, period):
+        self.stored_half_period = period
+        if self.is_scheduled():
+            self.scheduler.schedule_device(self)
+
+    @property
+    def rc_period(self):
+        """Number of cycles before an RC falls."""
+        return self.stored_rc_period
+
+    @rc_period.setter
+    def rc_period(self, period):
+        self.stored_rc_period = period
+        if self.is_scheduled():
+            self.scheduler.schedule_device(self)
 
 
 class Devices:
@@ -82,6 +139,9 @@ class Devices:
     set_switch(self, device_id, signal): Sets switch_state of specified device
                                          to signal.
 
+    set_period(self, device_id, period): Sets the half period of a clock or
+                                         the period of an RC.
+
     make_switch(self, device_id, initial_state): Makes a switch device and sets
                                                  its initial state.
 
@@ -95,6 +155,9 @@ class Devices:
 
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
+    cold_startup_device(self, device): Simulates cold start-up of a single
+                                       device.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
     """
@@ -107,6 +170,12 @@ class Devices:
 
         self.devices_list = []
 
+        # device_index stores {device_id: Device} and kind_index stores
+        # {device_kind: [device_ids]}, so that lookups do not scan the list
+        self.device_index = {}
+        self.kind_index = {}
+        self.device_ids = []
+
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
 
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "RC", "SIGGEN"]
@@ -155,34 +224,33 @@ class Devices:
             dtype_outputs
         )
 
+        # Keeps the clocks and RCs in order of their next switch
+        self.source_scheduler = SourceScheduler(self)
+
         self.max_gate_inputs = 16
 
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.device_index.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
 
         Return a list of all device IDs in the network if no device_kind is
-        specified.
+        specified. The list is cached, so it must not be modified.
         """
-        device_id_list = []
-        for device in self.devices_list:
-            if device_kind is None:
-                device_id_list.append(device.device_id)
-            elif device.device_kind == device_kind:
-                device_id_list.append(device.device_id)
-        return device_id_list
+        if device_kind is None:
+            return self.device_ids
+        return self.kind_index.get(device_kind, [])
 
     def add_device(self, device_id, device_kind):
         """Add the specified device to the network."""
-        new_device = Device(device_id)
+        new_device = Device(device_id, self.source_scheduler)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.device_index[device_id] = new_device
+        self.device_ids.append(device_id)
+        self.kind_index.setdefault(device_kind, []).append(device_id)
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -255,6 +323,26 @@ class Devices:
             device.switch_state = signal
             return True
 
+    def set_period(self, device_id, period):
+        """Set the half period of a clock or the period of an RC device.
+
+        The device keeps its place in its cycle, and switches on the next
+        cycle if it is already past the new period. Return True if
+        successful.
+        """
+        device = self.get_device(device_id)
+        if device is None or period <= 0:
+            return False
+        elif device.device_kind == self.CLOCK:
+            device.clock_half_period = period
+        elif device.device_kind == self.RC:
+            device.rc_period = period
+        else:
+            return False
+        if device.clock_counter is not None and device.clock_counter > period:
+            device.clock_counter = period
+        return True
+
     def make_switch(self, device_id, initial_state):
         """Make a switch device and set its initial state."""
         self.add_device(device_id, self.SWITCH)
@@ -270,7 +358,8 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        # Clock initialised to a random point in its cycle
+        self.cold_startup_device(device)
 
     def make_siggen(self, device_id, sequence_2_repeat):
         """Make a siggen device with the specified sequence of 0's and 1's
@@ -281,7 +370,7 @@ class Devices:
         self.add_device(device_id, self.SIGGEN)
         device = self.get_device(device_id)
         device.sequence_2_repeat = sequence_2_repeat
-        self.cold_startup()
+        self.cold_startup_device(device)
 
     def make_rc(self, device_id, rc_period):
         self.add_device(device_id, self.RC)
@@ -305,7 +394,8 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        # D-type initialised to a random state
+        self.cold_startup_device(self.get_device(device_id))
 
     def cold_startup(self):
         """Simulate cold start-up of D-types, RCs and clocks.
@@ -314,30 +404,38 @@ class Devices:
         begin from a random point in their cycles.
         """
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id,
-                                output_id=None, signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = random.randrange(
-                    device.clock_half_period)
+            self.cold_startup_device(device)
+        self.run_once = False
 
-            elif device.device_kind == self.SIGGEN:
-                if device.sequence_2_repeat[0] == "0":
-                    initial_signal = self.LOW
-                elif device.sequence_2_repeat[0] == "1":
-                    initial_signal = self.HIGH
-                self.add_output(device.device_id, output_id=None,
-                                signal=initial_signal)
-                device.clock_counter = 0
+    def cold_startup_device(self, device):
+        """Simulate cold start-up of a single device.
 
-            elif device.device_kind == self.RC:
-                self.add_output(device.device_id,
-                                output_id=None, signal=self.HIGH)
-                device.clock_counter = 0
+        Devices without an internal state are left unchanged.
+        """
+        if device.device_kind == self.D_TYPE:
+            device.dtype_memory = random.choice([self.LOW, self.HIGH])
+
+        elif device.device_kind == self.CLOCK:
+            clock_signal = random.choice([self.LOW, self.HIGH])
+            self.add_output(device.device_id,
+                            output_id=None, signal=clock_signal)
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = random.randrange(
+                device.clock_half_period)
+
+        elif device.device_kind == self.SIGGEN:
+            if device.sequence_2_repeat[0] == "0":
+                initial_signal = self.LOW
+            elif device.sequence_2_repeat[0] == "1":
+                initial_signal = self.HIGH
+            self.add_output(device.device_id, output_id=None,
+                            signal=initial_signal)
+            device.clock_counter = 0
+
+        elif device.device_kind == self.RC:
+            self.add_output(device.device_id,
+                            output_id=None, signal=self.HIGH)
+            device.clock_counter = 0
         self.run_once = False
 
     def make_device(self, device_id, device_kind, device_property=None):
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Grade test vectors by simulating stuck-at faults.
+
+Used in the Logic Simulator project to find which faults a simulation run
+detects, by simulating a faulty copy of the network for every output stuck
+at LOW or HIGH and comparing its monitored signals with the good network.
+
+Usage
+-----
+Show help: faults.py -h
+Run: faults.py [-r <cycles>] [-j <workers>] [-g <group size>] [-f <seed>]
+               [-s <switch>=<0 or 1>]... [-v <vector path>]
+               [-o <report path>] <file path>
+Each line of the vector file holds the "NAME=LEVEL" switch settings applied
+before one cycle, starting from the first cycle.
+
+Classes
+-------
+FaultSimulator - simulates stuck-at faults in bit-parallel groups.
+
+Functions
+---------
+simulate_fault_groups - simulates groups of faults against the good network.
+"""
+import concurrent.futures
+import getopt
+import json
+import os
+import sys
+
+from bitparallel import BitParallelSimulator
+from montecarlo import build_netlist
+
+
+def simulate_fault_groups(netlist, groups, cycles, vectors, seed):
+    """Simulate groups of faults against the good network.
+
+    Lane 0 of a bit-parallel simulator holds the good network and lane i
+    holds the network with fault i - 1 of the group. Every lane starts from
+    the same cold start-up state and gets the same switch settings. This
+    function is run in the worker processes. Return a list with, for each
+    fault, (first cycle on which a monitored output differs from the good
+    network or None, list of the indices of the monitors that detect it,
+    True if the faulty network oscillates).
+    """
+    [names, devices, network, monitors] = netlist
+    lanes = 1 + max([len(group) for group in groups], default=0)
+    simulator = BitParallelSimulator(names, devices, network, monitors,
+                                     lanes=lanes)
+    monitor_slots = [simulator.output_slots[monitor]
+                     for monitor in monitors.monitors_dictionary]
+    mask = simulator.mask
+    fault_mask = mask & ~1
+    results = []
+    for group in groups:
+        simulator.set_stuck_faults([
+            (device_id, output_id, level, 1 << lane)
+            for lane, (device_id, output_id, level)
+            in enumerate(group, start=1)])
+        simulator.cold_startup([seed] * lanes)
+        first_cycles = {}  # {lane: first cycle with a difference}
+        detecting_lanes = [0] * len(monitor_slots)
+        unsettled_lanes = 0
+        for cycle in range(cycles):
+            if cycle < len(vectors):
+                for switch_id, switch_state in vectors[cycle]:
+                    simulator.set_switch(switch_id, switch_state)
+            simulator.execute_network()
+            unsettled_lanes |= mask & ~simulator.steady_lanes
+            # The level of the good network is copied to every lane
+            different_lanes = 0
+            for index, slot in enumerate(monitor_slots):
+                target = simulator.targets[slot]
+                good_lanes = mask if target & 1 else 0
+                lanes_seen = (target ^ good_lanes) & fault_mask
+                detecting_lanes[index] |= lanes_seen
+                different_lanes |= lanes_seen
+            new_lanes = different_lanes
+            while new_lanes:
+                lane_bit = new_lanes & -new_lanes
+                first_cycles.setdefault(lane_bit.bit_length() - 1, cycle)
+                new_lanes ^= lane_bit
+        for lane in range(1, len(group) + 1):
+            results.append((
+                first_cycles.get(lane),
+                [index for index, lanes_seen in enumerate(detecting_lanes)
+                 if lanes_seen >> lane & 1],
+                bool(unsettled_lanes >> lane & 1)))
+    return results
+
+
+class FaultSimulator:
+
+    """Simulate stuck-at faults in bit-parallel groups.
+
+    Every output of every device can be stuck at LOW or at HIGH. The faults
+    are simulated in groups, one faulty network per lane of a bit-parallel
+    simulator next to the good network, and the groups are shared out over
+    a pool of worker processes, to which the netlist is pickled. A fault is
+    detected by a monitor if the monitored signal differs in level from the
+    good network on any cycle of the run.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    group_size: number of faults simulated at once in each group.
+    max_workers: number of worker processes. Defaults to the number of
+                 processor cores, and no pool is used with one worker.
+
+    Public methods
+    --------------
+    get_faults(self): Returns the list of all the stuck-at faults.
+
+    run(self, cycles, vectors=None, seed=0, faults=None): Simulates the faults
+                                         and returns their results.
+
+    summarise(self, results): Returns the report of the results.
+    """
+
+    def __init__(self, names, devices, network, monitors, group_size=255,
+                 max_workers=None):
+        """Initialise the simulation settings."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.group_size = group_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def get_faults(self):
+        """Return the list of all the stuck-at faults.
+
+        Each fault is (device_id, output_id, level), for every output of the
+        devices in devices_list and the levels LOW and HIGH.
+        """
+        return [(device.device_id, output_id, level)
+                for device in self.devices.devices_list
+                for output_id in device.outputs
+                for level in [self.devices.LOW, self.devices.HIGH]]
+
+    def run(self, cycles, vectors=None, seed=0, faults=None):
+        """Simulate the faults and return their results in order.
+
+        vectors is a list holding, for each cycle from the first, a list of
+        (switch_id, switch_state) set before the cycle. All the faults are
+        simulated if none are given. Each result is a dictionary holding the
+        fault, the first cycle on which it is detected or None, the monitors
+        that detect it, and whether the faulty network oscillates. Raise
+        ValueError if the network is incomplete.
+        """
+        if faults is None:
+            faults = self.get_faults()
+        vectors = [list(vector) for vector in vectors or []]
+        groups = [faults[start:start + self.group_size]
+                  for start in range(0, len(faults), self.group_size)]
+        netlist = [self.names, self.devices, self.network, self.monitors]
+        workers = min(self.max_workers, len(groups))
+        if workers <= 1:
+            group_results = [simulate_fault_groups(netlist, groups, cycles,
+                                                   vectors, seed)]
+        else:
+            # Send several chunks of groups to each worker to balance the
+            # load
+            chunk_size = max(1, len(groups) // (workers * 4))
+            chunks = [groups[start:start + chunk_size]
+                      for start in range(0, len(groups), chunk_size)]
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                group_results = list(executor.map(
+                    simulate_fault_groups, [netlist] * len(chunks), chunks,
+                    [cycles] * len(chunks), [vectors] * len(chunks),
+                    [seed] * len(chunks)))
+
+        monitored = list(self.monitors.monitors_dictionary)
+        results = []
+        fault_results = [result for chunk_results in group_results
+                         for result in chunk_results]
+        for fault, (first_cycle, monitor_indices, oscillating) in zip(
+                faults, fault_results):
+            results.append({"fault": fault, "first_cycle": first_cycle,
+                            "detected_by": [monitored[index]
+                                            for index in monitor_indices],
+                            "oscillating": oscillating})
+        return results
+
+    def summarise(self, results):
+        """Return the report of the results.
+
+        The report holds the fault coverage, the fraction of the faults
+        detected, and for each fault its signal name, stuck level, first
+        detection cycle and the names of the monitors that detect it.
+        """
+        detected = sum(1 for result in results if result["detected_by"])
+        report = {"faults": len(results), "detected": detected,
+                  "coverage": detected / len(results) if results else None,
+                  "results": []}
+        for result in results:
+            (device_id, output_id, level) = result["fault"]
+            report["results"].append({
+                "signal": self.devices.get_signal_name(device_id, output_id),
+                "stuck_at": int(level == self.devices.HIGH),
+                "first_cycle": result["first_cycle"],
+                "detected_by": [self.devices.get_signal_name(*monitor)
+                                for monitor in result["detected_by"]],
+                "oscillating": result["oscillating"]})
+        return report
+
+
+def read_settings(names, devices, settings):
+    """Return a list of (switch_id, switch_state) from "NAME=LEVEL" strings.
+
+    Return None if a setting is invalid.
+    """
+    switch_settings = []
+    for setting in settings:
+        name, separator, level = setting.partition("=")
+        switch_id = names.query(name)
+        if (not separator or level not in ["0", "1"] or switch_id is None
+                or switch_id not in devices.find_devices(devices.SWITCH)):
+            return None
+        switch_settings.append((switch_id, int(level)))
+    return switch_settings
+
+
+def main(arg_list):
+    """Parse the command line options and arguments and grade the vectors.
+
+    Print the fault coverage and write the report if a path is given.
+    """
+    usage_message = (
+        "Usage:\n"
+        "Show help: faults.py -h\n"
+        "Run: faults.py [-r <cycles>] [-j <workers>] [-g <group size>] "
+        "[-f <seed>] [-s <switch>=<0 or 1>]... [-v <vector path>] "
+        "[-o <report path>] <file path>\n"
+        "Each line of the vector file holds the switch settings applied "
+        "before one cycle. The report is written as JSON."
+    )
+    try:
+        options, arguments = getopt.getopt(arg_list, "hr:j:g:f:s:v:o:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit(2)
+
+    cycles = 100
+    max_workers = None
+    group_size = 255
+    seed = 0
+    settings = []
+    vector_path = None
+    report_path = None
+    for option, value in options:
+        if option == "-h":
+            print(usage_message)
+            sys.exit()
+        elif option in ["-r", "-j", "-g", "-f"]:
+            if not value.isdigit():
+                print("Error: " + option + " needs a non-negative integer\n")
+                print(usage_message)
+                sys.exit(2)
+            if option == "-r":
+                cycles = int(value)
+            elif option == "-j":
+                max_workers = int(value) or None
+            elif option == "-g":
+                group_size = max(1, int(value))
+            else:
+                seed = int(value)
+        elif option == "-s":
+            settings.append(value)
+        elif option == "-v":
+            vector_path = value
+        elif option == "-o":
+            report_path = value
+
+    if len(arguments) != 1:
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit(2)
+
+    [path] = arguments
+    netlist = build_netlist(path)
+    if netlist is None:
+        print("Error! Invalid definition file.")
+        sys.exit(1)
+    [names, devices, network, monitors] = netlist
+    vector_lines = []
+    if vector_path is not None:
+        try:
+            with open(vector_path) as file:
+                vector_lines = [line.split() for line in file]
+        except OSError:
+            print("Error! Could not read " + vector_path)
+            sys.exit(1)
+    switch_settings = read_settings(names, devices, settings)
+    vectors = [read_settings(names, devices, line) for line in vector_lines]
+    if switch_settings is None or None in vectors:
+        print("Error! Invalid switch setting.")
+        sys.exit(1)
+    for switch_id, switch_state in switch_settings:
+        devices.set_switch(switch_id, switch_state)
+
+    simulator = FaultSimulator(names, devices, network, monitors, group_size,
+                               max_workers)
+    try:
+        report = simulator.summarise(simulator.run(cycles, vectors, seed))
+    except ValueError:
+        print("Error! All inputs must be connected.")
+        sys.exit(1)
+    print("{} of {} faults detected, coverage {}".format(
+        report["detected"], report["faults"], report["coverage"]))
+    if report_path is not None:
+        try:
+            with open(report_path, "w") as file:
+                json.dump(report, file, indent=2)
+        except OSError:
+            print("Error! Could not write to " + report_path)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -12,6 +12,9 @@ import wx
 import wx.glcanvas as wxcanvas
 from OpenGL import GL, GLUT
 
+from waveform import WaveformGeometry
+from worker import SimulationWorker
+
 
 class MyGLCanvas(wxcanvas.GLCanvas):
     """Handle all drawing operations.
@@ -19,6 +22,15 @@ class MyGLCanvas(wxcanvas.GLCanvas):
     This class contains functions for drawing onto the canvas. It
     also contains handlers for events relating to the canvas.
 
+    The vertices of the signal traces and markers are built as NumPy arrays
+    and uploaded to OpenGL vertex buffers only when the signals change, so
+    panning and zooming only update the modelview matrix. Only the traces
+    and cycles in view are drawn, and when several cycles fall on a pixel,
+    the traces are drawn from their min/max pyramids, so the time to draw
+    depends on the size of the window rather than the length of the traces.
+    When the traces grow, only the vertices of the new cycles are built and
+    copied into the vertex buffers.
+
     Parameters
     ----------
     parent: parent window.
@@ -29,7 +41,31 @@ class MyGLCanvas(wxcanvas.GLCanvas):
     --------------
     init_gl(self): Configures the OpenGL context.
 
-    render(self, text): Handles all drawing operations.
+    update_view(self): Sets the modelview matrix for the pan and zoom.
+
+    get_signals_key(self, signals_list): Returns a key that changes when the
+                                         signals to draw change.
+
+    update_buffers(self): Rebuilds the vertex buffers if the signals changed.
+
+    extends_buffers(self, signals_key): Returns True if the signals only have
+                                        new cycles since the buffers were
+                                        built.
+
+    load_buffers(self): Copies all the vertices into the vertex buffers.
+
+    get_visible_area(self): Returns the object coordinates of the edges of
+                            the canvas.
+
+    draw_trace(self, colour, position, first_cycle, stop_cycle, level): Draws
+        the cycles in view of the trace at a position.
+
+    draw_markers(self, position, first_cycle, stop_cycle): Draws the markers
+        in view of the trace at a position.
+
+    render_signals(self): Renders all the signals and labels.
+
+    render(self, signals_list): Handles all drawing operations.
 
     on_paint(self, event): Handles the paint event.
 
@@ -82,6 +118,17 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.colours = [self.WHITE, self.RED, self.GREEN, self.BLUE]
         self.signals_list = []
 
+        # Vertices of the traces and markers, and the OpenGL vertex buffers
+        # they are uploaded to
+        self.geometry = WaveformGeometry()
+        self.trace_buffer = None
+        self.marker_buffer = None
+        # Key of the signals the vertex buffers were built from
+        self.buffers_key = None
+
+        # Smallest distance in pixels between cycle markers that are drawn
+        self.MARKER_PIXELS = 3
+
         # Background colours
         self.BG_WHITE = (1.0, 1.0, 1.0)
         self.BG_BLACK = (0.20, 0.20, 0.20)
@@ -105,6 +152,11 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         GL.glLoadIdentity()
         GL.glOrtho(0, size.width, 0, size.height, -1, 1)
         GL.glMatrixMode(GL.GL_MODELVIEW)
+        self.update_view()
+
+    def update_view(self):
+        """Set the modelview matrix for the current pan and zoom."""
+
         GL.glLoadIdentity()
         GL.glTranslated(self.pan_x, self.pan_y, 0.0)
         GL.glScaled(self.zoom, self.zoom, self.zoom)
@@ -127,44 +179,158 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         )
         self.colours[0] = self.BLACK
 
-    def draw_trace(self, signal, colour, position):
-        """Draw a trace for a given signal."""
+    def get_signals_key(self, signals_list):
+        """Return a key that changes when the signals to draw change.
 
-        GL.glColor3f(colour[0], colour[1], colour[2])
-        GL.glBegin(GL.GL_LINE_STRIP)
+        Traces are recorded in place, so the key holds the identity and the
+        length of each trace, and the number of cycles a ring buffer trace
+        has discarded.
+        """
+        return tuple((signal_name, id(signal), len(signal),
+                      getattr(signal, "discarded_signals", 0))
+                     for signal_name, signal in signals_list)
 
-        for i in range(len(signal)):
-            x = (i * 50) + 30
-            x_next = (i * 50) + 80
-            y = 930 + 50 * int(signal[i]) - 90 * position
-            GL.glVertex2f(x, y)
-            GL.glVertex2f(x_next, y)
-        GL.glEnd()
-        self.draw_markers(signal, position)
+    def update_buffers(self):
+        """Rebuild the vertex buffers if the signals have changed.
 
-    def draw_markers(self, signal, position):
-        """Draw markers for a given signal."""
+        If the traces have only grown, the vertices of the new cycles are
+        appended and copied into the buffers.
+        """
 
-        GL.glColor3f(0.5, 0.5, 0.5)
+        signals_key = self.get_signals_key(self.signals_list)
+        if signals_key == self.buffers_key:
+            return
+        if self.extends_buffers(signals_key):
+            # Slicing a trace only copies the new cycles
+            signal_lists = [
+                signal[old_length:] for (signal_name, signal), (
+                    old_name, old_id, old_length, old_discarded)
+                in zip(self.signals_list, self.buffers_key)]
+            if self.geometry.append(signal_lists):
+                for buffer, vertices, updates in [
+                        (self.trace_buffer, self.geometry.trace_vertices,
+                         self.geometry.trace_updates),
+                        (self.marker_buffer, self.geometry.marker_vertices,
+                         [self.geometry.marker_update])]:
+                    GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+                    for first_vertex, stop_vertex in updates:
+                        if stop_vertex > first_vertex:
+                            GL.glBufferSubData(
+                                GL.GL_ARRAY_BUFFER,
+                                first_vertex * vertices.itemsize * 2,
+                                (stop_vertex - first_vertex)
+                                * vertices.itemsize * 2,
+                                vertices[first_vertex:stop_vertex])
+                GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+            else:  # the vertices were laid out again
+                self.load_buffers()
+        else:
+            self.geometry.build(self.signals_list)
+            self.load_buffers()
+        self.buffers_key = signals_key
+
+    def extends_buffers(self, signals_key):
+        """Return True if the signals only have new cycles since the vertex
+        buffers were built."""
+
+        if (self.buffers_key is None
+                or len(signals_key) != len(self.buffers_key)):
+            return False
+        for (name, signal_id, length, discarded), (
+                old_name, old_id, old_length, old_discarded) in zip(
+                    signals_key, self.buffers_key):
+            if (name != old_name or signal_id != old_id
+                    or length < old_length or discarded != old_discarded):
+                return False
+        return True
+
+    def load_buffers(self):
+        """Copy all the vertices into the vertex buffers."""
+
+        if self.trace_buffer is None:
+            [self.trace_buffer, self.marker_buffer] = GL.glGenBuffers(2)
+        for buffer, vertices in [
+                (self.trace_buffer, self.geometry.trace_vertices),
+                (self.marker_buffer, self.geometry.marker_vertices)]:
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes,
+                            vertices if len(vertices) else None,
+                            GL.GL_DYNAMIC_DRAW)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def get_visible_area(self):
+        """Return the object coordinates of the edges of the canvas.
+
+        Return [left, right, bottom, top].
+        """
+        size = self.GetClientSize()
+        return [-self.pan_x / self.zoom,
+                (size.width - self.pan_x) / self.zoom,
+                -self.pan_y / self.zoom,
+                (size.height - self.pan_y) / self.zoom]
 
-        for i in range(len(signal) + 1):
-            GL.glBegin(GL.GL_LINE_STRIP)
-            x = (i * 50) + 30
-            if i % 5 == 0:
-                y = 930 - 5 - 90 * position
-                y_next = 930 - 30 - 90 * position
-            else:
-                y = 930 - 5 - 90 * position
-                y_next = 930 - 15 - 90 * position
-            GL.glVertex2f(x, y)
-            GL.glVertex2f(x, y_next)
-            GL.glEnd()
+    def draw_trace(self, colour, position, first_cycle, stop_cycle, level):
+        """Draw the cycles in view of the trace at a position.
 
-    def render_signals(self):
-        """Render all the signals and labels."""
+        At level 0, the cycles are drawn from the trace vertex buffer, and
+        at higher levels from the min/max pyramid of the trace.
+        """
+        GL.glColor3f(colour[0], colour[1], colour[2])
+        if level == 0:
+            [first_vertex, vertex_count] = self.geometry.get_trace_range(
+                position, first_cycle, stop_cycle)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.trace_buffer)
+            GL.glVertexPointer(2, GL.GL_FLOAT, 0, None)
+        else:
+            vertices = self.geometry.build_level_vertices(
+                position, level, first_cycle, stop_cycle)
+            first_vertex = 0
+            vertex_count = len(vertices)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+            GL.glVertexPointer(2, GL.GL_FLOAT, 0, vertices)
+        if vertex_count:
+            GL.glDrawArrays(GL.GL_LINE_STRIP, first_vertex, vertex_count)
+
+    def draw_markers(self, position, first_cycle, stop_cycle):
+        """Draw the markers in view of the trace at a position.
+
+        The markers of the longest trace are moved down to the trace.
+        """
+        if first_cycle > stop_cycle:
+            return
+        GL.glColor3f(0.5, 0.5, 0.5)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.marker_buffer)
+        GL.glVertexPointer(2, GL.GL_FLOAT, 0, None)
+        GL.glPushMatrix()
+        GL.glTranslated(0.0, -self.geometry.TRACE_SPACING * position, 0.0)
+        # Markers at the start of each cycle and at the end of the last one
+        GL.glDrawArrays(GL.GL_LINES, 2 * first_cycle,
+                        2 * (stop_cycle - first_cycle + 1))
+        GL.glPopMatrix()
 
-        for i in range(len(self.signals_list)):
-            self.draw_trace(self.signals_list[i][1], self.colours[i % 4], i)
+    def render_signals(self):
+        """Render the signals and labels in view."""
+
+        self.update_buffers()
+        [left, right, bottom, top] = self.get_visible_area()
+        [first_position, stop_position] = (
+            self.geometry.get_visible_positions(bottom, top))
+        cycle_pixels = self.geometry.CYCLE_WIDTH * self.zoom
+        level = self.geometry.get_level(1 / cycle_pixels)
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        for i in range(first_position, stop_position):
+            cycles = self.geometry.trace_lengths[i]
+            [first_cycle, stop_cycle] = self.geometry.get_visible_cycles(
+                left, right, cycles)
+            self.draw_trace(self.colours[i % 4], i, first_cycle, stop_cycle,
+                            level)
+            # Markers closer than MARKER_PIXELS would fill the space below
+            # the trace
+            if cycle_pixels >= self.MARKER_PIXELS:
+                self.draw_markers(i, first_cycle, stop_cycle)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        for i in range(first_position, stop_position):
             self.render_text(self.signals_list[i][0], 10, 950 - 90 * i)
 
     def render(self, signals_list):
@@ -175,6 +341,8 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             # Configure the viewport, modelview and projection matrices
             self.init_gl()
             self.init = True
+        else:
+            self.update_view()
 
         # Clear everything
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
@@ -223,7 +391,6 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             self.pan_y -= event.GetY() - self.last_mouse_y
             self.last_mouse_x = event.GetX()
             self.last_mouse_y = event.GetY()
-            self.init = False
         if event.GetWheelRotation() < 0:
             self.zoom *= 1.0 + (
                 event.GetWheelRotation() / (10 * event.GetWheelDelta())
@@ -231,7 +398,6 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             # Adjust pan so as to zoom around the mouse position
             self.pan_x -= (self.zoom - old_zoom) * ox
             self.pan_y -= (self.zoom - old_zoom) * oy
-            self.init = False
         if event.GetWheelRotation() > 0:
             self.zoom /= 1.0 - (
                 event.GetWheelRotation() / (10 * event.GetWheelDelta())
@@ -239,7 +405,6 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             # Adjust pan so as to zoom around the mouse position
             self.pan_x -= (self.zoom - old_zoom) * ox
             self.pan_y -= (self.zoom - old_zoom) * oy
-            self.init = False
         self.render(self.signals_list)
         self.Refresh()  # triggers the paint event
 
@@ -276,15 +441,23 @@ class Gui(wx.Frame):
     --------------
     on_menu(self, event): Event handler for the file menu.
 
+    set_capture(self, capture): Turns recording every output on or off.
+
     on_spin(self, event): Event handler for when the user changes the spin
                            control value.
 
     on_run_button(self, event): Event handler for when the user clicks the run
                                 button.
 
+    on_cancel_button(self, event): Event handler for when the user clicks the
+                                   cancel button.
+
     on_text_box(self, event): Event handler for when the user enters text.
     """
 
+    # Largest number of device outputs captured by default
+    CAPTURE_OUTPUT_LIMIT = 1000
+
     def __init__(
         self, title, path, names, devices, network, monitors, language
     ):
@@ -333,12 +506,31 @@ class Gui(wx.Frame):
         # Used to use the continue button to run on first click
         self.running = False
 
+        # Background simulation
+        self.worker = None
+
+        # Trace model drawn by the canvas, {(device_id, output_id): trace}.
+        # It is a copy of the traces of the monitors, which the background
+        # simulation records, and new cycles are appended to it as they
+        # arrive.
+        self.traces = {}
+
         # Default number of cycles
         self.cycle_count = 28
 
-        # Set up list of devices and signals
+        # Record every output of small circuits, so that new monitors are
+        # filled in without running the simulation again. Capturing keeps
+        # every output of every cycle, so it can be turned off in the menu.
+        output_count = sum(len(device.outputs)
+                           for device in devices.devices_list)
+        self.capture = output_count <= self.CAPTURE_OUTPUT_LIMIT
+        self.monitors.set_capture(self.capture)
+
+        # Set up list of devices and signals. The first cycles are simulated
+        # in the background once the window is set up.
         self.devices_list = self.set_up_devices(devices, names)
-        self.signals_list = self.gather_signal_data(names, self.cycle_count)
+        self.sync_traces()
+        self.signals_list = self.get_signal_data(names)
 
         # Initialise menus and bar
         menuBar = wx.MenuBar()
@@ -349,6 +541,9 @@ class Gui(wx.Frame):
         fileMenu.Append(wx.ID_ABOUT, self._("&About"))
         fileMenu.Append(wx.ID_FILE1, self._("&Import"))
         fileMenu.Append(wx.ID_FILE2, self._("&Export"))
+        self.capture_item = fileMenu.AppendCheckItem(
+            wx.ID_ANY, self._("&Capture all outputs"))
+        self.capture_item.Check(self.capture)
         helpMenu.Append(wx.ID_HELP, self._("&Tutorial"))
         fileMenu.Append(wx.ID_EXIT, self._("&Exit"))
 
@@ -384,6 +579,7 @@ class Gui(wx.Frame):
         )
         self.run_button.SetFont(button_font)
         self.continue_button.SetFont(button_font)
+        self.cancel_button.SetFont(button_font)
 
         # Create a sizer for the device info scroll panel
         device_sizer = wx.BoxSizer(wx.VERTICAL)
@@ -402,6 +598,8 @@ class Gui(wx.Frame):
         self.cycles_spin.Bind(wx.EVT_SPINCTRL, self.on_spin_cycles)
         self.run_button.Bind(wx.EVT_BUTTON, self.on_run_button)
         self.continue_button.Bind(wx.EVT_BUTTON, self.on_continue_button)
+        self.cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel_button)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
         self.dark_mode_button.Bind(wx.EVT_BUTTON, self.on_toggle_dark_mode)
 
         # Configure main and side sizers for layout
@@ -416,6 +614,8 @@ class Gui(wx.Frame):
         side_sizer.Add(self.cycles_spin, 1, wx.ALL | wx.EXPAND, 5)
         side_sizer.Add(self.run_button, 3, wx.ALL | wx.EXPAND, 5)
         side_sizer.Add(self.continue_button, 3, wx.ALL | wx.EXPAND, 5)
+        side_sizer.Add(self.progress_gauge, 1, wx.ALL | wx.EXPAND, 5)
+        side_sizer.Add(self.cancel_button, 3, wx.ALL | wx.EXPAND, 5)
         side_sizer.Add(self.device_scroll, 10, wx.ALL | wx.EXPAND, 5)
 
         # Add side_sizer to main_sizer as the last item
@@ -425,6 +625,8 @@ class Gui(wx.Frame):
         self.Maximize(True)
         self.SetSizer(main_sizer)
 
+        self.start_simulation(self.cycle_count)
+
     def set_up_widgets(self):
         """Sets up the widgets for the GUI."""
 
@@ -437,6 +639,9 @@ class Gui(wx.Frame):
         )
         self.run_button = wx.Button(self, wx.ID_ANY, self._("Run"))
         self.continue_button = wx.Button(self, wx.ID_ANY, self._("Continue"))
+        self.progress_gauge = wx.Gauge(self, wx.ID_ANY, 1)
+        self.cancel_button = wx.Button(self, wx.ID_ANY, self._("Cancel"))
+        self.cancel_button.Disable()
         self.dark_mode_button = wx.Button(
             self, wx.ID_ANY, self._("Light mode")
         )
@@ -615,39 +820,32 @@ class Gui(wx.Frame):
                 monitored_list.append(names.get_name_string(item[0][0]))
         return monitored_list
 
-    def gather_signal_data(self, names, cycle_count):
-        """Run the circuit, then record and return signals for
-        monitored devices."""
-
-        signals_list = []
-        self.run(cycle_count)
-        for item in self.monitors.monitors_dictionary.items():
-            single_signal = []
-
-            if item[0][1] == 14:
-                single_signal.append(names.get_name_string(item[0][0]) + ".Q")
-                single_signal.append(item[1])
-                signals_list.append(single_signal)
-            elif item[0][1] == 15:
-                single_signal.append(
-                    names.get_name_string(item[0][0]) + ".QBAR"
-                )
-                single_signal.append(item[1])
-                signals_list.append(single_signal)
+    def get_signal_data(self, names):
+        """Return the recorded signals for monitored devices.
 
-            else:
-                single_signal.append(names.get_name_string(item[0][0]))
-                single_signal.append(item[1])
-                signals_list.append(single_signal)
+        The signals are the traces of the trace model, so the list only
+        changes when monitors are added or removed.
+        """
 
+        signals_list = []
+        for (device_id, output_id), signal_list in self.traces.items():
+            signals_list.append(
+                [self.devices.get_signal_name(device_id, output_id),
+                 signal_list])
         return signals_list
 
-    def run(self, cycles):
-        """Runs the circuit for a given number of cycles."""
+    def sync_traces(self):
+        """Copy the traces of new monitors into the trace model, and drop
+        the traces of removed monitors."""
 
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
+        traces = {}
+        for monitor, signal_list in (
+                self.monitors.monitors_dictionary.items()):
+            if monitor in self.traces:
+                traces[monitor] = self.traces[monitor]
+            else:
+                traces[monitor] = self.monitors.make_trace(signal_list[:])
+        self.traces = traces
 
     def device_number_to_string(self, device_number):
         """Returns a string containing the name of the device with the
@@ -699,11 +897,19 @@ class Gui(wx.Frame):
                 name_id = self.names.query(self.monitor_checks[checkbox])
                 self.monitors.remove_monitor(name_id, None)
 
-        # Update the canvas if the circuit has been run
+        # Update the canvas if the circuit has been run. New monitors are
+        # filled in from the captured signals, and switches change from the
+        # next cycle on, so nothing is run again.
         if not self.running:
             return
-        self.signals_list = self.on_run_button("")
-        self.canvas.render(self.signals_list)
+        if checkbox in self.monitor_checks:
+            if isChecked and not self.capture:
+                # The new monitor is only filled in by running again
+                self.on_run_button("")
+                return
+            self.sync_traces()
+            self.signals_list = self.get_signal_data(self.names)
+            self.canvas.render(self.signals_list)
 
     def on_menu(self, event):
         """Handle the event when the user selects a menu item."""
@@ -713,6 +919,10 @@ class Gui(wx.Frame):
         if Id == wx.ID_EXIT:
             self.Close(True)
 
+        # Capture option
+        if Id == self.capture_item.GetId():
+            self.set_capture(self.capture_item.IsChecked())
+
         # About dialog
         if Id == wx.ID_ABOUT:
             wx.MessageBox(
@@ -749,6 +959,19 @@ class Gui(wx.Frame):
                 file_name = dialog.GetValue()
                 print(self._("File name:"), file_name)
 
+    def set_capture(self, capture):
+        """Turn recording every output on or off.
+
+        Captured signals are recorded from the next cycle on. The option
+        cannot change while the simulation runs in the background.
+        """
+
+        if self.worker is not None:
+            self.capture_item.Check(self.capture)
+            return
+        self.capture = capture
+        self.monitors.set_capture(capture)
+
     def on_spin_cycles(self, event):
         """Handle the event when the user changes the number of
         cycles value."""
@@ -759,30 +982,74 @@ class Gui(wx.Frame):
         spinner = event.GetEventObject()
         value = spinner.GetValue()
         name_id = self.names.query(self.clocks[spinner])
-        device = self.devices.get_device(name_id)
-        if self.device_number_to_string(device.device_kind) == self._("CLOCK"):
-            device.clock_half_period = value
-        elif self.device_number_to_string(device.device_kind) == self._("RC"):
-            device.rc_period = value
-        if not self.running:
+        # The new period applies from the next cycle on, so the cycles run
+        # so far are kept
+        self.network.set_device_period(name_id, value)
+
+    def start_simulation(self, cycles):
+        """Run the circuit for a number of cycles in the background.
+
+        The controls that change the network or the monitors are disabled
+        until the simulation stops, and the chunks of signals are appended to
+        the trace model as they arrive.
+        """
+
+        self.run_button.Disable()
+        self.continue_button.Disable()
+        self.device_scroll.Disable()
+        self.cancel_button.Enable()
+        self.progress_gauge.SetRange(max(cycles, 1))
+        self.progress_gauge.SetValue(0)
+        self.worker = SimulationWorker(
+            self.network, self.monitors, cycles, self.on_simulation_chunk,
+            self.on_simulation_done, post=wx.CallAfter)
+        self.worker.start()
+
+    def on_simulation_chunk(self, cycles_completed, chunk):
+        """Handle a chunk of signals from the background simulation."""
+
+        if self.worker is None:  # the window is closing
+            return
+        for monitor, signals in chunk.items():
+            self.traces[monitor].extend(signals)
+        self.progress_gauge.SetValue(cycles_completed)
+        self.canvas.render(self.signals_list)
+
+    def on_simulation_done(self, cycles_completed, outcome):
+        """Handle the end of the background simulation."""
+
+        if self.worker is None:  # the window is closing
             return
-        self.signals_list = self.on_run_button("")
+        self.worker = None
+        self.run_button.Enable()
+        self.continue_button.Enable()
+        self.device_scroll.Enable()
+        self.cancel_button.Disable()
+        self.progress_gauge.SetValue(0)
         self.canvas.render(self.signals_list)
+        if outcome == SimulationWorker.OSCILLATING:
+            wx.MessageBox(
+                self._("The network is oscillating."),
+                self._("Simulation stopped"),
+                wx.ICON_WARNING | wx.OK,
+            )
 
     def on_run_button(self, event):
         """Handle the event when the user clicks the run button."""
 
-        # Reset monitors and cold start the devices
+        if self.worker is not None:
+            return
+
+        # Reset monitors and the trace model, and cold start the devices
         self.monitors.reset_monitors()
+        self.traces = {}
+        self.sync_traces()
+        self.signals_list = self.get_signal_data(self.names)
         self.devices.cold_startup()
 
-        # Run the circuit and record signals for monitored devices
-        self.signals_list = self.gather_signal_data(
-            self.names, self.cycle_count
-        )
-
-        # Render the canvas, set to running
-        self.canvas.render(self.signals_list)
+        # Run the circuit and record signals for monitored devices, set to
+        # running
+        self.start_simulation(self.cycle_count)
         self.running = True
 
     def on_continue_button(self, event):
@@ -790,10 +1057,23 @@ class Gui(wx.Frame):
         if not self.running:
             self.on_run_button("")
             return
-        self.signals_list = self.gather_signal_data(
-            self.names, self.cycle_count
-        )
-        self.canvas.render(self.signals_list)
+        if self.worker is not None:
+            return
+        self.start_simulation(self.cycle_count)
+
+    def on_cancel_button(self, event):
+        """Handle the event when the user clicks the cancel button."""
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_close(self, event):
+        """Stop the background simulation before the window closes."""
+        if self.worker is not None:
+            worker = self.worker
+            self.worker = None
+            worker.cancel()
+            worker.join()
+        event.Skip()
 
     def on_toggle_dark_mode(self, event):
         """Handle the event when the user clicks the dark mode button."""
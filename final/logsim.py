@@ -9,60 +9,145 @@ Usage
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
 Graphical user interface: logsim.py <file path>
+Batch mode: logsim.py -b <file path> [-r <cycles>] [-s <switch>=<0 or 1>]...
+            [-o <output path>]
+Add -n before the other options to skip the netlist cache.
 """
+import contextlib
 import getopt
 import sys
 import os
 
-
-import wx
-
+import error
 from names import Names
 from devices import Devices
 from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from cache import NetlistCache
 from userint import UserInterface
-from gui import Gui
+from batch import BatchRunner
+
+# Number of cycles simulated in batch mode if not given
+BATCH_CYCLES = 100
+
+
+def load_netlist(path, use_cache=True):
+    """Build the netlist described by the definition file at path.
+
+    A netlist cached by an earlier run is used if the file has not changed.
+    Return a list of [names, devices, network, monitors], or None if the file
+    has errors or cannot be read. The errors are reported by the parser.
+    """
+    netlist_cache = NetlistCache() if use_cache else None
+    if netlist_cache is not None:
+        netlist = netlist_cache.load(path)
+        if netlist is not None:
+            [names, devices, network, monitors] = netlist
+            # Do not reuse the random start-up state of the cached run
+            devices.cold_startup()
+            return netlist
+
+    # Initialise instances of the four inner simulator classes
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    try:
+        scanner = Scanner(path, names, buffered=True)
+        parser = Parser(names, devices, network, monitors, scanner)
+        if not parser.parse_network():
+            return None
+    except error.MyException:  # raised by the parser after its messages
+        return None
+    except OSError:
+        print("Error: cannot read " + path)
+        return None
+    if netlist_cache is not None:
+        netlist_cache.store(path, names, devices, network, monitors)
+    return [names, devices, network, monitors]
+
+
+def run_batch(path, use_cache, cycles, switch_settings, output_path):
+    """Run a batch simulation of the definition file at path.
+
+    Return the batch error, used as the exit status. Messages of the parser
+    go to the standard error, so that the standard output only holds the
+    signal traces.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        netlist = load_netlist(path, use_cache)
+    if netlist is None:
+        return BatchRunner.DEFINITION_ERROR
+    batch_runner = BatchRunner(*netlist)
+    if not batch_runner.set_switches(switch_settings):
+        return batch_runner.SWITCH_ERROR
+    return batch_runner.run(cycles, output_path)
 
 
 def main(arg_list):
     """Parse the command line options and arguments specified in arg_list.
 
     Run either the command line user interface, the graphical user interface,
-    or display the usage message.
+    a batch simulation, or display the usage message. wx and the graphical
+    user interface are only imported if they are used.
     """
     usage_message = (
         "Usage:\n"
         "Show help: logsim.py -h\n"
         "Command line user interface: logsim.py -c <file path>\n"
-        "Graphical user interface: logsim.py <file path>"
+        "Graphical user interface: logsim.py <file path>\n"
+        "Batch mode: logsim.py -b <file path> [-r <cycles>] "
+        "[-s <switch>=<0 or 1>]... [-o <output path>]\n"
+        "Batch mode writes the monitored signals to the output path, as a VCD "
+        "file if it ends in .vcd, or to the standard output.\n"
+        "Add -n before the other options to skip the netlist cache."
     )
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list, "hnc:b:r:s:o:")
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
         sys.exit()
 
-    # Initialise instances of the four inner simulator classes
-    names = Names()
-    devices = Devices(names)
-    network = Network(names, devices)
-    monitors = Monitors(names, devices, network)
+    use_cache = ("-n", "") not in options
+    options = [(option, path) for option, path in options if option != "-n"]
+
+    # Settings of the batch mode
+    cycles = BATCH_CYCLES
+    switch_settings = []
+    output_path = None
+    for option, value in options:
+        if option == "-r":
+            if not value.isdigit():
+                print("Error: the number of cycles must be a non-negative "
+                      "integer\n")
+                print(usage_message)
+                sys.exit(2)
+            cycles = int(value)
+        elif option == "-s":
+            switch_settings.append(value)
+        elif option == "-o":
+            output_path = value
+    options = [(option, path) for option, path in options
+               if option not in ["-r", "-s", "-o"]]
 
     for option, path in options:
         if option == "-h":  # print the usage message
             print(usage_message)
             sys.exit()
         elif option == "-c":  # use the command line user interface
-            scanner = Scanner(path, names)
-            parser = Parser(names, devices, network, monitors, scanner)
-            if parser.parse_network():
+            netlist = load_netlist(path, use_cache)
+            if netlist is not None:
+                [names, devices, network, monitors] = netlist
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
                 userint.command_interface()
+        elif option == "-b":  # run a batch simulation
+            sys.exit(run_batch(path, use_cache, cycles, switch_settings,
+                               output_path))
 
     if not options:  # no option given, use the graphical user interface
         if len(arguments) != 1:  # wrong number of arguments
@@ -71,9 +156,12 @@ def main(arg_list):
             sys.exit()
 
         [path] = arguments
-        scanner = Scanner(path, names)
-        parser = Parser(names, devices, network, monitors, scanner)
-        if parser.parse_network():
+        netlist = load_netlist(path, use_cache)
+        if netlist is not None:
+            [names, devices, network, monitors] = netlist
+            import wx
+            from gui import Gui
+
             # Initialise an instance of the gui.Gui() class
             lang_env = os.getenv('LANG', 'en_GB.utf8')
             lang_code = lang_env.split('_')[0]
@@ -5,12 +5,348 @@ signals.
 
 Classes
 -------
+SignalTrace - stores the signal levels of one monitor, one byte per cycle.
+ChangeTrace - stores the signal level changes of one monitor.
 Monitors - records and displays specified output signals.
 
 """
+import array
+import bisect
 import collections
 
 
+class SignalTrace:
+
+    """Store the signal levels of one monitor, one byte per cycle.
+
+    The trace behaves like the list of signal levels it replaces: it can be
+    appended to, extended, indexed, sliced, iterated over and compared with a
+    list. Slices are returned as arrays of signal levels.
+
+    If a capacity is given, the trace is a ring buffer that only keeps the
+    signals of the last capacity cycles. Older signals are discarded and
+    counted in discarded_signals.
+
+    Parameters
+    ----------
+    signals: initial signal levels.
+    capacity: maximum number of signal levels kept, or None to keep them all.
+
+    Public methods
+    --------------
+    append(self, signal): Adds the signal level of the next cycle.
+
+    extend(self, signals): Adds the signal levels of the next cycles.
+
+    repeat_signals(self, period, repeats): Repeats the signal levels of the
+                                           last period cycles.
+
+    get_signals(self): Returns the signal levels as an array.
+
+    tolist(self): Returns the signal levels as a list.
+    """
+
+    def __init__(self, signals=(), capacity=None):
+        """Initialise the signal buffer."""
+        if capacity is not None and capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.signals = array.array("b")
+        self.start = 0  # index of the oldest signal in the ring buffer
+        self.discarded_signals = 0
+        self.extend(signals)
+
+    def append(self, signal):
+        """Add the signal level of the next cycle."""
+        if self.capacity is None or len(self.signals) < self.capacity:
+            self.signals.append(signal)
+        else:  # overwrite the oldest signal
+            self.signals[self.start] = signal
+            self.start += 1
+            if self.start == self.capacity:
+                self.start = 0
+            self.discarded_signals += 1
+
+    def extend(self, signals):
+        """Add the signal levels of the next cycles."""
+        if self.capacity is None:
+            self.signals.extend(signals)
+            return
+        signals = array.array("b", signals)
+        if len(signals) >= self.capacity:
+            # All the stored signals are replaced
+            self.discarded_signals += (len(self.signals) + len(signals) -
+                                       self.capacity)
+            self.signals = signals[-self.capacity:]
+            self.start = 0
+            return
+        # Fill the buffer, then overwrite the oldest signals in place
+        free = self.capacity - len(self.signals)
+        self.signals.extend(signals[:free])
+        signals = signals[free:]
+        if not signals:
+            return
+        self.discarded_signals += len(signals)
+        end = self.start + len(signals)
+        if end <= self.capacity:
+            self.signals[self.start:end] = signals
+        else:
+            split = self.capacity - self.start
+            self.signals[self.start:] = signals[:split]
+            self.signals[:end - self.capacity] = signals[split:]
+        self.start = end % self.capacity
+
+    def repeat_signals(self, period, repeats):
+        """Repeat the signal levels of the last period cycles.
+
+        The signals are added repeats times. This is used to record the
+        cycles of a periodic network without executing them. A ring buffer
+        only builds the signals it keeps, and counts the others as discarded.
+        """
+        period_signals = self[-period:]
+        period = len(period_signals)
+        added = period * repeats
+        if self.capacity is None or added < self.capacity:
+            self.extend(period_signals * repeats)
+            return
+        skipped = added - self.capacity
+        offset = skipped % period
+        copies = -(-(offset + self.capacity) // period)  # rounded up
+        self.discarded_signals += len(self.signals) + skipped
+        self.signals = (period_signals * copies)[offset:
+                                                 offset + self.capacity]
+        self.start = 0
+
+    def get_signals(self):
+        """Return the stored signal levels in order, as an array."""
+        if self.start == 0:
+            return self.signals[:]
+        return self.signals[self.start:] + self.signals[:self.start]
+
+    def tolist(self):
+        """Return the signal levels as a list."""
+        return self.get_signals().tolist()
+
+    def __len__(self):
+        """Return the number of stored signal levels."""
+        return len(self.signals)
+
+    def __getitem__(self, index):
+        """Return a signal level, or an array of signal levels for a slice.
+
+        Only the signals in a slice with a step of 1 are copied.
+        """
+        if isinstance(index, slice):
+            if self.start == 0:
+                return self.signals[index]
+            [first, stop, step] = index.indices(len(self.signals))
+            if step != 1:
+                return self.get_signals()[index]
+            # Map the cycles to the ring buffer, which wraps around once
+            first += self.start
+            stop += self.start
+            capacity = len(self.signals)
+            if stop <= capacity:
+                return self.signals[first:stop]
+            if first >= capacity:
+                return self.signals[first - capacity:stop - capacity]
+            return self.signals[first:] + self.signals[:stop - capacity]
+        if index < 0:
+            index += len(self.signals)
+        if index < 0 or index >= len(self.signals):
+            raise IndexError("signal trace index out of range")
+        if self.start:
+            index = (self.start + index) % len(self.signals)
+        return self.signals[index]
+
+    def __iter__(self):
+        """Iterate over the signal levels in order."""
+        return iter(self.get_signals())
+
+    def __eq__(self, other):
+        """Return True if other holds the same signal levels."""
+        if isinstance(other, SignalTrace):
+            return self.get_signals() == other.get_signals()
+        if isinstance(other, (list, tuple, array.array)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Return the representation of the trace."""
+        return "SignalTrace({!r}, capacity={!r})".format(self.tolist(),
+                                                         self.capacity)
+
+
+class ChangeTrace:
+
+    """Store the signal level changes of one monitor.
+
+    Only the cycles on which the signal level changes are stored, as a list of
+    (cycle, signal level) changes, so the memory used grows with the activity
+    of the signal instead of the number of cycles. The trace behaves like a
+    SignalTrace: the signal level of each cycle is found by a binary search
+    of the changes, and the signal levels of all the cycles are only
+    generated when they are asked for.
+
+    Parameters
+    ----------
+    signals: initial signal levels.
+
+    Public methods
+    --------------
+    append(self, signal): Adds the signal level of the next cycle.
+
+    extend(self, signals): Adds the signal levels of the next cycles.
+
+    repeat_signals(self, period, repeats): Repeats the signal levels of the
+                                           last period cycles.
+
+    get_signal(self, cycle): Returns the signal level on a cycle.
+
+    get_changes(self): Returns the list of (cycle, signal level) changes.
+
+    get_signals(self): Returns the signal levels as an array.
+
+    tolist(self): Returns the signal levels as a list.
+    """
+
+    def __init__(self, signals=()):
+        """Initialise the change lists."""
+        self.change_cycles = array.array("q")
+        self.change_signals = array.array("b")
+        self.cycles = 0  # number of cycles recorded
+        self.signals = None  # signal levels, generated when asked for
+        self.extend(signals)
+
+    def append(self, signal):
+        """Add the signal level of the next cycle."""
+        if not self.change_signals or self.change_signals[-1] != signal:
+            self.change_cycles.append(self.cycles)
+            self.change_signals.append(signal)
+        self.cycles += 1
+        self.signals = None
+
+    def extend(self, signals):
+        """Add the signal levels of the next cycles."""
+        for signal in signals:
+            self.append(signal)
+
+    def repeat_signals(self, period, repeats):
+        """Repeat the signal levels of the last period cycles.
+
+        The signals are added repeats times. Only the changes of the last
+        period are copied, so a signal that is constant over the period is
+        repeated in constant time.
+        """
+        first_cycle = self.cycles - period
+        first_change = bisect.bisect_right(self.change_cycles, first_cycle)
+        if first_change == len(self.change_cycles):
+            # Constant over the period
+            self.cycles += period * repeats
+            self.signals = None
+            return
+        period_changes = [(0, self.get_signal(first_cycle))]
+        for change in range(first_change, len(self.change_cycles)):
+            period_changes.append((self.change_cycles[change] - first_cycle,
+                                   self.change_signals[change]))
+        for _ in range(repeats):
+            for offset, signal in period_changes:
+                if self.change_signals[-1] != signal:
+                    self.change_cycles.append(self.cycles + offset)
+                    self.change_signals.append(signal)
+            self.cycles += period
+        self.signals = None
+
+    def get_signal(self, cycle):
+        """Return the signal level on a cycle.
+
+        Negative cycles count back from the last cycle, like list indices.
+        """
+        if cycle < 0:
+            cycle += self.cycles
+        if cycle < 0 or cycle >= self.cycles:
+            raise IndexError("signal trace index out of range")
+        change = bisect.bisect_right(self.change_cycles, cycle) - 1
+        return self.change_signals[change]
+
+    def get_changes(self):
+        """Return the list of (cycle, signal level) changes."""
+        return list(zip(self.change_cycles, self.change_signals))
+
+    def get_signals(self):
+        """Return the signal levels as an array.
+
+        The array is kept until the next signal level is added.
+        """
+        if self.signals is None:
+            self.signals = array.array("b")
+            end_cycles = self.change_cycles[1:] + array.array(
+                "q", [self.cycles])
+            for signal, start_cycle, end_cycle in zip(
+                    self.change_signals, self.change_cycles, end_cycles):
+                self.signals.extend(
+                    array.array("b", [signal]) * (end_cycle - start_cycle))
+        return self.signals[:]
+
+    def tolist(self):
+        """Return the signal levels as a list."""
+        return self.get_signals().tolist()
+
+    def __len__(self):
+        """Return the number of cycles recorded."""
+        return self.cycles
+
+    def __getitem__(self, index):
+        """Return a signal level, or an array of signal levels for a slice.
+
+        The signals in a slice with a step of 1 are generated from the
+        changes in it, without generating the other cycles.
+        """
+        if not isinstance(index, slice):
+            return self.get_signal(index)
+        if self.signals is not None:
+            return self.signals[index]
+        [first, stop, step] = index.indices(self.cycles)
+        if step != 1:
+            return self.get_signals()[index]
+        signals = array.array("b")
+        change = bisect.bisect_right(self.change_cycles, first)
+        cycle = first
+        while cycle < stop:
+            if change < len(self.change_cycles):
+                end_cycle = min(self.change_cycles[change], stop)
+            else:
+                end_cycle = stop
+            signals.extend(array.array("b", [self.change_signals[change - 1]])
+                           * (end_cycle - cycle))
+            cycle = end_cycle
+            change += 1
+        return signals
+
+    def __iter__(self):
+        """Iterate over the signal levels in order."""
+        end_cycles = list(self.change_cycles[1:]) + [self.cycles]
+        for signal, start_cycle, end_cycle in zip(
+                self.change_signals, self.change_cycles, end_cycles):
+            for _ in range(end_cycle - start_cycle):
+                yield signal
+
+    def __eq__(self, other):
+        """Return True if other holds the same signal levels."""
+        if isinstance(other, ChangeTrace):
+            return (self.cycles == other.cycles and
+                    self.change_cycles == other.change_cycles and
+                    self.change_signals == other.change_signals)
+        if isinstance(other, (list, tuple, array.array, SignalTrace)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Return the representation of the trace."""
+        return "ChangeTrace({!r}, cycles={!r})".format(self.get_changes(),
+                                                       self.cycles)
+
+
 class Monitors:
 
     """Record and display output signals.
@@ -37,11 +373,36 @@ class Monitors:
 
     record_signals(self): Records the current signal level of all monitors.
 
+    repeat_signals(self, period, repeats): Repeats the signal levels of the
+                                           last period cycles of all monitors.
+
+    get_trace_length(self): Returns the number of cycles kept by the
+                            shortest trace.
+
+    set_capture(self, capture): Enables or disables recording the signal
+                                levels of every output.
+
+    add_signal_listener(self, listener): Notifies the listener whenever
+                                         signals are recorded.
+
+    remove_signal_listener(self, listener): Stops notifying the listener.
+
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
 
     reset_monitors(self): Clears the memory of all monitors.
 
+    make_trace(self, signals): Returns a new signal trace in the current
+                               trace format.
+
+    set_trace_capacity(self, capacity): Sets the number of cycles kept by
+                                        every monitor.
+
+    convert_traces(self): Converts every trace to the current trace format.
+
+    set_change_recording(self, record_changes): Sets whether monitors only
+                                                store signal level changes.
+
     get_margin(self): Returns the length of the longest monitor's name.
 
     display_signals(self): Displays signal trace(s) in the text console.
@@ -54,9 +415,23 @@ class Monitors:
         self.devices = devices
 
         # monitors_dictionary stores
-        # {(device_id, output_id): [signal_list]}
+        # {(device_id, output_id): SignalTrace of signal levels}
         self.monitors_dictionary = collections.OrderedDict()
 
+        # Number of cycles kept by each trace, or None to keep all of them
+        self.trace_capacity = None
+        # If True, traces only store signal level changes
+        self.record_changes = False
+
+        # While capturing, captured_signals stores
+        # {(device_id, output_id): signal trace} for every output, so that
+        # new monitors can be filled in from it. Otherwise it is None.
+        self.captured_signals = None
+
+        # Objects notified whenever signals are recorded, such as
+        # vcd.VcdWriter instances
+        self.signal_listeners = []
+
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
 
@@ -75,10 +450,17 @@ class Monitors:
         else:
             # If n simulation cycles have been completed before making this
             # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
+            # of BLANK signals, or with the captured signals of these cycles
+            # if there are any. Otherwise, initialise the trace with an empty
             # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            captured_list = []
+            if self.captured_signals is not None:
+                captured_list = self.captured_signals[(device_id,
+                                                       output_id)].tolist()
+            blank_cycles = max(cycles_completed - len(captured_list), 0)
+            self.monitors_dictionary[(device_id, output_id)] = self.make_trace(
+                [self.devices.BLANK] * blank_cycles + captured_list)
+            self.network.add_monitored_output(device_id, output_id)
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
@@ -90,6 +472,7 @@ class Monitors:
             return False
         else:
             del self.monitors_dictionary[(device_id, output_id)]
+            self.network.remove_monitored_output(device_id, output_id)
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -111,6 +494,75 @@ class Monitors:
             signal_level = self.get_monitor_signal(device_id, output_id)
             self.monitors_dictionary[(device_id,
                                       output_id)].append(signal_level)
+        if self.captured_signals is not None:
+            for (device_id, output_id), signal_list in (
+                    self.captured_signals.items()):
+                signal_list.append(self.network.get_output_signal(device_id,
+                                                                  output_id))
+        for listener in self.signal_listeners:
+            listener.record_signals()
+
+    def repeat_signals(self, period, repeats):
+        """Repeat the signal levels of the last period cycles of all monitors.
+
+        This function is called instead of record_signals for the cycles of a
+        periodic network that are not executed.
+        """
+        for signal_list in self.monitors_dictionary.values():
+            signal_list.repeat_signals(period, repeats)
+        if self.captured_signals is not None:
+            for signal_list in self.captured_signals.values():
+                signal_list.repeat_signals(period, repeats)
+        for listener in self.signal_listeners:
+            listener.repeat_signals(period, repeats)
+
+    def get_trace_length(self):
+        """Return the number of cycles kept by the shortest trace.
+
+        Captured signals are included. Return None if there are no traces.
+        """
+        signal_lists = list(self.monitors_dictionary.values())
+        if self.captured_signals is not None:
+            signal_lists.extend(self.captured_signals.values())
+        if not signal_lists:
+            return None
+        return min(len(signal_list) for signal_list in signal_lists)
+
+    def set_capture(self, capture):
+        """Enable or disable recording the signal levels of every output.
+
+        While capturing, the signal levels of every device output are
+        recorded at each cycle, so that a monitor made later is filled in with
+        the signals of the cycles recorded since capturing started, instead of
+        BLANK signals. Cone-of-influence pruning is disabled, since it would
+        leave unmonitored outputs unexecuted.
+        """
+        if not capture:
+            self.captured_signals = None
+            return
+        if self.network.pruning:
+            self.network.set_pruning(False)
+        self.captured_signals = collections.OrderedDict()
+        for device_id in self.devices.find_devices():
+            for output_id in self.devices.get_device(device_id).outputs:
+                self.captured_signals[(device_id, output_id)] = (
+                    self.make_trace())
+
+    def add_signal_listener(self, listener):
+        """Notify the listener whenever signals are recorded.
+
+        The listener's record_signals() method is called after the signals
+        of each cycle are recorded, and its repeat_signals(period, repeats)
+        method after the signals of a periodic network are repeated.
+        """
+        self.signal_listeners.append(listener)
+
+    def remove_signal_listener(self, listener):
+        """Stop notifying the listener. Return True if successful."""
+        if listener not in self.signal_listeners:
+            return False
+        self.signal_listeners.remove(listener)
+        return True
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -136,7 +588,47 @@ class Monitors:
         The list of stored signal levels for each monitor is deleted.
         """
         for device_id, output_id in self.monitors_dictionary:
-            self.monitors_dictionary[(device_id, output_id)] = []
+            self.monitors_dictionary[(device_id, output_id)] = (
+                self.make_trace())
+        if self.captured_signals is not None:
+            for output in self.captured_signals:
+                self.captured_signals[output] = self.make_trace()
+
+    def make_trace(self, signals=()):
+        """Return a new signal trace holding the given signal levels.
+
+        The trace is a ChangeTrace if only signal level changes are recorded,
+        or a SignalTrace keeping trace_capacity cycles otherwise.
+        """
+        if self.record_changes:
+            return ChangeTrace(signals)
+        return SignalTrace(signals, self.trace_capacity)
+
+    def set_trace_capacity(self, capacity):
+        """Set the number of cycles kept by every monitor.
+
+        With a capacity of None, the signals of all the cycles are kept.
+        Existing traces keep their most recent signals. The capacity only
+        applies while every cycle is recorded, not just the changes.
+        """
+        self.trace_capacity = capacity
+        self.convert_traces()
+
+    def convert_traces(self):
+        """Convert every trace to the current trace format."""
+        for monitor, signal_list in self.monitors_dictionary.items():
+            self.monitors_dictionary[monitor] = self.make_trace(signal_list)
+        if self.captured_signals is not None:
+            for output, signal_list in self.captured_signals.items():
+                self.captured_signals[output] = self.make_trace(signal_list)
+
+    def set_change_recording(self, record_changes):
+        """Set whether monitors only store signal level changes.
+
+        Existing traces are converted to the new format.
+        """
+        self.record_changes = record_changes
+        self.convert_traces()
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Analyse the cold start-up of a network with Monte Carlo simulation.
+
+Used in the Logic Simulator project to find behaviour that depends on the
+random start-up state, by simulating many seeded cold start-ups of the same
+network in parallel and summarising the monitored signals.
+
+Usage
+-----
+Show help: montecarlo.py -h
+Run: montecarlo.py [-n <runs>] [-r <cycles>] [-j <workers>] [-f <first seed>]
+                   [-s <switch>=<0 or 1>]... [-o <report path>] <file path>
+
+Classes
+-------
+MonteCarloAnalysis - simulates seeded cold start-ups in parallel.
+
+Functions
+---------
+build_netlist - builds the netlist described by a definition file.
+simulate_cold_starts - simulates cold start-ups of a definition file.
+get_monitor_result - returns the result of one monitor in a run.
+"""
+import concurrent.futures
+import contextlib
+import getopt
+import io
+import json
+import os
+import random
+import sys
+
+import error
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from batch import BatchRunner
+
+
+def build_netlist(path):
+    """Build the netlist described by the definition file at path.
+
+    Return a list of [names, devices, network, monitors], or None if the file
+    has errors. The messages of the parser are discarded.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scanner = Scanner(path, names, buffered=True)
+            parser = Parser(names, devices, network, monitors, scanner)
+            if not parser.parse_network():
+                return None
+    except (error.MyException, OSError):
+        return None
+    return [names, devices, network, monitors]
+
+
+def simulate_cold_starts(path, cycles, seeds, switch_settings=()):
+    """Simulate a cold start-up of the definition file for each seed.
+
+    This function is run in the worker processes, each building the netlist
+    once for all its seeds. Each run is simulated until the state of the
+    network repeats, as in network.execute_cycles, so the monitored signals
+    are known for all the cycles. Return a list of results, one dictionary
+    per seed, or None if the file has errors or a switch setting is invalid.
+
+    A result holds the seed, whether the network oscillates, the cycle from
+    which the network repeats and its period, or None if it does not repeat
+    within the cycles, and for each monitor the level of its signal on the
+    last cycle, whether it changes once settled, and the cycle from which
+    it repeats.
+    """
+    netlist = build_netlist(path)
+    if netlist is None:
+        return None
+    [names, devices, network, monitors] = netlist
+    batch_runner = BatchRunner(names, devices, network, monitors)
+    with contextlib.redirect_stderr(io.StringIO()):
+        if not batch_runner.set_switches(switch_settings):
+            return None
+    monitored = list(monitors.monitors_dictionary)
+
+    results = []
+    for seed in seeds:
+        random.seed(seed)
+        devices.cold_startup()
+        signals = [[] for _ in monitored]  # signals after each cycle
+        seen_states = {}  # {state: cycle}
+        result = {"seed": seed, "oscillating": False, "settle_cycle": None,
+                  "period": None}
+        for cycle in range(cycles + 1):
+            state = network.get_state()
+            if state in seen_states:
+                result["settle_cycle"] = seen_states[state]
+                result["period"] = cycle - seen_states[state]
+                break
+            seen_states[state] = cycle
+            if cycle == cycles:
+                break
+            if not network.execute_network():
+                result["oscillating"] = True
+                break
+            for signal_list, (device_id, output_id) in zip(signals,
+                                                           monitored):
+                signal_list.append(network.get_output_signal(device_id,
+                                                             output_id))
+
+        result["monitors"] = [get_monitor_result(devices, signal_list,
+                                                 cycles, result)
+                              for signal_list in signals]
+        results.append(result)
+    return results
+
+
+def get_monitor_result(devices, signal_list, cycles, result):
+    """Return the result of one monitor in a run.
+
+    The result is a dictionary of the level on the last cycle, 1 for HIGH or
+    RISING and 0 for LOW or FALLING, whether the signal changes once the
+    network has settled, and the first cycle from which the signal repeats
+    with the period of the network. Values that are not known, because the
+    network oscillates or does not repeat within the cycles, are None.
+    """
+    monitor_result = {"level": None, "toggling": None, "settle_cycle": None}
+    settle_cycle = result["settle_cycle"]
+    period = result["period"]
+    if settle_cycle is None or not signal_list:
+        return monitor_result
+    # From settle_cycle on, the signals repeat every period
+    last_signal = signal_list[settle_cycle
+                              + (cycles - 1 - settle_cycle) % period]
+    monitor_result["level"] = int(last_signal in [devices.HIGH,
+                                                  devices.RISING])
+    steady_signals = signal_list[settle_cycle:settle_cycle + period]
+    monitor_result["toggling"] = len(set(steady_signals)) > 1
+    first_cycle = settle_cycle
+    while (first_cycle > 0 and signal_list[first_cycle - 1]
+           == signal_list[first_cycle - 1 + period]):
+        first_cycle -= 1
+    monitor_result["settle_cycle"] = first_cycle
+    return monitor_result
+
+
+class MonteCarloAnalysis:
+
+    """Simulate seeded cold start-ups in parallel and summarise them.
+
+    The seeds are split into chunks, and each chunk is simulated by
+    simulate_cold_starts in a pool of worker processes. Only the summary of
+    each run is sent back, and the runs are aggregated into a report.
+
+    Parameters
+    ----------
+    path: path of the definition file.
+    cycles: number of cycles simulated in each run.
+    runs: number of runs, with seeds first_seed, first_seed + 1, ...
+    first_seed: random seed of the first run.
+    max_workers: number of worker processes. Defaults to the number of
+                 processor cores.
+    switch_settings: list of "NAME=LEVEL" strings setting switches before
+                     the runs, see batch.BatchRunner.set_switches.
+
+    Public methods
+    --------------
+    run(self): Simulates the runs and returns their results.
+
+    summarise(self, results): Returns the report of the results.
+
+    write_report(self, report, report_path): Writes the report as JSON.
+    """
+
+    def __init__(self, path, cycles=100, runs=100, first_seed=0,
+                 max_workers=None, switch_settings=()):
+        """Initialise the simulation settings."""
+        self.path = path
+        self.cycles = cycles
+        self.runs = runs
+        self.first_seed = first_seed
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.switch_settings = list(switch_settings)
+
+    def run(self):
+        """Simulate the runs and return their results in the order of seeds.
+
+        Return None if the definition file has errors or a switch setting is
+        invalid.
+        """
+        seeds = list(range(self.first_seed, self.first_seed + self.runs))
+        if not seeds:
+            netlist = build_netlist(self.path)
+            return None if netlist is None else []
+        workers = min(self.max_workers, len(seeds))
+        # Keep several chunks per worker to balance the load
+        chunk_size = max(1, len(seeds) // (workers * 4))
+        chunks = [seeds[start:start + chunk_size]
+                  for start in range(0, len(seeds), chunk_size)]
+        results = []
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            for chunk_results in executor.map(
+                    simulate_cold_starts, [self.path] * len(chunks),
+                    [self.cycles] * len(chunks), chunks,
+                    [self.switch_settings] * len(chunks)):
+                if chunk_results is None:
+                    return None
+                results.extend(chunk_results)
+        return results
+
+    def summarise(self, results):
+        """Return the report of the results of the runs.
+
+        The report holds the number of runs, the oscillation rate, and the
+        distribution of the cycles from which the network repeats. For each
+        monitor, it holds how many runs end with each level, the rate of
+        runs in which the signal keeps changing, and the distribution of the
+        cycles from which the signal repeats.
+        """
+        netlist = build_netlist(self.path)
+        if netlist is None:
+            return None
+        [names, devices, network, monitors] = netlist
+        signal_names = [devices.get_signal_name(device_id, output_id)
+                        for device_id, output_id
+                        in monitors.monitors_dictionary]
+        runs = len(results)
+        oscillating = [result["oscillating"] for result in results]
+        report = {
+            "path": self.path, "cycles": self.cycles, "runs": runs,
+            "first_seed": self.first_seed,
+            "oscillation_rate": self.get_rate(oscillating.count(True),
+                                              runs),
+            "oscillating_seeds": [result["seed"] for result in results
+                                  if result["oscillating"]],
+            "unsettled_runs": sum(
+                1 for result in results if not result["oscillating"]
+                and result["settle_cycle"] is None),
+            "settle_cycle": self.get_distribution(
+                [result["settle_cycle"] for result in results]),
+            "period": self.get_distribution(
+                [result["period"] for result in results]),
+            "monitors": {}}
+        for index, signal_name in enumerate(signal_names):
+            monitor_results = [result["monitors"][index]
+                               for result in results]
+            levels = [monitor_result["level"]
+                      for monitor_result in monitor_results
+                      if monitor_result["level"] is not None]
+            toggling = [monitor_result["toggling"]
+                        for monitor_result in monitor_results
+                        if monitor_result["toggling"] is not None]
+            report["monitors"][signal_name] = {
+                "levels": {"0": levels.count(0), "1": levels.count(1)},
+                "toggling_rate": self.get_rate(toggling.count(True),
+                                               len(toggling)),
+                "settle_cycle": self.get_distribution(
+                    [monitor_result["settle_cycle"]
+                     for monitor_result in monitor_results])}
+        return report
+
+    def get_rate(self, count, total):
+        """Return count as a fraction of total, or None if total is 0."""
+        if not total:
+            return None
+        return count / total
+
+    def get_distribution(self, values):
+        """Return the minimum, mean, maximum and counts of the known values.
+
+        Values of None are left out. The counts are {value: number of runs}.
+        """
+        values = [value for value in values if value is not None]
+        if not values:
+            return None
+        counts = {}
+        for value in sorted(values):
+            counts[str(value)] = counts.get(str(value), 0) + 1
+        return {"min": min(values), "mean": sum(values) / len(values),
+                "max": max(values), "counts": counts}
+
+    def write_report(self, report, report_path):
+        """Write the report as JSON. Return True if successful."""
+        try:
+            with open(report_path, "w") as file:
+                json.dump(report, file, indent=2)
+        except OSError:
+            return False
+        return True
+
+
+def main(arg_list):
+    """Parse the command line options and arguments and run the analysis.
+
+    Print a summary of the report and write the report if a path is given.
+    """
+    usage_message = (
+        "Usage:\n"
+        "Show help: montecarlo.py -h\n"
+        "Run: montecarlo.py [-n <runs>] [-r <cycles>] [-j <workers>] "
+        "[-f <first seed>] [-s <switch>=<0 or 1>]... [-o <report path>] "
+        "<file path>\n"
+        "The report is written as JSON."
+    )
+    try:
+        options, arguments = getopt.getopt(arg_list, "hn:r:j:f:s:o:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit(2)
+
+    runs = 100
+    cycles = 100
+    max_workers = None
+    first_seed = 0
+    switch_settings = []
+    report_path = None
+    for option, value in options:
+        if option == "-h":
+            print(usage_message)
+            sys.exit()
+        elif option in ["-n", "-r", "-j", "-f"]:
+            if not value.isdigit():
+                print("Error: " + option + " needs a non-negative integer\n")
+                print(usage_message)
+                sys.exit(2)
+            if option == "-n":
+                runs = int(value)
+            elif option == "-r":
+                cycles = int(value)
+            elif option == "-j":
+                max_workers = int(value) or None
+            else:
+                first_seed = int(value)
+        elif option == "-s":
+            switch_settings.append(value)
+        elif option == "-o":
+            report_path = value
+
+    if len(arguments) != 1:
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit(2)
+
+    [path] = arguments
+    analysis = MonteCarloAnalysis(path, cycles, runs, first_seed,
+                                  max_workers, switch_settings)
+    results = analysis.run()
+    report = None if results is None else analysis.summarise(results)
+    if report is None:
+        print("Error! Invalid definition file or switch setting.")
+        sys.exit(1)
+
+    print("{} runs, oscillation rate {}".format(report["runs"],
+                                                report["oscillation_rate"]))
+    for signal_name, monitor_report in report["monitors"].items():
+        settle_cycle = monitor_report["settle_cycle"]
+        print("{}: {} LOW, {} HIGH, toggling rate {}, settles by cycle "
+              "{}".format(signal_name, monitor_report["levels"]["0"],
+                          monitor_report["levels"]["1"],
+                          monitor_report["toggling_rate"],
+                          None if settle_cycle is None
+                          else settle_cycle["max"]))
+    if report_path is not None and not analysis.write_report(report,
+                                                             report_path):
+        print("Error! Could not write to " + report_path)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
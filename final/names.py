@@ -23,6 +23,9 @@ class Names:
     lookup(self, name_string_list): Returns a list of name IDs for each
                         name string. Adds a name if not already present.
 
+    intern_names(self, name_strings): Returns a list of name IDs for any
+                        iterable of name strings. Adds names not present.
+
     get_name_string(self, name_id): Returns the corresponding name string for
                         the name ID. Returns None if the ID is not present.
     """
@@ -32,6 +35,8 @@ class Names:
         self.error_code_count = 0
         # List of names defined in the defintion file
         self.names_list = []
+        # Dictionary mapping each name in names_list to its name ID
+        self.names_index = {}
 
     def unique_error_codes(self, num_error_codes):
         """
@@ -73,10 +78,7 @@ class Names:
         if not isinstance(name_string, str):
             raise TypeError("Expected name_string to be a string.")
 
-        if name_string in self.names_list:
-            return self.names_list.index(name_string)
-        else:
-            return None
+        return self.names_index.get(name_string)
 
     def lookup(self, name_string_list):
         """Returns a list of corresponding name_IDs for provided list of names.
@@ -98,15 +100,33 @@ class Names:
         if not isinstance(name_string_list, list):
             raise TypeError("Expected name_string_list to be a list.")
 
-        # Intialise empty ids_list
+        return self.intern_names(name_string_list)
+
+    def intern_names(self, name_strings):
+        """Returns a list of corresponding name_IDs for an iterable of names.
+
+        Any name_string not present in the names_list is added to it. Unlike
+        lookup, any iterable is accepted, so large batches of names, such as
+        all the identifiers in a definition file, can be interned in one call.
+
+        Args:
+            name_strings (iterable): name_strings to intern
+
+        Returns:
+            list: list of name_IDs corresponding to each name_string provided
+                  in name_strings.
+        """
+        names_index = self.names_index
+        names_list = self.names_list
         ids_list = []
-        # Iterate through all name_strings and check if present in names_list
-        for name_string in name_string_list:
+        for name_string in name_strings:
+            name_id = names_index.get(name_string)
             # If name_string not present, append to names_list
-            if name_string not in self.names_list:
-                self.names_list.append(name_string)
-            # Append ids for each name_string in names_list to ids_list
-            ids_list.append(self.names_list.index(name_string))
+            if name_id is None:
+                name_id = len(names_list)
+                names_list.append(name_string)
+                names_index[name_string] = name_id
+            ids_list.append(name_id)
 
         return ids_list
 
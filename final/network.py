@@ -6,6 +6,7 @@ Classes
 --------
 Network - builds and executes the network.
 """
+import heapq
 
 
 class Network:
@@ -54,11 +55,72 @@ class Network:
     execute_clock(self, device_id): Simulates a clock and updates its output
                                     signal value.
 
+    update_sources(self): Sets the signals of the clocks and RCs due on this
+                          cycle.
+
     update_clocks(self): If it is time to do so, sets clock signals to RISING
                          or FALLING.
 
+    update_rcs(self): If it is time to do so, sets RC signals to FALLING.
+
+    set_simulation_mode(self, mode): Selects the engine used by
+                                     execute_network.
+
+    set_pruning(self, pruning): Enables or disables cone-of-influence
+                                pruning. Oscillations outside the cones of
+                                the monitored outputs are not detected.
+
+    set_device_period(self, device_id, period): Sets the period of a clock or
+                                                RC from the next cycle on.
+
+    add_monitored_output(self, device_id, output_id): Adds the fan-in cone of
+                                             a monitored output.
+
+    remove_monitored_output(self, device_id, output_id): Removes the fan-in
+                                             cone of a monitored output.
+
+    get_fan_in(self, device_id): Returns the devices in the fan-in cone of a
+                                 device.
+
+    get_active_devices(self, device_kind): Returns the devices of the given
+                                           kind that need to be executed.
+
+    build_fanout(self): Builds the fanout index and evaluation order used by
+                        the event-driven engine.
+
+    execute_device(self, device_id): Executes a single device according to
+                                     its kind.
+
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
+
+    execute_sweep(self): Executes every device on every settling iteration.
+
+    settle_sweep(self): Executes every device until the signals settle.
+
+    execute_events(self): Executes only the devices affected by changed
+                          signals.
+
+    levelize(self): Builds the levelized schedule of the logic gates.
+
+    execute_levelized(self): Executes the logic gates once per settling
+                             iteration in levelized order.
+
+    get_state(self): Returns a snapshot of the full state of the network.
+
+    execute_cycles(self, cycles, monitors=None): Executes the network for a
+                            number of cycles, fast-forwarding through
+                            repeated states, and records the monitors.
+
+    build_compact(self): Builds the compact representation of the network.
+
+    execute_compact(self): Executes one simulation cycle on the compact
+                           representation of the network.
+
+    build_generated(self): Generates and compiles the kernel of the network.
+
+    execute_generated(self): Executes one simulation cycle with the generated
+                             kernel.
     """
 
     def __init__(self, names, devices):
@@ -76,6 +138,68 @@ class Network:
         ] = self.names.unique_error_codes(6)
         self.steady_state = True  # for checking if signals have settled
 
+        # SWEEP re-evaluates every device on every settling iteration and is
+        # kept as the reference engine. EVENT_DRIVEN only re-evaluates the
+        # devices downstream of outputs that have changed. LEVELIZED executes
+        # the logic gates in topological order, so feed-forward logic settles
+        # in a single pass. COMPACT executes the levelized schedule with
+        # vectorized operations on the arrays of compact.CompactNetwork.
+        # GENERATED executes the sweep with a kernel generated for the
+        # network by codegen.GeneratedKernel.
+        self.simulation_modes = [
+            self.SWEEP,
+            self.EVENT_DRIVEN,
+            self.LEVELIZED,
+            self.COMPACT,
+            self.GENERATED,
+        ] = range(5)
+        self.simulation_mode = self.SWEEP
+
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable
+        self.iteration_limit = 20
+
+        # fanout stores {device_id: [IDs of devices reading its outputs]}. It
+        # is rebuilt whenever connections or devices are added.
+        self.fanout = None
+        self.fanout_device_count = 0
+        self.evaluation_order = []  # device IDs in the order of the sweep
+        self.evaluation_position = {}  # {device_id: index in the order}
+        self.pending_events = set()  # devices left unsettled by last cycle
+
+        # The levelized schedule stores a list of levels. Each level is a list
+        # of (sequential, steps) blocks of compiled gates. The first level
+        # holds the sequential gates in a single block, in the order of the
+        # sweep, and the other levels hold one feed-forward gate per block.
+        self.schedule = None
+        self.boundary_devices = []  # switches, D-types, clocks, RCs, siggens
+
+        # While the compact mode is in use, the signals and device states are
+        # held in compact_network rather than in the Device objects
+        self.compact_network = None
+
+        # The generated kernel is built for the evaluation order of the
+        # fanout index, and is None if the network is incomplete
+        self.generated_kernel = None
+
+        # With cone-of-influence pruning, only the D-types and gates in the
+        # fan-in cone of a monitored output are executed. monitored_outputs
+        # stores {(device_id, output_id): set of device IDs in its cone}, and
+        # cone_references stores {device_id: number of cones containing it}.
+        # Switches, clocks, RCs and siggens are always executed, so that
+        # they stay in step when a new monitor brings devices into a cone.
+        self.pruning = False
+        self.pruned_kinds = [self.devices.D_TYPE] + self.devices.gate_types
+        self.monitored_outputs = {}
+        self.cone_references = {}
+        self.active_devices = None  # {device_kind: [device IDs]}
+
+        # execute_cycles looks for a repeated state of the network, and then
+        # replays the period instead of executing it again. At most
+        # state_history_limit states are stored per run.
+        self.fast_forward = True
+        self.state_history_limit = 10000
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -107,6 +231,11 @@ class Network:
 
         Return None if either of the specified IDs is invalid.
         """
+        if self.compact_network is not None:
+            signal = self.compact_network.get_output_signal(device_id,
+                                                            output_id)
+            if signal is not None:
+                return signal
         device = self.devices.get_device(device_id)
         if device is not None:
             if output_id in device.outputs:
@@ -137,6 +266,8 @@ class Network:
                 # Make connection
                 first_device.inputs[first_port_id] = (
                     second_device_id, second_port_id)
+                self.fanout = None
+                self.cone_references = None
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -154,6 +285,8 @@ class Network:
                         first_device_id,
                         first_port_id,
                     )
+                    self.fanout = None
+                    self.cone_references = None
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -164,12 +297,18 @@ class Network:
         return error_type
 
     def check_network(self):
-        """Return True if all inputs in the network are connected."""
+        """Return True if all inputs in the network are connected.
+
+        In the compact mode, the compact representation of the network is
+        built once the network is complete.
+        """
         for device_id in self.devices.find_devices():
             device = self.devices.get_device(device_id)
             for input_id in device.inputs:
                 if self.get_connected_output(device_id, input_id) is None:
                     return False
+        if self.simulation_mode == self.COMPACT:
+            self.build_compact()
         return True
 
     def update_signal(self, signal, target):
@@ -340,39 +479,64 @@ class Network:
         else:
             return False
 
+    def update_sources(self):
+        """Set the signals of the clocks and RCs due on this cycle.
+
+        Only the due devices are visited, and the source scheduler then
+        counts the cycle for every clock and RC. Return a list of the IDs of
+        the devices whose output was changed.
+        """
+        changed_devices = self.update_clocks()
+        changed_devices.extend(self.update_rcs())
+        self.devices.source_scheduler.advance_cycle()
+        return changed_devices
+
     def update_clocks(self):
-        """If it is time to do so, set clock signals to RISING or FALLING."""
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        for device_id in clock_devices:
+        """If it is time to do so, set clock signals to RISING or FALLING.
+
+        Return a list of the IDs of the clocks whose output was changed.
+        """
+        changed_devices = []
+        scheduler = self.devices.source_scheduler
+        for device_id in scheduler.pop_due_devices(self.devices.CLOCK):
             device = self.devices.get_device(device_id)
-            if device.clock_counter == device.clock_half_period:
-                device.clock_counter = 0
-                output_signal = self.get_output_signal(
-                    device_id, output_id=None)
-                if output_signal == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
-                elif output_signal == self.devices.LOW:
-                    device.outputs[None] = self.devices.RISING
-            device.clock_counter += 1
+            output_signal = self.get_output_signal(device_id, output_id=None)
+            if output_signal == self.devices.HIGH:
+                device.outputs[None] = self.devices.FALLING
+                changed_devices.append(device_id)
+            elif output_signal == self.devices.LOW:
+                device.outputs[None] = self.devices.RISING
+                changed_devices.append(device_id)
+        return changed_devices
 
     def update_rcs(self):
-        """If it is time to do so, set RC signals to RISING or FALLING."""
-        rc_devices = self.devices.find_devices(self.devices.RC)
-        for device_id in rc_devices:
+        """If it is time to do so, set RC signals to FALLING.
+
+        An RC falls again at the end of every period. Return a list of the
+        IDs of the RCs whose output was changed.
+        """
+        changed_devices = []
+        scheduler = self.devices.source_scheduler
+        for device_id in scheduler.pop_due_devices(self.devices.RC):
             device = self.devices.get_device(device_id)
-            """Skip RC devices that have already turned off."""
-            if device.clock_counter == device.rc_period:
-                device.clock_counter = 0
-                device.outputs[None] = self.devices.FALLING
-            device.clock_counter += 1
+            if device.outputs[None] != self.devices.FALLING:
+                changed_devices.append(device_id)
+            device.outputs[None] = self.devices.FALLING
+        return changed_devices
 
     def update_siggen(self):
-        """If it is time to do so, set RC signals to RISING or FALLING."""
+        """Move the signal generators on to the next level of their sequences.
+
+        Set each signal generator signal to RISING or FALLING for the next
+        level. Return a list of the IDs of the signal generators whose
+        output was changed.
+        """
+        changed_devices = []
         siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
         for device_id in siggen_devices:
             device = self.devices.get_device(device_id)
-            """Skip RC devices that have already turned off."""
             sequence = device.sequence_2_repeat
+            output_signal = device.outputs[None]
             device.clock_counter += 1
             if device.clock_counter == len(sequence):
                 device.clock_counter = 0
@@ -380,37 +544,256 @@ class Network:
                 device.outputs[None] = self.devices.RISING
             elif sequence[device.clock_counter] == "0":
                 device.outputs[None] = self.devices.FALLING
+            if device.outputs[None] != output_signal:
+                changed_devices.append(device_id)
+        return changed_devices
+
+    def set_simulation_mode(self, mode):
+        """Select the engine used by execute_network.
+
+        Return True if successful.
+        """
+        if mode not in self.simulation_modes:
+            return False
+        if self.compact_network is not None:
+            # Hand the signals and device states back to the devices
+            self.compact_network.store_state()
+            self.compact_network = None
+        self.simulation_mode = mode
+        self.fanout = None  # force a full update on the next cycle
+        return True
+
+    def set_pruning(self, pruning):
+        """Enable or disable cone-of-influence pruning.
+
+        The fan-in cones of all the monitored outputs are rebuilt. D-types
+        and gates outside every cone are not executed, so a part of the
+        network that oscillates outside the cones does not make
+        execute_network return False: only the devices that are executed
+        are checked for a steady state.
+        """
+        self.pruning = pruning
+        self.cone_references = {}
+        for monitor in self.monitored_outputs:
+            self.monitored_outputs[monitor] = None
+            if pruning:
+                self.add_cone(monitor)
+        self.active_devices = None
+        self.fanout = None  # force a full update on the next cycle
+
+    def set_device_period(self, device_id, period):
+        """Set the half period of a clock or the period of an RC device.
+
+        The new period applies from the next cycle on, so a long simulation
+        can go on without being run again. Return True if successful.
+        """
+        if self.compact_network is not None:
+            # The compact network holds the periods, so it is built again
+            self.compact_network.store_state()
+            self.compact_network = None
+        return self.devices.set_period(device_id, period)
+
+    def add_monitored_output(self, device_id, output_id):
+        """Add the fan-in cone of a monitored output.
+
+        Called by monitors.make_monitor.
+        """
+        self.monitored_outputs[(device_id, output_id)] = None
+        if self.pruning and self.cone_references is not None:
+            self.add_cone((device_id, output_id))
+
+    def remove_monitored_output(self, device_id, output_id):
+        """Remove the fan-in cone of a monitored output.
+
+        Called by monitors.remove_monitor. Devices left outside every cone
+        stop being executed.
+        """
+        cone = self.monitored_outputs.pop((device_id, output_id), None)
+        if cone is None or self.cone_references is None:
+            return
+        for cone_device_id in cone:
+            self.cone_references[cone_device_id] -= 1
+            if not self.cone_references[cone_device_id]:
+                del self.cone_references[cone_device_id]
+        self.active_devices = None
+        self.fanout = None
+
+    def add_cone(self, monitor):
+        """Add the fan-in cone of a monitored output to cone_references."""
+        (device_id, output_id) = monitor
+        cone = self.get_fan_in(device_id)
+        self.monitored_outputs[monitor] = cone
+        for cone_device_id in cone:
+            self.cone_references[cone_device_id] = (
+                self.cone_references.get(cone_device_id, 0) + 1)
+        self.active_devices = None
+        self.fanout = None
+
+    def get_fan_in(self, device_id):
+        """Return the set of devices in the fan-in cone of a device.
+
+        The cone holds the device and every device that drives one of its
+        inputs, directly or through other devices.
+        """
+        cone = {device_id}
+        stack = [device_id]
+        while stack:
+            device = self.devices.get_device(stack.pop())
+            if device is None:
+                continue
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    continue
+                output_device_id = connected_output[0]
+                if output_device_id not in cone:
+                    cone.add(output_device_id)
+                    stack.append(output_device_id)
+        return cone
+
+    def get_active_devices(self, device_kind):
+        """Return the devices of the given kind that need to be executed.
+
+        Without pruning, these are all the devices of the kind. With pruning,
+        D-types and gates outside the cones of the monitored outputs are
+        left out. The list must not be modified.
+        """
+        if not self.pruning or device_kind not in self.pruned_kinds:
+            return self.devices.find_devices(device_kind)
+        if self.cone_references is None:  # connections have changed
+            self.set_pruning(True)
+        if self.active_devices is None:
+            self.active_devices = {
+                pruned_kind: [
+                    device_id
+                    for device_id in self.devices.find_devices(pruned_kind)
+                    if device_id in self.cone_references]
+                for pruned_kind in self.pruned_kinds}
+        return self.active_devices[device_kind]
+
+    def build_fanout(self):
+        """Build the fanout index and evaluation order of the network.
+
+        The evaluation order matches the order in which execute_sweep
+        executes the devices, so the event-driven engine sees the same
+        intermediate signals as the sweep.
+        """
+        device_kinds = [
+            self.devices.SWITCH,
+            self.devices.D_TYPE,
+            self.devices.CLOCK,
+            self.devices.RC,
+            self.devices.SIGGEN,
+            self.devices.AND,
+            self.devices.OR,
+            self.devices.NAND,
+            self.devices.NOR,
+            self.devices.XOR,
+        ]
+        self.evaluation_order = []
+        for device_kind in device_kinds:
+            self.evaluation_order.extend(
+                self.get_active_devices(device_kind))
+        self.evaluation_position = {
+            device_id: index
+            for index, device_id in enumerate(self.evaluation_order)
+        }
+
+        self.fanout = {device_id: [] for device_id in self.evaluation_order}
+        for device in self.devices.devices_list:
+            if device.device_id not in self.evaluation_position:
+                continue
+            for connected_output in device.inputs.values():
+                if connected_output is None:  # unconnected input
+                    continue
+                (output_device_id, output_port_id) = connected_output
+                readers = self.fanout.get(output_device_id)
+                if readers is not None and device.device_id not in readers:
+                    readers.append(device.device_id)
+        self.fanout_device_count = len(self.devices.devices_list)
+        self.pending_events = set()
+        self.schedule = None
+
+    def execute_device(self, device_id):
+        """Execute a single device according to its kind.
+
+        Return True if successful.
+        """
+        device = self.devices.get_device(device_id)
+        if device is None:
+            return False
+        device_kind = device.device_kind
+        if device_kind == self.devices.SWITCH:
+            return self.execute_switch(device_id)
+        elif device_kind == self.devices.D_TYPE:
+            return self.execute_d_type(device_id)
+        elif device_kind in [self.devices.CLOCK, self.devices.RC,
+                             self.devices.SIGGEN]:
+            return self.execute_clock(device_id)
+        elif device_kind == self.devices.AND:
+            return self.execute_gate(device_id, self.devices.HIGH,
+                                     self.devices.HIGH)
+        elif device_kind == self.devices.OR:
+            return self.execute_gate(device_id, self.devices.LOW,
+                                     self.devices.LOW)
+        elif device_kind == self.devices.NAND:
+            return self.execute_gate(device_id, self.devices.HIGH,
+                                     self.devices.LOW)
+        elif device_kind == self.devices.NOR:
+            return self.execute_gate(device_id, self.devices.LOW,
+                                     self.devices.HIGH)
+        elif device_kind == self.devices.XOR:
+            return self.execute_gate(device_id, None, None)
+        return False
 
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
-        Return True if successful and the network does not oscillate.
+        The devices are executed by the engine chosen with
+        set_simulation_mode. Return True if successful and the network does
+        not oscillate.
+        """
+        if self.simulation_mode == self.EVENT_DRIVEN:
+            return self.execute_events()
+        elif self.simulation_mode == self.LEVELIZED:
+            return self.execute_levelized()
+        elif self.simulation_mode == self.COMPACT:
+            return self.execute_compact()
+        elif self.simulation_mode == self.GENERATED:
+            return self.execute_generated()
+        return self.execute_sweep()
+
+    def execute_sweep(self):
+        """Execute every device on every settling iteration for one cycle.
+
+        This is the reference engine. Return True if successful and the
+        network does not oscillate.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        rc_devices = self.devices.find_devices(self.devices.RC)
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-
         # This sets clock signals to RISING or FALLING, where necessary
-        self.update_clocks()
-        self.update_rcs()
+        self.update_sources()
         if not self.devices.run_once:
             self.devices.run_once = True
         else:
             self.update_siggen()
+        return self.settle_sweep()
 
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
+    def settle_sweep(self):
+        """Execute every device on every iteration until the signals settle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        clock_devices = self.devices.find_devices(self.devices.CLOCK)
+        rc_devices = self.devices.find_devices(self.devices.RC)
+        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
+        switch_devices = self.devices.find_devices(self.devices.SWITCH)
+        d_type_devices = self.get_active_devices(self.devices.D_TYPE)
+        and_devices = self.get_active_devices(self.devices.AND)
+        or_devices = self.get_active_devices(self.devices.OR)
+        nand_devices = self.get_active_devices(self.devices.NAND)
+        nor_devices = self.get_active_devices(self.devices.NOR)
+        xor_devices = self.get_active_devices(self.devices.XOR)
 
         iterations = 0
-        while iterations < iteration_limit:
+        while iterations < self.iteration_limit:
             iterations += 1
             self.steady_state = True
 
@@ -459,3 +842,441 @@ class Network:
             if self.steady_state:
                 break
         return self.steady_state
+
+    def execute_events(self):
+        """Execute one simulation cycle, re-evaluating only affected devices.
+
+        A device is re-evaluated when one of its inputs or its own output has
+        changed. The devices are visited in the order of execute_sweep, so the
+        signals produced are the same as those of the reference engine.
+        Return True if successful and the network does not oscillate.
+        """
+        # Rebuild the index after cold start-up or any change to the network
+        full_update = (
+            not self.devices.run_once
+            or self.fanout is None
+            or self.fanout_device_count != len(self.devices.devices_list)
+        )
+        if full_update:
+            self.build_fanout()
+
+        # This sets clock signals to RISING or FALLING, where necessary
+        changed_devices = self.update_sources()
+        if not self.devices.run_once:
+            self.devices.run_once = True
+        else:
+            changed_devices.extend(self.update_siggen())
+
+        if full_update:
+            events = set(self.evaluation_order)
+        else:
+            events = self.pending_events
+            # Switch states may have been set since the last cycle
+            events.update(self.devices.find_devices(self.devices.SWITCH))
+            for device_id in changed_devices:
+                events.add(device_id)
+                events.update(self.fanout[device_id])
+        self.pending_events = set()
+
+        for _ in range(self.iteration_limit):
+            if not events:
+                break
+            events = self.settle_events(events)
+            if events is None:  # a device could not be executed
+                return False
+
+        self.pending_events = events
+        self.steady_state = not events
+        return self.steady_state
+
+    def settle_events(self, events):
+        """Execute the given devices for one settling iteration.
+
+        Devices reading a changed output are executed later in the same
+        iteration if they come after it in the evaluation order, and in the
+        next iteration otherwise. Return the set of devices to execute in the
+        next iteration, or None if a device could not be executed.
+        """
+        position = self.evaluation_position
+        queued = set(events)
+        queue = [position[device_id] for device_id in queued]
+        heapq.heapify(queue)
+        next_events = set()
+
+        while queue:
+            index = heapq.heappop(queue)
+            device_id = self.evaluation_order[index]
+            self.steady_state = True
+            if not self.execute_device(device_id):
+                return None
+            if self.steady_state:  # outputs are unchanged
+                continue
+            # A changed output must settle in the next iteration
+            next_events.add(device_id)
+            for reader_id in self.fanout[device_id]:
+                reader_index = position[reader_id]
+                if reader_index > index:
+                    if reader_id not in queued:
+                        queued.add(reader_id)
+                        heapq.heappush(queue, reader_index)
+                else:
+                    next_events.add(reader_id)
+        return next_events
+
+    def levelize(self):
+        """Build the levelized schedule of the logic gates.
+
+        The gates between the switch, D-type and source boundaries are split
+        into strongly connected components. Gates with feedback, such as SR
+        latches, and the gates driving them or a D-type are sequential, and
+        stay in the order of the sweep. The other gates only drive monitored
+        outputs, so their settled signals do not depend on the order in which
+        they are executed. Each of them is placed one level after the gates
+        that drive it, so a single pass over the levels settles them.
+        """
+        gate_rules = {
+            self.devices.AND: (self.devices.HIGH, self.devices.HIGH),
+            self.devices.OR: (self.devices.LOW, self.devices.LOW),
+            self.devices.NAND: (self.devices.HIGH, self.devices.LOW),
+            self.devices.NOR: (self.devices.LOW, self.devices.HIGH),
+            self.devices.XOR: (None, None),
+        }
+        gates = []
+        self.boundary_devices = []
+        for device_id in self.evaluation_order:
+            device = self.devices.get_device(device_id)
+            if device.device_kind in gate_rules:
+                gates.append(device_id)
+            else:
+                self.boundary_devices.append(device_id)
+        gate_set = set(gates)
+        successors = {
+            gate_id: [reader_id for reader_id in self.fanout[gate_id]
+                      if reader_id in gate_set]
+            for gate_id in gates
+        }
+
+        # Find the strongly connected components with Tarjan's algorithm,
+        # using an explicit stack so that long gate chains do not hit the
+        # recursion limit. Components are found in reverse topological order.
+        index_of = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root_id in gates:
+            if root_id in index_of:
+                continue
+            index_of[root_id] = lowlink[root_id] = len(index_of)
+            stack.append(root_id)
+            on_stack.add(root_id)
+            work = [(root_id, iter(successors[root_id]))]
+            while work:
+                (gate_id, children) = work[-1]
+                for child_id in children:
+                    if child_id not in index_of:
+                        index_of[child_id] = lowlink[child_id] = len(index_of)
+                        stack.append(child_id)
+                        on_stack.add(child_id)
+                        work.append((child_id, iter(successors[child_id])))
+                        break
+                    elif child_id in on_stack:
+                        lowlink[gate_id] = min(lowlink[gate_id],
+                                               index_of[child_id])
+                else:
+                    work.pop()
+                    if work:
+                        parent_id = work[-1][0]
+                        lowlink[parent_id] = min(lowlink[parent_id],
+                                                 lowlink[gate_id])
+                    if lowlink[gate_id] == index_of[gate_id]:
+                        component = []
+                        while True:
+                            member_id = stack.pop()
+                            on_stack.discard(member_id)
+                            component.append(member_id)
+                            if member_id == gate_id:
+                                break
+                        components.append(component)
+
+        # A gate is sequential if it has feedback, or drives a D-type or a
+        # sequential gate. The D-types and feedback loops see the signals of
+        # these gates while they settle, so they are executed once per
+        # settling iteration in the order of the sweep, which gives the same
+        # intermediate signals. The components were found with their readers
+        # first.
+        sequential = set()
+        for component in components:
+            cyclic = len(component) > 1 or component[0] in successors[
+                component[0]]
+            for gate_id in component:
+                if (cyclic
+                        or len(successors[gate_id]) < len(self.fanout[gate_id])
+                        or not sequential.isdisjoint(successors[gate_id])):
+                    sequential.update(component)
+                    break
+
+        # Place the sequential gates in a single block ahead of the levels,
+        # and each other gate one level after the gates that drive it
+        sequential_steps = [self.compile_gate(gate_id, gate_rules)
+                            for gate_id in gates if gate_id in sequential]
+        self.schedule = [[]]
+        if sequential_steps:
+            self.schedule[0].append((True, sequential_steps))
+        level_of = {}
+        for component in reversed(components):
+            if component[0] in sequential:
+                continue
+            [gate_id] = component
+            level = 1
+            for connected_output in self.devices.get_device(
+                    gate_id).inputs.values():
+                if connected_output is not None:
+                    level = max(level, level_of.get(connected_output[0],
+                                                    0) + 1)
+            level_of[gate_id] = level
+            while len(self.schedule) <= level:
+                self.schedule.append([])
+            self.schedule[level].append(
+                (False, [self.compile_gate(gate_id, gate_rules)]))
+
+    def compile_gate(self, gate_id, gate_rules):
+        """Return the compiled step of a gate for execute_scheduled_gate.
+
+        The step is (device, input sources, x, y), where each source is the
+        outputs dictionary of the connected device and the output ID, or None
+        if the input is unconnected. gate_rules stores {device_kind: (x, y)},
+        see execute_gate.
+        """
+        device = self.devices.get_device(gate_id)
+        sources = []
+        for connected_output in device.inputs.values():
+            if connected_output is None:  # unconnected input
+                sources.append(None)
+                continue
+            (output_device_id, output_port_id) = connected_output
+            output_device = self.devices.get_device(output_device_id)
+            sources.append((output_device.outputs, output_port_id))
+        (x, y) = gate_rules[device.device_kind]
+        return (device, sources, x, y)
+
+    def execute_scheduled_gate(self, step):
+        """Execute a compiled gate step and update its output signal value.
+
+        The rule is the one of execute_gate, applied to the raw input
+        signals, so a RISING or FALLING input is not equal to x and the
+        inputs of an XOR are compared as they are. Return the updated output
+        signal, or None if unsuccessful.
+        """
+        (device, sources, x, y) = step
+        input_signals = []
+        for source in sources:
+            if source is None:  # this input is unconnected
+                return None
+            (outputs, port_id) = source
+            input_signals.append(outputs[port_id])
+
+        if x is None:  # XOR, output is high only if both inputs are different
+            if input_signals[0] == input_signals[1]:
+                target = self.devices.LOW
+            else:
+                target = self.devices.HIGH
+        elif all(input_signal == x for input_signal in input_signals):
+            target = y
+        else:
+            target = self.invert_signal(y)
+
+        updated_signal = self.update_signal(device.outputs[None], target)
+        if updated_signal is None:  # if the update is unsuccessful
+            return None
+        device.outputs[None] = updated_signal
+        return updated_signal
+
+    def execute_levelized(self):
+        """Execute one simulation cycle using the levelized schedule.
+
+        On every settling iteration the boundary devices are executed as in
+        execute_sweep, then each level of gates is executed once. Return True
+        if successful and the network does not oscillate.
+        """
+        if (self.fanout is None
+                or self.fanout_device_count != len(self.devices.devices_list)):
+            self.build_fanout()
+        if self.schedule is None:
+            self.levelize()
+
+        # This sets clock signals to RISING or FALLING, where necessary
+        self.update_sources()
+        if not self.devices.run_once:
+            self.devices.run_once = True
+        else:
+            self.update_siggen()
+
+        for _ in range(self.iteration_limit):
+            self.steady_state = True
+            for device_id in self.boundary_devices:
+                if not self.execute_device(device_id):
+                    return False
+            for level in self.schedule:
+                for sequential, steps in level:
+                    for step in steps:
+                        if self.execute_scheduled_gate(step) is None:
+                            return False
+            if self.steady_state:
+                break
+        return self.steady_state
+
+    def get_state(self):
+        """Return a snapshot of the full state of the network.
+
+        The snapshot is hashable and holds everything that determines the
+        following cycles: the output signals, switch states, D-type memories,
+        clock, RC and siggen counters, and the state of the engines.
+        """
+        state = [self.simulation_mode, self.devices.run_once,
+                 self.fanout is None, frozenset(self.pending_events)]
+        if self.compact_network is not None:
+            state.append(self.compact_network.get_state())
+            state.extend(self.devices.get_device(device_id).switch_state
+                         for device_id in self.devices.find_devices(
+                             self.devices.SWITCH))
+            return tuple(state)
+        for device in self.devices.devices_list:
+            state.append(tuple(device.outputs.values()))
+            state.append((device.switch_state, device.dtype_memory,
+                          device.clock_counter))
+        return tuple(state)
+
+    def execute_cycles(self, cycles, monitors=None):
+        """Execute the network for the given number of simulation cycles.
+
+        If monitors are given, their signals are recorded after every cycle.
+        When the state of the network repeats, the network is periodic from
+        then on, so the signals recorded over one period are replayed
+        instead of executing the same cycles again. The last incomplete
+        period is executed, so the network ends in the same state as if all
+        the cycles had been executed. Return True if successful, stopping at
+        the first cycle on which the network oscillates.
+        """
+        seen_states = {}  # {state: cycle}
+        check_states = self.fast_forward
+        cycle = 0
+        while cycle < cycles:
+            if check_states:
+                state = self.get_state()
+                first_cycle = seen_states.get(state)
+                if first_cycle is not None:
+                    check_states = False
+                    period = cycle - first_cycle
+                    trace_length = (None if monitors is None
+                                    else monitors.get_trace_length())
+                    if trace_length is not None and trace_length < period:
+                        # Traces keeping fewer cycles than the period
+                        continue
+                    repeats = (cycles - cycle) // period
+                    if monitors is not None:
+                        # The last period signals were recorded over the
+                        # period
+                        monitors.repeat_signals(period, repeats)
+                    cycle += repeats * period
+                    continue
+                seen_states[state] = cycle
+                if len(seen_states) >= self.state_history_limit:
+                    check_states = False
+            if not self.execute_network():
+                return False
+            if monitors is not None:
+                monitors.record_signals()
+            cycle += 1
+        return True
+
+    def build_compact(self):
+        """Build the compact representation of the network.
+
+        The network must be complete, see check_network.
+        """
+        if self.compact_network is not None:
+            self.compact_network.store_state()
+            self.compact_network = None
+        # Imported here, so that numpy is only loaded if the compact mode is
+        # used
+        from compact import CompactNetwork
+        self.build_fanout()
+        self.levelize()
+        self.compact_network = CompactNetwork(self.devices, self)
+
+    def execute_compact(self):
+        """Execute one simulation cycle on the compact network.
+
+        The devices are executed as in execute_levelized, with vectorized
+        operations on groups of devices of the same kind. Return True if
+        successful and the network does not oscillate.
+        """
+        if (self.compact_network is None or self.fanout is None
+                or self.fanout_device_count != len(self.devices.devices_list)):
+            if not self.check_network():
+                return False
+        compact_network = self.compact_network
+        if not self.devices.run_once:
+            compact_network.cold_startup()
+
+        # This sets clock signals to RISING or FALLING, where necessary
+        compact_network.update_clocks()
+        compact_network.update_rcs()
+        if not self.devices.run_once:
+            self.devices.run_once = True
+        else:
+            compact_network.update_siggen()
+
+        for _ in range(self.iteration_limit):
+            if not compact_network.execute_iteration():
+                self.steady_state = False
+                return False
+            if compact_network.steady_state:
+                break
+        self.steady_state = compact_network.steady_state
+        return self.steady_state
+
+    def build_generated(self):
+        """Generate and compile the kernel of the network.
+
+        The kernel is only generated for a complete network, see
+        check_network.
+        """
+        self.build_fanout()
+        self.generated_kernel = None
+        for device_id in self.evaluation_order:
+            device = self.devices.get_device(device_id)
+            if None in device.inputs.values():  # unconnected input
+                return
+        # Imported here, as for the compact mode
+        from codegen import GeneratedKernel
+        self.generated_kernel = GeneratedKernel(self.devices, self)
+
+    def execute_generated(self):
+        """Execute one simulation cycle with the generated kernel.
+
+        The signals are the same as those of execute_sweep. The kernel is
+        generated again after any change to the network, and the sweep is
+        used instead while the network is incomplete. Return True if
+        successful and the network does not oscillate.
+        """
+        if (self.fanout is None
+                or self.fanout_device_count != len(self.devices.devices_list)):
+            self.build_generated()
+
+        # This sets clock signals to RISING or FALLING, where necessary
+        self.update_sources()
+        if not self.devices.run_once:
+            self.devices.run_once = True
+        else:
+            self.update_siggen()
+
+        steady_state = None
+        if self.generated_kernel is not None:
+            steady_state = self.generated_kernel.execute_cycle(
+                self.iteration_limit)
+        if steady_state is None:  # incomplete network or invalid signals
+            return self.settle_sweep()
+        self.steady_state = steady_state
+        return self.steady_state
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Run regression simulations of many definition files in parallel.
+
+Used in the Logic Simulator project to simulate every definition file in a
+directory, spreading the files over all the processor cores, and to write
+a report of the parse errors, oscillations and signal traces.
+
+Usage
+-----
+Show help: regression.py -h
+Run: regression.py [-r <cycles>] [-j <workers>] [-t <timeout>]
+                   [-o <report path>] <directory>
+The report is written as CSV if its path ends in .csv, and as JSON otherwise.
+
+Classes
+-------
+RegressionRunner - simulates definition files in parallel and reports.
+
+Functions
+---------
+simulate_definition_file - simulates one definition file.
+"""
+import concurrent.futures
+import contextlib
+import csv
+import getopt
+import hashlib
+import io
+import json
+import os
+import random
+import signal
+import sys
+import time
+
+import error
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from batch import BatchRunner
+
+
+def raise_timeout(signal_number, frame):
+    """Stop a simulation that takes too long."""
+    raise TimeoutError("simulation timed out")
+
+
+def simulate_definition_file(path, cycles, seed, timeout=None):
+    """Parse and simulate one definition file and return its result.
+
+    This function is run in the worker processes, each building its own
+    names, devices, network and monitors. The result is a dictionary holding
+    the status of the file, one of "passed", "parse_error", "oscillating",
+    "timeout" or "crashed", the parse errors, and a SHA-256 digest of the
+    signal traces. Where the platform allows it, the file is abandoned after
+    timeout seconds.
+    """
+    start_time = time.perf_counter()
+    use_alarm = timeout is not None and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.alarm(timeout)
+    result = {"path": path, "status": "passed", "errors": [],
+              "monitors": 0, "trace_digest": None}
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = None
+    try:
+        # The parser reports on the standard output
+        with contextlib.redirect_stdout(io.StringIO()):
+            scanner = Scanner(path, names, buffered=True)
+            parser = Parser(names, devices, network, monitors, scanner)
+            parsed = parser.parse_network()
+        if not parsed:  # empty file
+            result["status"] = "parse_error"
+        else:
+            random.seed(seed)
+            devices.cold_startup()
+            if not network.execute_cycles(cycles, monitors):
+                result["status"] = "oscillating"
+            traces = io.StringIO()
+            BatchRunner(names, devices, network, monitors).write_traces(
+                traces)
+            result["monitors"] = len(monitors.monitors_dictionary)
+            result["trace_digest"] = hashlib.sha256(
+                traces.getvalue().encode()).hexdigest()
+    except error.MyException:
+        result["status"] = "parse_error"
+    except TimeoutError:
+        result["status"] = "timeout"
+    except Exception as exception:  # report the failure and carry on
+        result["status"] = "crashed"
+        result["errors"].append({"name": type(exception).__name__,
+                                 "row": None, "column": None,
+                                 "message": str(exception)})
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+    if parser is not None:
+        for parse_error in parser.error_handler.error_list:
+            result["errors"].append({"name": parse_error.get_error_name(),
+                                     "row": parse_error.error_row,
+                                     "column": parse_error.error_col,
+                                     "message": str(parse_error)})
+    result["seconds"] = time.perf_counter() - start_time
+    return result
+
+
+class RegressionRunner:
+
+    """Simulate definition files in parallel and report the results.
+
+    Each definition file is simulated by simulate_definition_file in a pool
+    of worker processes, from a cold start-up with a fixed random seed, so
+    the trace digests can be compared between runs.
+
+    Parameters
+    ----------
+    cycles: number of cycles simulated for each definition file.
+    seed: random seed of the cold start-up.
+    max_workers: number of worker processes. Defaults to the number of
+                 processor cores.
+    timeout: number of seconds after which a definition file is abandoned,
+             or None to wait for every file.
+
+    Public methods
+    --------------
+    find_definition_files(self, directory): Returns the paths of the
+                                            definition files in a directory.
+
+    run(self, paths): Simulates the definition files and returns their
+                      results.
+
+    write_report(self, results, report_path): Writes the results as a JSON
+                                              or CSV report.
+    """
+
+    # Columns of CSV reports
+    CSV_FIELDS = ["path", "status", "errors", "monitors", "trace_digest",
+                  "seconds"]
+
+    def __init__(self, cycles=100, seed=0, max_workers=None, timeout=60):
+        """Initialise the simulation settings."""
+        self.cycles = cycles
+        self.seed = seed
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+
+    def find_definition_files(self, directory):
+        """Return the sorted paths of the definition files in a directory.
+
+        Definition files are the .txt files of the directory and of its
+        subdirectories.
+        """
+        paths = []
+        for directory_path, directory_names, file_names in os.walk(directory):
+            for file_name in file_names:
+                if file_name.endswith(".txt"):
+                    paths.append(os.path.join(directory_path, file_name))
+        return sorted(paths)
+
+    def run(self, paths):
+        """Simulate the definition files and return their results.
+
+        The results are returned in the order of paths.
+        """
+        if not paths:
+            return []
+        workers = min(self.max_workers, len(paths))
+        # Send the files in chunks to cut the cost of messages between the
+        # processes, keeping several chunks per worker to balance the load
+        chunk_size = max(1, len(paths) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            return list(executor.map(simulate_definition_file, paths,
+                                     [self.cycles] * len(paths),
+                                     [self.seed] * len(paths),
+                                     [self.timeout] * len(paths),
+                                     chunksize=chunk_size))
+
+    def write_report(self, results, report_path):
+        """Write the results as a CSV report, or as a JSON report.
+
+        The report is written as CSV if report_path ends in .csv. Return True
+        if successful.
+        """
+        try:
+            with open(report_path, "w", newline="") as file:
+                if report_path.endswith(".csv"):
+                    writer = csv.DictWriter(file, self.CSV_FIELDS)
+                    writer.writeheader()
+                    for result in results:
+                        row = dict(result)
+                        row["errors"] = "; ".join(
+                            "{}({}:{})".format(parse_error["name"],
+                                               parse_error["row"],
+                                               parse_error["column"])
+                            for parse_error in result["errors"])
+                        row["seconds"] = "{:.4f}".format(result["seconds"])
+                        writer.writerow(row)
+                else:
+                    json.dump({"cycles": self.cycles, "seed": self.seed,
+                               "results": results}, file, indent=2)
+        except OSError:
+            return False
+        return True
+
+
+def main(arg_list):
+    """Parse the command line options and arguments and run the regression.
+
+    Print a summary of the results and write the report.
+    """
+    usage_message = (
+        "Usage:\n"
+        "Show help: regression.py -h\n"
+        "Run: regression.py [-r <cycles>] [-j <workers>] [-t <timeout>] "
+        "[-o <report path>] <directory>\n"
+        "The report is written as CSV if its path ends in .csv, and as JSON "
+        "otherwise."
+    )
+    try:
+        options, arguments = getopt.getopt(arg_list, "hr:j:t:o:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit(2)
+
+    cycles = 100
+    max_workers = None
+    timeout = 60
+    report_path = "regression_report.json"
+    for option, value in options:
+        if option == "-h":
+            print(usage_message)
+            sys.exit()
+        elif option in ["-r", "-j", "-t"]:
+            if not value.isdigit():
+                print("Error: " + option + " needs a non-negative integer\n")
+                print(usage_message)
+                sys.exit(2)
+            if option == "-r":
+                cycles = int(value)
+            elif option == "-j":
+                max_workers = int(value) or None
+            else:
+                timeout = int(value) or None
+        elif option == "-o":
+            report_path = value
+
+    if len(arguments) != 1:
+        print("Error: one directory required\n")
+        print(usage_message)
+        sys.exit(2)
+
+    [directory] = arguments
+    runner = RegressionRunner(cycles, max_workers=max_workers,
+                              timeout=timeout)
+    results = runner.run(runner.find_definition_files(directory))
+    statuses = [result["status"] for result in results]
+    print(", ".join("{} {}".format(statuses.count(status), status) for status
+                    in ["passed", "parse_error", "oscillating", "timeout",
+                        "crashed"]))
+    if not runner.write_report(results, report_path):
+        print("Error! Could not write to " + report_path)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -11,6 +11,7 @@ Classes:
 names_ints = Names()
 scanner_instance = Scanner(file_path, names_ints)
 """
+import re
 
 
 class Symbol:
@@ -41,14 +42,25 @@ class Scanner:
     that the parser can use. It also skips over comments and irrelevant
     formatting characters, such as spaces and line breaks.
 
+    In buffered mode the whole file is read on initialisation and symbols
+    are matched with a precompiled pattern, which is faster for large
+    definition files. Both modes return the same symbols.
+
     Parameters:
         path: path to the circuit definition file.
         names: instance of the names.Names() class.
+        buffered: if True, read the whole file and scan it in buffered mode.
 
     Public methods:
         get_symbol(self): Translates the next sequence of characters into a
                           symbol and returns the symbol.
 
+        get_buffered_symbol(self): Translates the next symbol of the file
+                                   buffer in buffered mode.
+
+        scan_buffer(self): Generates the symbols of the file buffer in
+                           buffered mode.
+
         skip_space(self): Skip whitespace characters and move to the
                             next non-whitespace character.
 
@@ -63,11 +75,18 @@ class Scanner:
                         non-alphanumeric character.
     """
 
-    def __init__(self, path, names):
+    # Patterns used by the buffered mode. SYMBOL_PATTERN skips whitespace
+    # and captures a name (a letter followed by letters or digits), a number
+    # or any other single character, matching get_name and get_number.
+    WHITESPACE_PATTERN = re.compile(r"\s*")
+    SYMBOL_PATTERN = re.compile(r"\s*(?:([^\W\d_][^\W_]*)|(\d+)|(\S))")
+
+    def __init__(self, path, names, buffered=False):
         """Open specified file and initialize reserved words and IDs.
         Parameters:
             path (str): Path to the circuit definition file
             names (names.Names): Instance of the names.Names() class
+            buffered (bool): Read the whole file and scan it in buffered mode
 
         Returns:
             None
@@ -104,6 +123,12 @@ class Scanner:
         self.start_of_symbol_row = None
         self.start_of_symbol_col = None
 
+        # In buffered mode the file is held in memory
+        self.buffered = buffered
+        if self.buffered:
+            self.buffer = self.input_file.read()
+            self.input_file.close()
+
         # Assign a unique number to each symbol type
         self.symbol_type_list = [
             self.COMMA,
@@ -120,6 +145,18 @@ class Scanner:
             self.HASH,
         ] = range(12)
 
+        # Single character symbols, as recognised by get_symbol
+        self.punctuation = {
+            "(": self.OPENBRACKET,
+            ")": self.CLOSEDBRACKET,
+            ",": self.COMMA,
+            ":": self.COLON,
+            "=": self.EQUALS,
+            ";": self.SEMICOLON,
+            ".": self.DOT,
+            "#": self.HASH,
+        }
+
         [
             self.DEVICE_ID,
             self.CONNECT_ID,
@@ -130,6 +167,9 @@ class Scanner:
             self.NONE_ID,
         ] = self.names.lookup(self.keywords_list)
 
+        if self.buffered:
+            self.buffered_symbols = self.scan_buffer()
+
     def get_symbol(self):
         """Translate the next sequence of characters into a symbol.
 
@@ -139,6 +179,9 @@ class Scanner:
            Raises:
                 None
         """
+        if self.buffered:
+            return self.get_buffered_symbol()
+
         # Instantiate Symbol Object
         symbol = Symbol()
 
@@ -148,12 +191,14 @@ class Scanner:
 
         # Call skip_space which returns next non-whitespace character
         self.skip_space()
+        symbol.row = self.marker_row
+        symbol.col = self.marker_col
 
         if self.current_character.isalpha():
             name_string = self.get_name()
             if name_string in self.keywords_list:
                 symbol.type = self.KEYWORD
-            elif name_string in self.names.names_list:
+            elif self.names.query(name_string) is not None:
                 symbol.type = self.NAME
             elif name_string.isdigit():
                 symbol.type = self.NUMBER
@@ -221,10 +266,98 @@ class Scanner:
             self.marker_row += 1
 
         self.current_character = self.input_file.read(1)
-        print(self.current_character)
 
         return self.current_character
 
+    def get_buffered_symbol(self):
+        """Translate the next symbol of the file buffer in buffered mode.
+
+        The symbol types, IDs and positions, and the start of symbol marker
+        used for error reporting, are the same as those of get_symbol.
+
+           Returns:
+                Symbol: The translated symbol.
+        """
+        return next(self.buffered_symbols)
+
+    def scan_buffer(self):
+        """Generate the symbols of the file buffer in buffered mode.
+
+        Each match of SYMBOL_PATTERN skips whitespace and captures one name,
+        number or single character symbol. The scanning state is kept in
+        local variables between symbols.
+
+           Yields:
+                Symbol: The next translated symbol.
+        """
+        buffer = self.buffer
+        keywords = set(self.keywords_list)
+        names_index = self.names.names_index
+        intern_names = self.names.intern_names
+        punctuation = self.punctuation
+        KEYWORD = self.KEYWORD
+        NAME = self.NAME
+        NUMBER = self.NUMBER
+
+        row = 0
+        line_start = 0  # offset of the first character of the row
+        for match in self.SYMBOL_PATTERN.finditer(buffer):
+            symbol = Symbol()
+            # As in get_symbol, the start of the symbol is the character
+            # after the previous symbol
+            self.start_of_symbol_row = self.marker_row
+            self.start_of_symbol_col = self.marker_col
+
+            (name_string, number_string, character) = match.groups()
+            start = match.start()
+            (position, end) = match.span(match.lastindex)
+            if position != start and buffer.count("\n", start, position):
+                row += buffer.count("\n", start, position)
+                line_start = buffer.rindex("\n", start, position) + 1
+            symbol.row = row
+            symbol.col = position - line_start
+
+            if name_string is not None:
+                if name_string in keywords:
+                    symbol.type = KEYWORD
+                else:
+                    symbol.type = NAME
+                symbol.id = names_index.get(name_string)
+                if symbol.id is None:
+                    [symbol.id] = intern_names((name_string,))
+            elif number_string is not None:
+                symbol.type = NUMBER
+                symbol.id = number_string
+            else:
+                # Punctuation, or None for an unknown character
+                symbol.type = punctuation.get(character)
+
+            self.marker_row = row
+            self.marker_col = end - line_start
+            yield symbol
+
+        # Skip trailing whitespace, then return EOF symbols from now on
+        start = self.WHITESPACE_PATTERN.match(
+            buffer, self.marker_col + line_start).start()
+        end = len(buffer)
+        new_lines = buffer.count("\n", start, end)
+        if new_lines:
+            row += new_lines
+            line_start = buffer.rindex("\n", start, end) + 1
+        col = end - line_start
+        while True:
+            symbol = Symbol()
+            self.start_of_symbol_row = self.marker_row
+            self.start_of_symbol_col = self.marker_col
+            # The marker keeps moving on every EOF symbol, as in advance
+            col = max(col, self.marker_col)
+            symbol.type = self.EOF
+            symbol.row = row
+            symbol.col = col
+            self.marker_row = row
+            self.marker_col = col + 1
+            yield symbol
+
     def skip_space(self):
         """Sets current character to next non-whitespace character
            by repeatedly calling advance() as necessary.
@@ -0,0 +1,94 @@
+"""Schedule the switching of clock and RC devices.
+
+Used in the Logic Simulator project so that each simulation cycle only visits
+the clocks and RCs that switch on that cycle, instead of counting every cycle
+of every one of them.
+
+Classes
+-------
+SourceScheduler - keeps the clocks and RCs in order of their next switch.
+"""
+import heapq
+
+
+class SourceScheduler:
+
+    """Keep the clocks and RCs in order of their next switch.
+
+    A clock switches when its counter reaches its half period, and an RC
+    falls when its counter reaches its period. Both then count up from 1
+    again, so an RC falls again at the end of every period. Rather than
+    incrementing the counters on every cycle, the counter of a clock or RC
+    is worked out from the cycle of the scheduler and the cycle and value it
+    was last set at (see devices.Device), and the cycle on which each device
+    is next due is kept in a heap for each device kind. As with counting
+    every cycle, a device whose counter is already past its period never
+    reaches it, so it is not due until its counter or period are set again.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    get_period(self, device): Returns the period after which the device
+                              switches.
+
+    schedule_device(self, device): Schedules a device from its counter and
+                                   period.
+
+    pop_due_devices(self, device_kind): Returns the devices of the given kind
+                                        due on this cycle.
+
+    advance_cycle(self): Moves on to the next cycle.
+    """
+
+    def __init__(self, devices):
+        """Initialise the cycle and the schedules."""
+        self.devices = devices
+        self.device_kinds = [devices.CLOCK, devices.RC]
+        self.cycle = 0  # number of cycles the clocks and RCs have counted
+        # {device_kind: heap of (due cycle, device_id)}. A device is only due
+        # on the cycle stored in its due_cycle, so the entries left behind
+        # when a device is scheduled again are skipped.
+        self.schedules = {device_kind: [] for device_kind in self.device_kinds}
+
+    def get_period(self, device):
+        """Return the number of cycles after which the device switches."""
+        if device.device_kind == self.devices.CLOCK:
+            return device.clock_half_period
+        return device.rc_period
+
+    def schedule_device(self, device):
+        """Schedule a device from its counter and period.
+
+        Called whenever the counter or the period of a clock or RC is set.
+        """
+        counter = device.clock_counter
+        period = self.get_period(device)
+        if counter is None or period is None or counter > period:
+            device.due_cycle = None
+            return
+        device.due_cycle = self.cycle + period - counter
+        heapq.heappush(self.schedules[device.device_kind],
+                       (device.due_cycle, device.device_id))
+
+    def pop_due_devices(self, device_kind):
+        """Return the IDs of the devices of the given kind due on this cycle.
+
+        Their counters restart from 0 on this cycle, which schedules them
+        again for the end of their next period.
+        """
+        schedule = self.schedules[device_kind]
+        due_devices = []
+        while schedule and schedule[0][0] <= self.cycle:
+            [cycle, device_id] = heapq.heappop(schedule)
+            device = self.devices.get_device(device_id)
+            if device.due_cycle == cycle == self.cycle:
+                due_devices.append(device_id)
+                device.clock_counter = 0
+        return due_devices
+
+    def advance_cycle(self):
+        """Move on to the next cycle, counting it for every clock and RC."""
+        self.cycle += 1
@@ -0,0 +1,238 @@
+"""Extract the truth tables of combinational networks.
+
+Used in the Logic Simulator project to find the output levels of a network
+for every assignment of its switches.
+
+Classes
+-------
+TruthTable - stores a bit-packed truth table.
+TruthTableGenerator - enumerates the switch assignments of a network.
+
+Functions
+---------
+get_gray_code - returns the Gray code of a step.
+evaluate_steps - evaluates a range of steps of the enumeration.
+"""
+import concurrent.futures
+
+from bitparallel import BitParallelSimulator
+
+
+def get_gray_code(step):
+    """Return the Gray code of a step, which differs from the code of the
+    step before in a single bit."""
+    return step ^ (step >> 1)
+
+
+def evaluate_steps(netlist, switch_ids, outputs, lane_bits, first_step,
+                   stop_step):
+    """Evaluate the steps from first_step up to stop_step.
+
+    The first lane_bits switches take a different assignment in every lane
+    of a bit-parallel simulator, and the other switches take the Gray code
+    of the step, so only one switch changes from one step to the next and
+    the settled signals of the step before are reused. This function is run
+    in the worker processes when the steps are sharded. Return a list of
+    (Gray code, [output lanes], unsettled lanes) for each step, where the
+    lanes are integers with one bit per lane.
+    """
+    [names, devices, network, monitors] = netlist
+    lanes = 1 << lane_bits
+    simulator = BitParallelSimulator(names, devices, network, monitors,
+                                     lanes=lanes)
+    simulator.set_switch_patterns(switch_ids[:lane_bits])
+    high_switch_ids = switch_ids[lane_bits:]
+    levels = [devices.LOW, devices.HIGH]
+    code = get_gray_code(first_step)
+    for bit, switch_id in enumerate(high_switch_ids):
+        simulator.set_switch(switch_id, levels[(code >> bit) & 1])
+    output_slots = [simulator.output_slots[output] for output in outputs]
+
+    results = []
+    for step in range(first_step, stop_step):
+        new_code = get_gray_code(step)
+        changed_bits = new_code ^ code
+        if changed_bits:
+            bit = changed_bits.bit_length() - 1
+            simulator.set_switch(high_switch_ids[bit],
+                                 levels[(new_code >> bit) & 1])
+        code = new_code
+        simulator.execute_network()
+        results.append((code, [simulator.targets[slot]
+                               for slot in output_slots],
+                        simulator.mask & ~simulator.steady_lanes))
+    return results
+
+
+class TruthTable:
+
+    """Store a bit-packed truth table.
+
+    Row r of the table is the assignment in which switch k is HIGH if bit k
+    of r is set. The column of each output holds one bit per row, set if the
+    output is HIGH, packed eight rows to a byte with the first row in the
+    least significant bit. The rows on which the network did not settle are
+    marked in the same way.
+
+    Parameters
+    ----------
+    switch_ids: list of the switch device IDs, one per bit of a row.
+    outputs: list of the outputs, as (device ID, output ID).
+
+    Public methods
+    --------------
+    set_rows(self, first_row, row_count, output_lanes, unsettled_lanes):
+                          Stores a block of rows given as bit-parallel lanes.
+
+    get_output(self, output, row): Returns the level of an output on a row.
+
+    is_settled(self, row): Returns True if the network settled on a row.
+
+    get_row(self, row): Returns the levels of all the outputs on a row.
+    """
+
+    def __init__(self, switch_ids, outputs):
+        """Initialise empty columns for the outputs."""
+        self.switch_ids = list(switch_ids)
+        self.outputs = list(outputs)
+        self.row_count = 1 << len(self.switch_ids)
+        byte_count = (self.row_count + 7) // 8
+        self.columns = {output: bytearray(byte_count)
+                        for output in self.outputs}
+        self.unsettled = bytearray(byte_count)
+
+    def set_rows(self, first_row, row_count, output_lanes, unsettled_lanes):
+        """Store a block of rows given as bit-parallel lanes.
+
+        Bit i of each lane integer holds row first_row + i. Blocks of eight
+        rows or more must start on a byte.
+        """
+        columns = [self.columns[output] for output in self.outputs]
+        columns.append(self.unsettled)
+        lanes_list = list(output_lanes) + [unsettled_lanes]
+        if row_count < 8:  # merge the rows into their byte
+            start = first_row >> 3
+            shift = first_row & 7
+            block_mask = ((1 << row_count) - 1) << shift
+            for column, lanes in zip(columns, lanes_list):
+                column[start] = (column[start] & ~block_mask) | (
+                    (lanes << shift) & block_mask)
+            return
+        start = first_row // 8
+        byte_count = row_count // 8
+        for column, lanes in zip(columns, lanes_list):
+            column[start:start + byte_count] = lanes.to_bytes(byte_count,
+                                                              "little")
+
+    def get_bit(self, column, row):
+        """Return the bit of a row in a packed column."""
+        return (column[row >> 3] >> (row & 7)) & 1
+
+    def get_output(self, output, row):
+        """Return the level of an output on a row, 0 for LOW or 1 for HIGH.
+
+        Return None if the output or the row is invalid.
+        """
+        if output not in self.columns or row not in range(self.row_count):
+            return None
+        return self.get_bit(self.columns[output], row)
+
+    def is_settled(self, row):
+        """Return True if the network settled on a row."""
+        return not self.get_bit(self.unsettled, row)
+
+    def get_row(self, row):
+        """Return the levels of all the outputs on a row, in their order."""
+        return [self.get_output(output, row) for output in self.outputs]
+
+
+class TruthTableGenerator:
+
+    """Enumerate the switch assignments of a combinational network.
+
+    The first lane_bits switches are simulated at once, one assignment per
+    lane of a bit-parallel simulator, and the other switches are enumerated
+    in Gray-code order, so that each step changes a single switch and starts
+    from the settled signals of the step before. The steps can be sharded
+    over a pool of worker processes, each taking a contiguous range of the
+    Gray code.
+
+    The network must not hold D-types, clocks, RCs or signal generators.
+    Gates with feedback, such as latches, keep their state from one step to
+    the next, so their rows depend on the order of the enumeration.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    lane_bits: number of switches simulated in the lanes, at most.
+
+    Public methods
+    --------------
+    generate(self, switch_ids=None, outputs=None, shards=1): Returns the truth
+                                                    table of the network.
+    """
+
+    def __init__(self, names, devices, network, monitors, lane_bits=12):
+        """Check that the network is combinational.
+
+        Raise ValueError if the network holds sequential devices.
+        """
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.lane_bits = lane_bits
+        for device_kind in [devices.D_TYPE, devices.CLOCK, devices.RC,
+                            devices.SIGGEN]:
+            if devices.find_devices(device_kind):
+                raise ValueError("the network must be combinational")
+
+    def generate(self, switch_ids=None, outputs=None, shards=1):
+        """Return the truth table of the network.
+
+        The switches default to all the switches of the network, and the
+        outputs to the monitored outputs. With more than one shard, the steps
+        are evaluated in a pool of worker processes. Raise ValueError if a
+        device is not a switch or an output is invalid.
+        """
+        devices = self.devices
+        if switch_ids is None:
+            switch_ids = devices.find_devices(devices.SWITCH)
+        if outputs is None:
+            outputs = list(self.monitors.monitors_dictionary)
+        switch_ids = list(switch_ids)
+        outputs = list(outputs)
+        if any(switch_id not in devices.find_devices(devices.SWITCH)
+               for switch_id in switch_ids):
+            raise ValueError("truth table inputs must be switches")
+        for device_id, output_id in outputs:
+            device = devices.get_device(device_id)
+            if device is None or output_id not in device.outputs:
+                raise ValueError("invalid truth table output")
+
+        table = TruthTable(switch_ids, outputs)
+        lane_bits = min(self.lane_bits, len(switch_ids))
+        step_count = 1 << (len(switch_ids) - lane_bits)
+        netlist = [self.names, devices, self.network, self.monitors]
+        shards = max(1, min(shards, step_count))
+        if shards == 1:
+            results = [evaluate_steps(netlist, switch_ids, outputs,
+                                      lane_bits, 0, step_count)]
+        else:
+            bounds = [step_count * shard // shards
+                      for shard in range(shards + 1)]
+            # The netlist is pickled and sent to every worker
+            with concurrent.futures.ProcessPoolExecutor(shards) as executor:
+                results = list(executor.map(
+                    evaluate_steps, [netlist] * shards,
+                    [switch_ids] * shards, [outputs] * shards,
+                    [lane_bits] * shards, bounds[:-1], bounds[1:]))
+
+        for shard_results in results:
+            for code, output_lanes, unsettled_lanes in shard_results:
+                table.set_rows(code << lane_bits, 1 << lane_bits,
+                               output_lanes, unsettled_lanes)
+        return table
@@ -7,6 +7,8 @@ Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+from vcd import VcdWriter
+from truthtable import TruthTableGenerator
 
 
 class UserInterface:
@@ -15,8 +17,8 @@ class UserInterface:
 
     This class allows the user to enter certain commands.
     These commands enable the user to run or continue the simulation for a
-    number of cycles, set switches, add or zap monitors, show help, or quit
-    the program.
+    number of cycles, set switches, add or zap monitors, write the monitored
+    signals to a VCD file, show help, or quit the program.
 
     Parameters
     -----------
@@ -58,6 +60,13 @@ class UserInterface:
 
     zap_command(self): Removes the specified monitor.
 
+    vcd_command(self): Starts or stops writing signals to a VCD file.
+
+    close_vcd(self): Stops writing the VCD file.
+
+    truth_table_command(self): Prints the truth table from the switches to
+                               the monitored signals.
+
     run_network(self, cycles): Runs the network for the specified number of
                                simulation cycles.
 
@@ -74,6 +83,9 @@ class UserInterface:
         self.network = network
 
         self.cycles_completed = 0  # number of simulation cycles completed
+        self.vcd_writer = None  # writes the signals to a VCD file
+        # Recording mode of the monitors before the VCD file was opened
+        self.record_changes = False
 
         self.character = ""  # current character
         self.line = ""  # current string entered by the user
@@ -100,10 +112,16 @@ class UserInterface:
                 self.run_command()
             elif command == "c":
                 self.continue_command()
+            elif command == "v":
+                self.vcd_command()
+            elif command == "t":
+                self.truth_table_command()
             else:
                 print("Invalid command. Enter 'h' for help.")
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
+        if self.vcd_writer is not None:
+            self.close_vcd()
 
     def get_line(self):
         """Print prompt for the user and update the user entry."""
@@ -209,6 +227,8 @@ class UserInterface:
         print("s X N     - set switch X to N (0 or 1)")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("v F       - write the signals to VCD file F (stop if no F)")
+        print("t         - print the truth table of the monitored signals")
         print("h         - help (this command)")
         print("q         - quit the program")
 
@@ -246,17 +266,65 @@ class UserInterface:
             else:
                 print("Error! Could not zap monitor.")
 
+    def vcd_command(self):
+        """Start or stop writing the monitored signals to a VCD file."""
+        path = self.line[self.cursor:].strip()
+        if self.vcd_writer is not None:
+            self.close_vcd()
+            print("Stopped writing VCD file.")
+        if path:
+            # The signals are streamed to the file, so the monitors only
+            # keep their changes, as in batch mode
+            self.record_changes = self.monitors.record_changes
+            self.monitors.set_change_recording(True)
+            try:
+                self.vcd_writer = VcdWriter(self.names, self.devices,
+                                            self.monitors, path)
+            except OSError:
+                self.monitors.set_change_recording(self.record_changes)
+                print("Error! Could not open VCD file.")
+            else:
+                print("Writing signals to " + path)
+
+    def close_vcd(self):
+        """Stop writing the VCD file and restore the recording mode."""
+        self.vcd_writer.close()
+        self.vcd_writer = None
+        self.monitors.set_change_recording(self.record_changes)
+
+    def truth_table_command(self):
+        """Print the truth table from the switches to the monitored signals.
+
+        Rows on which the network oscillates are marked with x.
+        """
+        try:
+            generator = TruthTableGenerator(self.names, self.devices,
+                                            self.network, self.monitors)
+            table = generator.generate()
+        except ValueError:
+            print("Error! The network must be combinational.")
+            return
+        print(" ".join(
+            [self.names.get_name_string(switch_id)
+             for switch_id in table.switch_ids] + ["|"]
+            + [self.devices.get_signal_name(device_id, output_id)
+               for device_id, output_id in table.outputs]))
+        for row in range(table.row_count):
+            levels = [str(level) for level in table.get_row(row)]
+            if not table.is_settled(row):
+                levels = ["x"] * len(levels)
+            print(" ".join([str(row >> bit & 1)
+                            for bit in range(len(table.switch_ids))]
+                           + ["|"] + levels))
+
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
         Return True if successful.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
+        if not self.network.execute_cycles(cycles, self.monitors):
+            print("Error! Network oscillating.")
+            return False
         self.monitors.display_signals()
         return True
 
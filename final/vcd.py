@@ -0,0 +1,178 @@
+"""Write monitored signals to Value Change Dump files.
+
+Used in the Logic Simulator project to export signal traces to external
+waveform viewers while the simulation runs.
+
+Classes
+-------
+VcdWriter - streams the signals recorded by the monitors to a VCD file.
+"""
+import datetime
+
+
+class VcdWriter:
+
+    """Stream the signals recorded by the monitors to a VCD file.
+
+    The writer is notified by the monitors every time they record signals, and
+    writes the monitored signals that changed to the file, so the signal traces
+    never have to be held in memory. Each simulation cycle is one time unit.
+
+    Every device output is declared in the header, so monitors can be made and
+    removed while writing. Outputs that are not monitored, including monitors
+    padded with BLANK signals, are written as unknown (x). RISING and FALLING
+    signals are written as the level they settle to.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    monitors: instance of the monitors.Monitors() class.
+    path: path of the VCD file to write.
+    buffer_size: size in bytes of the file buffer.
+
+    Public methods
+    --------------
+    get_identifier(self, index): Returns the VCD identifier code of a
+                                 variable.
+
+    get_value(self, signal): Returns the VCD value of a signal level.
+
+    write_header(self): Writes the declarations and the initial values.
+
+    record_signals(self): Writes the signals recorded on the last cycle.
+
+    repeat_signals(self, period, repeats): Writes the signals of the last
+                                           period cycles repeats times.
+
+    close(self): Writes the end time and closes the file.
+    """
+
+    # VCD identifier codes use the printable ASCII characters
+    FIRST_CHARACTER = 33
+    CHARACTER_COUNT = 94
+
+    def __init__(self, names, devices, monitors, path, buffer_size=1 << 16):
+        """Open the file, write the header and start listening."""
+        self.names = names
+        self.devices = devices
+        self.monitors = monitors
+
+        self.values = {devices.LOW: "0", devices.HIGH: "1",
+                       devices.RISING: "1", devices.FALLING: "0",
+                       devices.BLANK: "x"}
+
+        # identifiers stores {(device_id, output_id): identifier code}
+        self.identifiers = {}
+        for device_id in devices.find_devices():
+            for output_id in devices.get_device(device_id).outputs:
+                self.identifiers[(device_id, output_id)] = (
+                    self.get_identifier(len(self.identifiers)))
+
+        # last_values stores {(device_id, output_id): last value written}
+        self.last_values = {}
+        self.cycle = 0  # number of cycles written
+
+        self.file = open(path, "w", buffering=buffer_size)
+        self.write_header()
+        monitors.add_signal_listener(self)
+
+    def get_identifier(self, index):
+        """Return the VCD identifier code of the variable with this index."""
+        identifier = []
+        while True:
+            index, character = divmod(index, self.CHARACTER_COUNT)
+            identifier.append(chr(self.FIRST_CHARACTER + character))
+            if index == 0:
+                return "".join(identifier)
+            index -= 1
+
+    def get_value(self, signal):
+        """Return the VCD value of a signal level."""
+        return self.values.get(signal, "x")
+
+    def write_header(self):
+        """Write the declarations and the initial values of the variables."""
+        lines = ["$date " + datetime.datetime.now().strftime("%c") + " $end",
+                 "$version Logic Simulator $end",
+                 "$timescale 1 ns $end",
+                 "$scope module logsim $end"]
+        for (device_id, output_id), identifier in self.identifiers.items():
+            signal_name = self.devices.get_signal_name(device_id, output_id)
+            lines.append(" ".join(["$var wire 1", identifier, signal_name,
+                                   "$end"]))
+        lines.extend(["$upscope $end", "$enddefinitions $end", "$dumpvars"])
+        lines.extend("x" + identifier
+                     for identifier in self.identifiers.values())
+        lines.append("$end")
+        self.file.write("\n".join(lines) + "\n")
+
+    def get_changes(self, signals):
+        """Return the VCD value changes to reach the given signal levels.
+
+        signals stores {(device_id, output_id): signal level} for the
+        monitored outputs. last_values is updated.
+        """
+        changes = []
+        for monitor in list(self.last_values):
+            if monitor not in signals:  # monitor removed
+                del self.last_values[monitor]
+                changes.append("x" + self.identifiers[monitor])
+        for monitor, signal in signals.items():
+            value = self.get_value(signal)
+            if self.last_values.get(monitor, "x") != value:
+                self.last_values[monitor] = value
+                changes.append(value + self.identifiers[monitor])
+        return changes
+
+    def write_changes(self, cycle, changes):
+        """Write the value changes of a cycle, if any."""
+        if changes:
+            self.file.write("#" + str(cycle) + "\n" + "\n".join(changes) +
+                            "\n")
+
+    def record_signals(self):
+        """Write the signals recorded by the monitors on the last cycle.
+
+        This function is called by the monitors at every simulation cycle.
+        """
+        signals = {}
+        for monitor, signal_list in self.monitors.monitors_dictionary.items():
+            if monitor in self.identifiers and len(signal_list):
+                signals[monitor] = signal_list[-1]
+        self.write_changes(self.cycle, self.get_changes(signals))
+        self.cycle += 1
+
+    def repeat_signals(self, period, repeats):
+        """Write the signals of the last period cycles repeats times.
+
+        This function is called by the monitors when the signals of a
+        periodic network are replayed instead of recorded. Only the changes
+        are written, so signals that are constant over the period cost
+        nothing.
+        """
+        period_signals = {}
+        for monitor, signal_list in self.monitors.monitors_dictionary.items():
+            if monitor in self.identifiers:
+                period_signals[monitor] = signal_list[-period:]
+        for repeat in range(repeats):
+            # From the second repeat on, the values before each repeat are
+            # the same, and so are the changes
+            if repeat < 2:
+                period_changes = []  # list of value changes for each cycle
+                for offset in range(period):
+                    period_changes.append(self.get_changes(
+                        {monitor: signals[offset]
+                         for monitor, signals in period_signals.items()}))
+                if repeat == 1 and not any(period_changes):
+                    self.cycle += period * (repeats - 1)
+                    return
+            for changes in period_changes:
+                self.write_changes(self.cycle, changes)
+                self.cycle += 1
+
+    def close(self):
+        """Write the end time, stop listening and close the file."""
+        self.monitors.remove_signal_listener(self)
+        self.file.write("#" + str(self.cycle) + "\n")
+        self.file.close()
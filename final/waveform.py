@@ -0,0 +1,474 @@
+"""Build the vertex arrays of signal waveforms.
+
+Used in the Logic Simulator project to turn the signal traces of the monitors
+into NumPy vertex arrays, which the canvas of the graphical user interface
+uploads to OpenGL vertex buffers and draws with a few calls, and to pick the
+parts of the traces that are visible.
+
+Classes
+-------
+WaveformGeometry - builds the vertices of the traces and markers.
+"""
+import numpy as np
+
+
+class WaveformGeometry:
+
+    """Build the vertices of the signal traces and of their markers.
+
+    The vertices are in the coordinates used by the canvas: each cycle is
+    CYCLE_WIDTH wide, starting at X_OFFSET, and the trace at position p is
+    drawn at a height of Y_OFFSET - TRACE_SPACING * p plus SIGNAL_HEIGHT
+    times the signal level.
+
+    A trace is a line strip with a vertex at each end of every run of cycles
+    with the same signal level, so a signal costs memory in proportion to its
+    activity. The markers are the same for every trace, so one set of
+    markers is built for the longest trace and moved to each trace with the
+    modelview matrix.
+
+    Cycles added to the traces are appended without rebuilding the rest of
+    the vertices: each trace and the markers have spare room for more
+    vertices after them, doubled whenever it runs out, so the arrays are
+    only laid out again a logarithmic number of times.
+
+    Only the cycles in view need to be drawn. When several cycles are drawn
+    on each pixel, the trace is drawn from a level of detail instead: level k
+    of the min/max pyramid of a trace holds the lowest and highest signal
+    level of each group of 2 ** k cycles, drawn as one line strip step.
+
+    Public methods
+    --------------
+    get_signal_array(self, signal_list): Returns the signal levels of a trace
+                                         as a NumPy array.
+
+    build_trace_vertices(self, signal_list, position): Returns the line strip
+                                                       vertices of a trace.
+
+    get_run_starts(self, signals): Returns the first cycle of each run.
+
+    build_run_vertices(self, signals, run_starts, position): Returns the
+        line strip vertices of the runs of a trace.
+
+    get_step_vertices(self, levels, run_starts, cycles, position): Returns
+        the line strip vertices of runs of signal levels.
+
+    build_marker_vertices(self, cycles, first_marker=0): Returns the line
+                                                         vertices of the
+                                                         markers of a trace.
+
+    build(self, signals_list): Builds the vertices of all the traces and
+                               markers.
+
+    append(self, signal_lists): Appends cycles to the end of every trace.
+
+    grow_traces(self, position, capacity): Lays out the trace vertices again
+                                           with more room for a trace.
+
+    get_marker_vertex_count(self, cycles): Returns the number of marker
+                                           vertices of a trace.
+
+    build_pyramid(self, signals): Returns the min/max pyramid of a trace.
+
+    extend_pyramid(self, pyramid, signals): Returns the min/max pyramid of a
+                                            trace with cycles appended.
+
+    grow_array(self, values, length): Returns a longer array that starts
+                                      with values.
+
+    get_level(self, cycles_per_pixel): Returns the pyramid level to draw at a
+                                       zoom.
+
+    get_visible_cycles(self, left, right, cycles): Returns the range of
+                                                   cycles between two x
+                                                   coordinates.
+
+    get_visible_positions(self, bottom, top): Returns the range of trace
+                                              positions between two y
+                                              coordinates.
+
+    get_trace_range(self, position, first_cycle, stop_cycle): Returns the
+        trace vertices that draw a range of cycles.
+
+    build_level_vertices(self, position, level, first_cycle, stop_cycle):
+        Returns the line strip vertices of a range of cycles at a pyramid
+        level.
+    """
+
+    CYCLE_WIDTH = 50
+    X_OFFSET = 30
+    Y_OFFSET = 930
+    SIGNAL_HEIGHT = 50
+    TRACE_SPACING = 90
+
+    # Markers hang below each trace, longer every MAJOR_MARKER cycles
+    MARKER_TOP = 5
+    MARKER_LENGTH = 10
+    MAJOR_MARKER_LENGTH = 25
+    MAJOR_MARKER = 5
+
+    def __init__(self):
+        """Initialise the vertex arrays."""
+        # trace_vertices holds the line strips of all the traces, one after
+        # the other, and trace_ranges the (first vertex, vertex count) of
+        # each trace. Each trace has trace_capacities vertices of room.
+        self.trace_vertices = np.zeros((0, 2), dtype=np.float32)
+        self.trace_ranges = []
+        self.trace_capacities = []
+        # Marker lines of the longest trace, at position 0, with room for
+        # the markers of longer traces
+        self.marker_vertices = np.zeros((0, 2), dtype=np.float32)
+        self.marker_count = 0
+        # (first vertex, stop vertex) ranges of trace_vertices and of
+        # marker_vertices changed by the last append
+        self.trace_updates = []
+        self.marker_update = (0, 0)
+        self.trace_lengths = []  # number of cycles of each trace
+        # First cycle of each run of every trace, to find the vertices of a
+        # range of cycles
+        self.trace_run_starts = []
+        # Min/max pyramid of every trace, see build_pyramid
+        self.pyramids = []
+        # Highest signal level drawn, to find the traces in view
+        self.highest_signal = 1
+
+    def get_signal_array(self, signal_list):
+        """Return the signal levels of a trace as a NumPy array."""
+        return np.asarray(signal_list[:], dtype=np.int16)
+
+    def build_trace_vertices(self, signal_list, position):
+        """Return the line strip vertices of a trace at the given position.
+
+        Return an array of (x, y) rows, with two rows for each run of cycles
+        with the same signal level.
+        """
+        signals = self.get_signal_array(signal_list)
+        return self.build_run_vertices(signals, self.get_run_starts(signals),
+                                       position)
+
+    def get_run_starts(self, signals):
+        """Return the first cycle of each run of equal signal levels."""
+        if not len(signals):
+            return np.zeros(0, dtype=np.int64)
+        changes = np.flatnonzero(signals[1:] != signals[:-1]) + 1
+        return np.concatenate(([0], changes))
+
+    def build_run_vertices(self, signals, run_starts, position):
+        """Return the line strip vertices of the runs of a trace."""
+        if not len(signals):
+            return np.zeros((0, 2), dtype=np.float32)
+        return self.get_step_vertices(signals[run_starts], run_starts,
+                                      len(signals), position)
+
+    def get_step_vertices(self, levels, run_starts, cycles, position):
+        """Return the line strip vertices of runs of signal levels.
+
+        levels holds the signal level of each run, run_starts its first
+        cycle, and the last run ends after cycles cycles.
+        """
+        run_ends = np.concatenate((run_starts[1:], [cycles]))
+        vertices = np.empty((2 * len(run_starts), 2), dtype=np.float32)
+        vertices[0::2, 0] = self.X_OFFSET + self.CYCLE_WIDTH * run_starts
+        vertices[1::2, 0] = self.X_OFFSET + self.CYCLE_WIDTH * run_ends
+        vertices[:, 1] = np.repeat(
+            self.Y_OFFSET + self.SIGNAL_HEIGHT * levels.astype(np.int16)
+            - self.TRACE_SPACING * position, 2)
+        return vertices
+
+    def build_marker_vertices(self, cycles, first_marker=0):
+        """Return the line vertices of the markers of a trace at position 0.
+
+        There is a marker at the start of every cycle and at the end of the
+        last one, so the array has two (x, y) rows for each of cycles + 1
+        markers. If first_marker is given, the earlier markers are left out.
+        """
+        ticks = np.arange(first_marker, cycles + 1)
+        vertices = np.empty((2 * len(ticks), 2), dtype=np.float32)
+        vertices[0::2, 0] = self.X_OFFSET + self.CYCLE_WIDTH * ticks
+        vertices[1::2, 0] = vertices[0::2, 0]
+        top = self.Y_OFFSET - self.MARKER_TOP
+        vertices[0::2, 1] = top
+        vertices[1::2, 1] = np.where(ticks % self.MAJOR_MARKER == 0,
+                                     top - self.MAJOR_MARKER_LENGTH,
+                                     top - self.MARKER_LENGTH)
+        return vertices
+
+    def build(self, signals_list):
+        """Build the vertices of all the traces and markers.
+
+        signals_list is the list of [signal name, signal trace] entries drawn
+        by the canvas.
+        """
+        trace_vertex_list = []
+        self.trace_ranges = []
+        self.trace_capacities = []
+        self.trace_lengths = []
+        self.trace_run_starts = []
+        self.pyramids = []
+        self.highest_signal = 1
+        first_vertex = 0
+        for position, (signal_name, signal_list) in enumerate(signals_list):
+            signals = self.get_signal_array(signal_list)
+            run_starts = self.get_run_starts(signals)
+            vertices = self.build_run_vertices(signals, run_starts, position)
+            trace_vertex_list.append(vertices)
+            self.trace_ranges.append((first_vertex, len(vertices)))
+            self.trace_capacities.append(len(vertices))
+            self.trace_lengths.append(len(signals))
+            self.trace_run_starts.append(run_starts)
+            self.pyramids.append(self.build_pyramid(signals))
+            if len(signals):
+                self.highest_signal = max(self.highest_signal,
+                                          int(signals.max()))
+            first_vertex += len(vertices)
+        if trace_vertex_list:
+            self.trace_vertices = np.concatenate(trace_vertex_list)
+        else:
+            self.trace_vertices = np.zeros((0, 2), dtype=np.float32)
+        self.marker_vertices = self.build_marker_vertices(
+            max(self.trace_lengths, default=0))
+        self.marker_count = len(self.marker_vertices)
+        self.trace_updates = []
+        self.marker_update = (0, 0)
+
+    def append(self, signal_lists):
+        """Append cycles to the end of every trace.
+
+        signal_lists holds the signal levels of the new cycles of each
+        trace, in the order of the traces. Only the vertices from the last
+        run of each trace on, and the pyramid groups from the last group on,
+        are built again, into the spare room of the arrays, so appending
+        takes a time in proportion to the new cycles. Return True if the new
+        vertices fitted in the spare room, with the changed vertices in
+        trace_updates and marker_update, or False if the arrays were laid
+        out again and must be reloaded.
+        """
+        fitted = True
+        self.trace_updates = []
+        for position, signal_list in enumerate(signal_lists):
+            new_signals = self.get_signal_array(signal_list)
+            if not len(new_signals):
+                continue
+            old_cycles = self.trace_lengths[position]
+            pyramid = self.extend_pyramid(self.pyramids[position],
+                                          new_signals)
+            signals = pyramid[0][0]
+            cycles = len(signals)
+            old_runs = len(self.trace_run_starts[position])
+            new_run_starts = self.get_run_starts(new_signals) + old_cycles
+            if old_cycles and signals[old_cycles - 1] == new_signals[0]:
+                new_run_starts = new_run_starts[1:]  # the last run goes on
+            run_starts = self.grow_array(self.trace_run_starts[position],
+                                         old_runs + len(new_run_starts))
+            run_starts[old_runs:] = new_run_starts
+            # The last old run ends later, so it is built again
+            first_run = max(old_runs - 1, 0)
+            vertices = self.get_step_vertices(
+                signals[run_starts[first_run:]], run_starts[first_run:],
+                cycles, position)
+
+            [first_vertex, vertex_count] = self.trace_ranges[position]
+            vertex_count = 2 * len(run_starts)
+            if vertex_count > self.trace_capacities[position]:
+                self.grow_traces(position, 2 * vertex_count)
+                fitted = False
+                first_vertex = self.trace_ranges[position][0]
+            start = first_vertex + 2 * first_run
+            self.trace_vertices[start:start + len(vertices)] = vertices
+            self.trace_updates.append((start, start + len(vertices)))
+            self.trace_ranges[position] = (first_vertex, vertex_count)
+            self.trace_lengths[position] = cycles
+            self.trace_run_starts[position] = run_starts
+            self.pyramids[position] = pyramid
+            self.highest_signal = max(self.highest_signal,
+                                      int(new_signals.max()))
+
+        old_cycles = self.marker_count // 2 - 1
+        cycles = max(self.trace_lengths, default=0)
+        self.marker_update = (self.marker_count, self.marker_count)
+        if cycles > old_cycles:
+            vertices = self.build_marker_vertices(cycles, old_cycles + 1)
+            marker_count = self.marker_count + len(vertices)
+            if marker_count > len(self.marker_vertices):
+                grown = np.zeros((2 * marker_count, 2), dtype=np.float32)
+                grown[:self.marker_count] = (
+                    self.marker_vertices[:self.marker_count])
+                self.marker_vertices = grown
+                fitted = False
+            self.marker_vertices[self.marker_count:marker_count] = vertices
+            self.marker_update = (self.marker_count, marker_count)
+            self.marker_count = marker_count
+        return fitted
+
+    def grow_traces(self, position, capacity):
+        """Lay out trace_vertices again with more room for a trace.
+
+        The trace at position gets room for capacity vertices, and every
+        other trace twice its vertex count, so that later appends fit.
+        """
+        capacities = [max(2 * vertex_count, 2)
+                      for first_vertex, vertex_count in self.trace_ranges]
+        capacities[position] = capacity
+        grown = np.zeros((sum(capacities), 2), dtype=np.float32)
+        first_vertex = 0
+        for index, (old_first, vertex_count) in enumerate(self.trace_ranges):
+            grown[first_vertex:first_vertex + vertex_count] = (
+                self.trace_vertices[old_first:old_first + vertex_count])
+            self.trace_ranges[index] = (first_vertex, vertex_count)
+            first_vertex += capacities[index]
+        self.trace_vertices = grown
+        self.trace_capacities = capacities
+
+    def get_marker_vertex_count(self, cycles):
+        """Return the number of marker vertices of a trace of cycles."""
+        return 2 * (cycles + 1)
+
+    def build_pyramid(self, signals):
+        """Return the min/max pyramid of a trace.
+
+        Level k of the pyramid is a pair of arrays holding the lowest and the
+        highest signal level of each group of 2 ** k cycles, the last group
+        holding the remaining cycles. Level 0 holds the signal levels. The
+        last level has a single group.
+        """
+        lowest = highest = signals.astype(np.int8)
+        pyramid = [(lowest, highest)]
+        while len(lowest) > 1:
+            if len(lowest) % 2:  # repeat the last group to pair it up
+                lowest = np.append(lowest, lowest[-1])
+                highest = np.append(highest, highest[-1])
+            lowest = np.minimum(lowest[0::2], lowest[1::2])
+            highest = np.maximum(highest[0::2], highest[1::2])
+            pyramid.append((lowest, highest))
+        return pyramid
+
+    def extend_pyramid(self, pyramid, signals):
+        """Return the min/max pyramid of a trace with cycles appended.
+
+        The groups before the last group of each level are kept, and the
+        rest of the level is built from the level below. The levels are
+        grown with grow_array, so the arrays of the old pyramid may be
+        changed.
+        """
+        old_cycles = len(pyramid[0][0])
+        count = old_cycles + len(signals)
+        lowest = highest = self.grow_array(pyramid[0][0], count)
+        lowest[old_cycles:] = signals
+        extended = [(lowest, highest)]
+        level = 1
+        while count > 1:
+            first_group = max(old_cycles - 1, 0) // 2 ** level
+            below_lowest = lowest[2 * first_group:]
+            below_highest = highest[2 * first_group:]
+            if len(below_lowest) % 2:  # repeat the last group to pair it up
+                below_lowest = np.append(below_lowest, below_lowest[-1])
+                below_highest = np.append(below_highest, below_highest[-1])
+            count = first_group + len(below_lowest) // 2
+            if level < len(pyramid):
+                [lowest, highest] = pyramid[level]
+            else:
+                lowest = highest = np.zeros(0, dtype=np.int8)
+            lowest = self.grow_array(lowest, count)
+            highest = self.grow_array(highest, count)
+            lowest[first_group:] = np.minimum(below_lowest[0::2],
+                                              below_lowest[1::2])
+            highest[first_group:] = np.maximum(below_highest[0::2],
+                                               below_highest[1::2])
+            extended.append((lowest, highest))
+            level += 1
+        return extended
+
+    def grow_array(self, values, length):
+        """Return an array of length elements that starts with values.
+
+        The array is a view of the spare room after values if there is
+        enough, and otherwise of a new array with room for twice length
+        elements, so growing an array by appending is linear on average.
+        """
+        buffer = values if values.base is None else values.base
+        if len(buffer) < length:
+            buffer = np.zeros(2 * length, dtype=values.dtype)
+            buffer[:len(values)] = values
+        return buffer[:length]
+
+    def get_level(self, cycles_per_pixel):
+        """Return the pyramid level to draw with this many cycles per pixel.
+
+        The level has groups of at most one pixel. Level 0 is drawn from the
+        trace vertices.
+        """
+        if cycles_per_pixel < 2:
+            return 0
+        return int(np.floor(np.log2(cycles_per_pixel)))
+
+    def get_visible_cycles(self, left, right, cycles):
+        """Return the range of cycles between two x coordinates.
+
+        Return (first cycle, stop cycle), clamped to the cycles of a trace of
+        this many cycles.
+        """
+        first_cycle = int(np.floor((left - self.X_OFFSET) / self.CYCLE_WIDTH))
+        stop_cycle = int(np.ceil((right - self.X_OFFSET) / self.CYCLE_WIDTH))
+        return (min(max(first_cycle, 0), cycles),
+                min(max(stop_cycle, 0), cycles))
+
+    def get_visible_positions(self, bottom, top):
+        """Return the range of trace positions between two y coordinates.
+
+        Return (first position, stop position), clamped to the traces. A
+        trace reaches from the bottom of its markers to its highest signal
+        level.
+        """
+        lowest = self.MARKER_TOP + self.MAJOR_MARKER_LENGTH
+        highest = self.SIGNAL_HEIGHT * self.highest_signal
+        first_position = int(np.floor(
+            (self.Y_OFFSET - top - lowest) / self.TRACE_SPACING)) + 1
+        stop_position = int(np.floor(
+            (self.Y_OFFSET - bottom + highest) / self.TRACE_SPACING)) + 1
+        traces = len(self.trace_lengths)
+        return (min(max(first_position, 0), traces),
+                min(max(stop_position, 0), traces))
+
+    def get_trace_range(self, position, first_cycle, stop_cycle):
+        """Return the trace vertices that draw a range of cycles.
+
+        Return (first vertex, vertex count) in trace_vertices, covering the
+        runs that overlap the cycles from first_cycle up to stop_cycle.
+        """
+        if first_cycle >= stop_cycle:
+            return (self.trace_ranges[position][0], 0)
+        run_starts = self.trace_run_starts[position]
+        first_run = np.searchsorted(run_starts, first_cycle, "right") - 1
+        stop_run = np.searchsorted(run_starts, stop_cycle, "left")
+        return (self.trace_ranges[position][0] + 2 * int(first_run),
+                2 * int(stop_run - first_run))
+
+    def build_level_vertices(self, position, level, first_cycle, stop_cycle):
+        """Return the line strip vertices of a range of cycles at a level.
+
+        Each group of 2 ** level cycles overlapping the range has a vertex
+        at its lowest and at its highest signal level, at the start of the
+        group, and the strip ends at the end of the last group. Levels above
+        the last level of the pyramid are drawn from the last level.
+        """
+        if first_cycle >= stop_cycle:
+            return np.zeros((0, 2), dtype=np.float32)
+        level = min(level, len(self.pyramids[position]) - 1)
+        group_cycles = 2 ** level
+        first_group = first_cycle // group_cycles
+        stop_group = -(-stop_cycle // group_cycles)
+        [lowest, highest] = self.pyramids[position][level]
+        lowest = lowest[first_group:stop_group].astype(np.float32)
+        highest = highest[first_group:stop_group].astype(np.float32)
+        group_starts = np.arange(first_group, stop_group) * group_cycles
+        vertices = np.empty((2 * len(lowest) + 1, 2), dtype=np.float32)
+        vertices[0:-1:2, 0] = self.X_OFFSET + self.CYCLE_WIDTH * group_starts
+        vertices[1:-1:2, 0] = vertices[0:-1:2, 0]
+        base = self.Y_OFFSET - self.TRACE_SPACING * position
+        vertices[0:-1:2, 1] = base + self.SIGNAL_HEIGHT * lowest
+        vertices[1:-1:2, 1] = base + self.SIGNAL_HEIGHT * highest
+        last_cycle = min(stop_group * group_cycles,
+                         self.trace_lengths[position])
+        vertices[-1] = (self.X_OFFSET + self.CYCLE_WIDTH * last_cycle,
+                        vertices[-2, 1])
+        return vertices
@@ -0,0 +1,134 @@
+"""Run simulations in a background thread.
+
+Used in the Logic Simulator project to keep the graphical user interface
+responsive during long simulations, report their progress and cancel them.
+
+Classes
+-------
+SimulationWorker - runs a simulation in a background thread.
+"""
+import threading
+import time
+
+
+class SimulationWorker(threading.Thread):
+
+    """Run a simulation in a background thread.
+
+    The network is executed in chunks of cycles, with the signals recorded by
+    the monitors. After each chunk, the signals of the new cycles are passed
+    to on_chunk, and when the simulation stops, the outcome is passed to
+    on_done. The cycles recorded before the network oscillates are passed
+    to on_chunk before on_done, and are counted by the worker as a signal
+    listener of the monitors. The callbacks are called through post, such
+    as wx.CallAfter, so that they run in the thread of the user interface.
+    The size of the chunks adapts so that each one takes about chunk_time
+    seconds.
+
+    While the worker runs, the network and monitors must not be changed by
+    other threads.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    cycles: number of cycles to simulate.
+    on_chunk: called with the number of cycles completed and a dictionary of
+              {(device_id, output_id): array of the new signal levels}.
+    on_done: called with the number of cycles completed and the outcome,
+             one of DONE, CANCELLED or OSCILLATING.
+    post: function called with a callback and its arguments to run it.
+          Defaults to calling the callback in the worker thread.
+    chunk_time: target duration of each chunk in seconds.
+
+    Public methods
+    --------------
+    run(self): Runs the simulation. Called by start().
+
+    cancel(self): Stops the simulation after the current chunk.
+
+    is_cancelled(self): Returns True if the simulation has been cancelled.
+
+    record_signals(self): Counts a cycle recorded by the monitors.
+
+    repeat_signals(self, period, repeats): Counts the cycles replayed by the
+                                           monitors.
+    """
+
+    # Outcomes of a simulation
+    [DONE, CANCELLED, OSCILLATING] = range(3)
+
+    FIRST_CHUNK_CYCLES = 16
+
+    def __init__(self, network, monitors, cycles, on_chunk, on_done,
+                 post=None, chunk_time=0.1):
+        """Initialise the thread and the simulation settings."""
+        super().__init__(daemon=True)
+        self.network = network
+        self.monitors = monitors
+        self.cycles = cycles
+        self.on_chunk = on_chunk
+        self.on_done = on_done
+        self.post = post if post is not None else self.call
+        self.chunk_time = chunk_time
+        self.cancel_event = threading.Event()
+        self.recorded_cycles = 0  # cycles recorded by the monitors
+
+    def call(self, callback, *args):
+        """Call the callback with the arguments."""
+        callback(*args)
+
+    def cancel(self):
+        """Stop the simulation after the current chunk."""
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        """Return True if the simulation has been cancelled."""
+        return self.cancel_event.is_set()
+
+    def record_signals(self):
+        """Count a cycle recorded by the monitors."""
+        self.recorded_cycles += 1
+
+    def repeat_signals(self, period, repeats):
+        """Count the cycles replayed by the monitors."""
+        self.recorded_cycles += period * repeats
+
+    def run(self):
+        """Run the simulation in chunks until done, cancelled or oscillating.
+
+        Called in the new thread by start().
+        """
+        cycles_completed = 0
+        chunk_cycles = self.FIRST_CHUNK_CYCLES
+        outcome = self.DONE
+        self.monitors.add_signal_listener(self)
+        while cycles_completed < self.cycles:
+            if self.is_cancelled():
+                outcome = self.CANCELLED
+                break
+            chunk_cycles = min(chunk_cycles, self.cycles - cycles_completed)
+            start_time = time.perf_counter()
+            self.recorded_cycles = 0
+            steady = self.network.execute_cycles(chunk_cycles, self.monitors)
+            chunk_duration = time.perf_counter() - start_time
+            # Fewer cycles are recorded if the network oscillates
+            new_cycles = self.recorded_cycles
+            if new_cycles:
+                cycles_completed += new_cycles
+                chunk = {}
+                for monitor, signal_list in (
+                        self.monitors.monitors_dictionary.items()):
+                    chunk[monitor] = signal_list[-new_cycles:]
+                self.post(self.on_chunk, cycles_completed, chunk)
+            if not steady:
+                outcome = self.OSCILLATING
+                break
+
+            # Aim for chunks of chunk_time seconds, changing the size by at
+            # most a factor of 4
+            scale = self.chunk_time / max(chunk_duration, 1e-6)
+            chunk_cycles = max(1, int(chunk_cycles * min(max(scale, 0.25),
+                                                         4)))
+        self.monitors.remove_signal_listener(self)
+        self.post(self.on_done, cycles_completed, outcome)
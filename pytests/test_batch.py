@@ -0,0 +1,88 @@
+"""Test the batch module and the batch mode of logsim.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+from batch import BatchRunner
+from logsim import main
+from test_cache import parse_netlist
+
+
+DEFINITION_FILE = str(Path.cwd() / "definition_files" /
+                      "demonstration_files" / "mixed_register.txt")
+
+
+@pytest.fixture
+def batch_runner():
+    """Return a BatchRunner instance for a demonstration file."""
+    return BatchRunner(*parse_netlist(DEFINITION_FILE))
+
+
+def test_set_switches(batch_runner):
+    """Test if set_switches only accepts valid switch settings."""
+    devices = batch_runner.devices
+    [SW1_ID] = batch_runner.names.lookup(["SW1"])
+    assert batch_runner.set_switches(["SW1=1"])
+    assert devices.get_device(SW1_ID).switch_state == devices.HIGH
+    assert batch_runner.set_switches(["SW1=0"])
+    assert devices.get_device(SW1_ID).switch_state == devices.LOW
+    assert not batch_runner.set_switches(["SW1=2"])
+    assert not batch_runner.set_switches(["SW1"])
+    assert not batch_runner.set_switches(["D1=1"])
+    assert not batch_runner.set_switches(["Missing=1"])
+
+
+def test_run(tmp_path, batch_runner):
+    """Test if run writes the same traces for the same seed."""
+    output_path = str(tmp_path / "traces.txt")
+    assert batch_runner.run(50, output_path, seed=1) == batch_runner.NO_ERROR
+    with open(output_path) as file:
+        lines = file.read().splitlines()
+    assert [line.split()[0] for line in lines] == ["RC1", "D1.Q", "D1.QBAR"]
+    assert all(len(line.split()[1]) == 50 for line in lines)
+
+    assert batch_runner.run(50, output_path, seed=1) == batch_runner.NO_ERROR
+    with open(output_path) as file:
+        assert file.read().splitlines() == lines
+
+    assert batch_runner.run(50, str(tmp_path / "missing" / "traces.txt")) == (
+        batch_runner.OUTPUT_ERROR)
+
+
+def test_batch_mode(tmp_path, capsys):
+    """Test if logsim.py runs headless batch simulations."""
+    output_path = str(tmp_path / "traces.vcd")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-n", "-b", DEFINITION_FILE, "-r", "20", "-s", "SW1=1",
+              "-o", output_path])
+    assert exit_info.value.code == BatchRunner.NO_ERROR
+    with open(output_path) as file:
+        assert "$var wire 1" in file.read()
+    # The graphical user interface is not loaded
+    assert "wx" not in sys.modules
+    assert "gui" not in sys.modules
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-n", "-b", DEFINITION_FILE, "-r", "5"])
+    assert exit_info.value.code == BatchRunner.NO_ERROR
+    assert capsys.readouterr().out.splitlines()[0].startswith("RC1 ")
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-n", "-b", DEFINITION_FILE, "-s", "SW9=1"])
+    assert exit_info.value.code == BatchRunner.SWITCH_ERROR
+
+
+@pytest.mark.parametrize("path", [
+    str(Path.cwd() / "definition_files" / "syntax_error_files" /
+        "missing_colon.txt"),
+    str(Path.cwd() / "definition_files" / "missing.txt")])
+def test_batch_mode_definition_error(path, capsys):
+    """Test if batch mode exits with a definition error for a file with
+    errors or a file that cannot be read."""
+    for use_cache in [[], ["-n"]]:
+        with pytest.raises(SystemExit) as exit_info:
+            main(use_cache + ["-b", path, "-r", "5"])
+        assert exit_info.value.code == BatchRunner.DEFINITION_ERROR
+        # Only the signal traces go to the standard output
+        assert capsys.readouterr().out == ""
@@ -0,0 +1,198 @@
+"""Test the bitparallel module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from bitparallel import BitParallelSimulator
+from test_network import (make_test_circuit, run_test_circuit,
+                          make_random_circuit, run_random_circuit)
+
+
+@pytest.fixture
+def new_monitors():
+    """Return a new instance of the Monitors class."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    return Monitors(new_names, new_devices, new_network)
+
+
+@pytest.mark.parametrize("circuit", ["sr_bistable", "mixed_register",
+                                     "gated_counter"])
+def test_lanes_match_levelized(circuit):
+    """Test if every lane gives the signals of the levelized engine for its
+    cold start-up seed."""
+    network, monitored, switches = make_test_circuit(circuit, 2, 0)
+    monitors = Monitors(network.names, network.devices, network)
+    for device_id, output_id in monitored:
+        monitors.make_monitor(device_id, output_id)
+    seeds = list(range(8))
+    simulator = BitParallelSimulator(network.names, network.devices, network,
+                                     monitors, lanes=len(seeds))
+    simulator.cold_startup(seeds)
+
+    steady_trace = []
+    for cycle in range(40):
+        # Toggle the switches in all lanes as run_test_circuit does
+        if cycle % 7 == 6:
+            switch_id = switches[(cycle // 7) % len(switches)]
+            switch_state = simulator.get_output_signal(switch_id, None, 0)
+            assert simulator.set_switch(
+                switch_id, network.invert_signal(switch_state))
+        simulator.execute_network()
+        simulator.record_signals()
+        steady_trace.append(simulator.steady_lanes)
+
+    for lane, seed in enumerate(seeds):
+        reference_network, monitored, switches = make_test_circuit(circuit,
+                                                                   2, 0)
+        random.seed(seed)
+        reference_network.devices.cold_startup()
+        traces = run_test_circuit(reference_network, monitored, switches, 40)
+        lane_dictionary = simulator.get_monitors_dictionary(lane)
+        for cycle, (steady, signals) in enumerate(traces):
+            assert steady == bool(steady_trace[cycle] >> lane & 1)
+            if steady:
+                assert [lane_dictionary[monitor][cycle]
+                        for monitor in monitored] == signals
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_circuits_match_sweep(seed):
+    """Test if a lane gives the signals of the sweep on a random network
+    with feedback."""
+    network, switches = make_random_circuit(seed, 0)
+    devices = network.devices
+    monitors = Monitors(network.names, devices, network)
+    simulator = BitParallelSimulator(network.names, devices, network,
+                                     monitors, lanes=1)
+    sweep_traces = run_random_circuit(network, switches, 40)
+
+    traces = []
+    for cycle in range(len(sweep_traces)):
+        # Toggle the switches as run_random_circuit does
+        if cycle % 5 == 4:
+            switch_id = switches[(cycle // 5) % len(switches)]
+            switch_state = simulator.get_output_signal(switch_id, None, 0)
+            simulator.set_switch(switch_id,
+                                 network.invert_signal(switch_state))
+        if not simulator.execute_network():
+            traces.append(None)
+            break
+        traces.append([simulator.get_output_signal(device.device_id,
+                                                   output_id, 0)
+                       for device in devices.devices_list
+                       for output_id in device.outputs])
+    assert traces == sweep_traces
+
+
+def test_switch_patterns(new_monitors):
+    """Test if switch patterns sweep all the switch combinations."""
+    monitors = new_monitors
+    devices = monitors.devices
+    network = monitors.network
+    names = devices.names
+    [SW1, SW2, SW3, G1, X1, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "Sw3", "G1", "X1", "I1", "I2"])
+    for switch_id in [SW1, SW2, SW3]:
+        devices.make_device(switch_id, devices.SWITCH, 0)
+    devices.make_device(G1, devices.NOR, 2)
+    devices.make_device(X1, devices.XOR)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(SW2, None, G1, I2)
+    network.make_connection(G1, None, X1, I1)
+    network.make_connection(SW3, None, X1, I2)
+    monitors.make_monitor(X1, None)
+
+    simulator = BitParallelSimulator(devices.names, devices, network,
+                                     monitors, lanes=8)
+    assert not simulator.set_switch_patterns([SW1, G1])
+    assert simulator.set_switch_patterns([SW1, SW2, SW3])
+    assert simulator.execute_network()
+    simulator.record_signals()
+    for lane in range(8):
+        [a, b, c] = [lane & 1, lane >> 1 & 1, lane >> 2 & 1]
+        expected = int(not (a or b)) ^ c
+        assert simulator.get_output_signal(X1, None, lane) == [
+            devices.LOW, devices.HIGH][expected]
+        assert simulator.get_monitors_dictionary(lane) == {
+            (X1, None): [[devices.LOW, devices.HIGH][expected]]}
+
+
+def test_oscillating_lanes(new_monitors):
+    """Test if lanes that oscillate are reported without stopping the
+    other lanes."""
+    monitors = new_monitors
+    devices = monitors.devices
+    network = monitors.network
+    names = devices.names
+    [SW1, G1, I1, I2] = names.lookup(["Sw1", "G1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(G1, devices.NAND, 2)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(G1, None, G1, I2)
+    monitors.make_monitor(G1, None)
+
+    simulator = BitParallelSimulator(devices.names, devices, network,
+                                     monitors, lanes=4)
+    assert simulator.set_switch(SW1, devices.HIGH, lane=2)
+    assert not simulator.set_switch(SW1, devices.HIGH, lane=4)
+    assert not simulator.execute_network()
+    simulator.record_signals()
+    assert simulator.steady_lanes == 0b1011
+    assert simulator.get_monitors_dictionary(2) == {
+        (G1, None): [devices.BLANK]}
+    assert simulator.get_monitors_dictionary(0) == {
+        (G1, None): [devices.HIGH]}
+
+    simulator.reset_monitors()
+    assert simulator.get_monitors_dictionary(0) == {}
+
+
+def test_stuck_faults(new_monitors):
+    """Test if stuck outputs keep their level in the faulty lanes only."""
+    monitors = new_monitors
+    devices = monitors.devices
+    network = monitors.network
+    names = devices.names
+    [SW1, SW2, G1, G2, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "G1", "G2", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(SW2, devices.SWITCH, 1)
+    devices.make_device(G1, devices.AND, 2)
+    devices.make_device(G2, devices.NAND, 1)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(SW2, None, G1, I2)
+    network.make_connection(G1, None, G2, I1)
+
+    simulator = BitParallelSimulator(devices.names, devices, network,
+                                     monitors, lanes=4)
+    assert not simulator.set_stuck_faults([(G1, devices.Q_ID,
+                                            devices.LOW, 0b10)])
+    assert not simulator.set_stuck_faults([(G1, None, devices.RISING,
+                                            0b10)])
+    assert simulator.set_stuck_faults([(SW2, None, devices.LOW, 0b10),
+                                       (G1, None, devices.HIGH, 0b100),
+                                       (G2, None, devices.HIGH, 0b1000)])
+    assert simulator.execute_network()
+    assert [simulator.get_output_signal(G1, None, lane)
+            for lane in range(4)] == [devices.HIGH, devices.LOW,
+                                      devices.HIGH, devices.HIGH]
+    assert [simulator.get_output_signal(G2, None, lane)
+            for lane in range(4)] == [devices.LOW, devices.HIGH,
+                                      devices.LOW, devices.HIGH]
+
+    # The faults stay through switch changes and are replaced by new ones
+    assert simulator.set_switch(SW1, devices.LOW)
+    assert simulator.execute_network()
+    assert [simulator.get_output_signal(G1, None, lane)
+            for lane in range(4)] == [devices.LOW, devices.LOW,
+                                      devices.HIGH, devices.LOW]
+    assert simulator.set_stuck_faults([])
+    assert simulator.execute_network()
+    assert [simulator.get_output_signal(G2, None, lane)
+            for lane in range(4)] == [devices.HIGH] * 4
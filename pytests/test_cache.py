@@ -0,0 +1,152 @@
+"""Test the cache module."""
+import concurrent.futures
+import io
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+import cache
+from cache import NetlistCache
+
+
+def parse_netlist(path):
+    """Parse the definition file and return the netlist."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names, buffered=True)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    return [names, devices, network, monitors]
+
+
+@pytest.fixture
+def definition_file(tmp_path):
+    """Return a copy of a demonstration file that the test can edit."""
+    path = tmp_path / "circuit.txt"
+    shutil.copy(Path.cwd() / "definition_files" / "demonstration_files"
+                / "mixed_register.txt", path)
+    return path
+
+
+def test_cache_round_trip(tmp_path, definition_file):
+    """Test if a stored netlist is loaded back with the same contents."""
+    netlist_cache = NetlistCache(tmp_path / "cache")
+    assert netlist_cache.load(definition_file) is None
+
+    [names, devices, network, monitors] = parse_netlist(definition_file)
+    assert netlist_cache.store(definition_file, names, devices, network,
+                               monitors)
+    [cached_names, cached_devices, cached_network,
+     cached_monitors] = netlist_cache.load(definition_file)
+
+    assert cached_names.names_list == names.names_list
+    assert cached_devices.find_devices() == devices.find_devices()
+    for device_id in devices.find_devices():
+        device = devices.get_device(device_id)
+        cached_device = cached_devices.get_device(device_id)
+        assert cached_device.inputs == device.inputs
+        assert cached_device.outputs == device.outputs
+    assert (list(cached_monitors.monitors_dictionary) ==
+            list(monitors.monitors_dictionary))
+    # The loaded objects refer to each other, not to the originals
+    assert cached_network.devices is cached_devices
+    assert cached_monitors.network is cached_network
+    assert cached_network.execute_network()
+
+
+def test_cache_invalidation(tmp_path, definition_file):
+    """Test if changing the file or the simulator invalidates the entry."""
+    netlist_cache = NetlistCache(tmp_path / "cache")
+    netlist_cache.store(definition_file, *parse_netlist(definition_file))
+    assert netlist_cache.load(definition_file) is not None
+
+    # A different simulator version
+    netlist_cache.version = "0" * 64
+    assert netlist_cache.load(definition_file) is None
+
+    netlist_cache = NetlistCache(tmp_path / "cache")
+    with open(definition_file, "a") as file:
+        file.write("\n")
+    assert netlist_cache.load(definition_file) is None
+
+    # A corrupt entry is ignored
+    with open(netlist_cache.get_entry_path(definition_file), "wb") as file:
+        file.write(b"not a pickle")
+    assert netlist_cache.load(definition_file) is None
+
+    # So is an entry that raises any other error when unpickled
+    with open(netlist_cache.get_entry_path(definition_file), "wb") as file:
+        pickle.dump(Unloadable(), file)
+    assert netlist_cache.load(definition_file) is None
+
+
+class Unloadable:
+
+    """Raise TypeError when unpickled."""
+
+    def __reduce__(self):
+        """Unpickle by calling int with an invalid argument."""
+        return (int, ([],))
+
+
+def test_concurrent_stores(tmp_path, definition_file):
+    """Test if concurrent stores each write their own temporary file and
+    leave one complete entry."""
+    netlist_cache = NetlistCache(tmp_path / "cache")
+    netlist = parse_netlist(definition_file)
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        stored = list(executor.map(
+            lambda _: netlist_cache.store(definition_file, *netlist),
+            range(8)))
+    assert all(stored)
+    assert os.listdir(tmp_path / "cache") == [
+        os.path.basename(netlist_cache.get_entry_path(definition_file))]
+    assert netlist_cache.load(definition_file) is not None
+
+
+def test_version_covers_pickled_modules(definition_file):
+    """Test if the source of every simulator module with objects in an
+    entry is part of the simulator version."""
+    modules = set()
+
+    class ModulePickler(pickle.Pickler):
+
+        """Record the module of the class of every pickled object."""
+
+        def persistent_id(self, obj):
+            """Record the module of the object and pickle it as usual."""
+            modules.add(type(obj).__module__)
+            return None
+
+    ModulePickler(io.BytesIO()).dump(parse_netlist(definition_file))
+    source_directory = Path(cache.__file__).parent
+    simulator_modules = {module for module in modules
+                         if (source_directory / (module + ".py")).exists()}
+    assert "scheduler" in simulator_modules
+    assert simulator_modules <= {Path(file_name).stem for file_name
+                                 in NetlistCache.SOURCE_FILES}
+
+
+def test_scheduler_change_invalidates(tmp_path, monkeypatch):
+    """Test if changing the scheduler changes the simulator version."""
+    source_directory = tmp_path / "source"
+    source_directory.mkdir()
+    for file_name in NetlistCache.SOURCE_FILES:
+        shutil.copy(Path(cache.__file__).parent / file_name,
+                    source_directory)
+    monkeypatch.setattr(cache, "__file__", str(source_directory / "cache.py"))
+    version = NetlistCache(tmp_path / "cache").version
+    with open(source_directory / "scheduler.py", "a") as file:
+        file.write("\n")
+    assert NetlistCache(tmp_path / "cache").version != version
@@ -0,0 +1,143 @@
+"""Test the codegen module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from codegen import GeneratedKernel
+from test_network import make_test_circuit, run_test_circuit
+
+
+@pytest.fixture
+def new_network():
+    """Return a new instance of the Network class."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    return Network(new_names, new_devices)
+
+
+@pytest.mark.parametrize("circuit", ["sr_bistable", "mixed_register",
+                                     "gated_counter"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_generated_matches_sweep(circuit, seed):
+    """Test if the generated kernel gives the same signals as the sweep,
+    including after cold start-up."""
+    sweep_network, monitored, switches = make_test_circuit(circuit, 0, seed)
+    generated_network, monitored, switches = make_test_circuit(circuit, 4,
+                                                               seed)
+    assert generated_network.simulation_mode == generated_network.GENERATED
+
+    assert (run_test_circuit(generated_network, monitored, switches, 40) ==
+            run_test_circuit(sweep_network, monitored, switches, 40))
+    assert generated_network.generated_kernel is not None
+
+    random.seed(seed)
+    sweep_network.devices.cold_startup()
+    random.seed(seed)
+    generated_network.devices.cold_startup()
+    assert (run_test_circuit(generated_network, monitored, switches, 20) ==
+            run_test_circuit(sweep_network, monitored, switches, 20))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_generated_random_networks(seed):
+    """Test if the generated kernel gives the same signals as the sweep on
+    random networks with feedback."""
+    traces = []
+    for mode in [0, 4]:
+        rng = random.Random(seed)
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        outputs = []
+        for index in range(2):
+            [switch_id] = names.lookup(["Sw" + str(index)])
+            devices.make_device(switch_id, devices.SWITCH, rng.randint(0, 1))
+            outputs.append((switch_id, None))
+        [CL1, RC1, SG1] = names.lookup(["Clock1", "Rc1", "Siggen1"])
+        devices.make_device(CL1, devices.CLOCK, rng.randint(1, 3))
+        devices.make_device(RC1, devices.RC, rng.randint(1, 4))
+        devices.make_device(SG1, devices.SIGGEN, "0110")
+        outputs.extend([(CL1, None), (RC1, None), (SG1, None)])
+        for index in range(8):
+            [gate_id] = names.lookup(["G" + str(index)])
+            gate_kind = rng.choice(devices.gate_types)
+            devices.make_device(gate_id, gate_kind, None
+                                if gate_kind == devices.XOR
+                                else rng.randint(1, 3))
+            outputs.append((gate_id, None))
+        [D1] = names.lookup(["D1"])
+        devices.make_device(D1, devices.D_TYPE)
+        outputs.extend([(D1, devices.Q_ID), (D1, devices.QBAR_ID)])
+        for device in devices.devices_list:
+            for input_id in device.inputs:
+                assert network.make_connection(
+                    device.device_id, input_id,
+                    *rng.choice(outputs)) == network.NO_ERROR
+        network.set_simulation_mode(mode)
+        random.seed(seed)
+        devices.cold_startup()
+        traces.append(run_test_circuit(network, outputs,
+                                       [outputs[0][0], outputs[1][0]], 30))
+    assert traces[1] == traces[0]
+
+
+def test_generated_kernel_source(new_network):
+    """Test if the kernel holds the signals in local variables and stores
+    them back into the devices."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    [SW1, G1, I1] = names.lookup(["Sw1", "G1", "I1"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(G1, devices.NAND, 1)
+    network.make_connection(SW1, None, G1, I1)
+
+    network.build_fanout()
+    kernel = GeneratedKernel(devices, network)
+    assert "def execute_cycle(iteration_limit):" in kernel.source
+    assert "get_device" not in kernel.source
+    assert kernel.output_slots == {(SW1, None): 0, (G1, None): 1}
+
+    assert kernel.execute_cycle(network.iteration_limit)
+    assert devices.get_device(SW1).outputs[None] == devices.HIGH
+    assert devices.get_device(G1).outputs[None] == devices.LOW
+
+    # Invalid signals are left to the sweep
+    devices.get_device(G1).outputs[None] = devices.BLANK
+    assert kernel.execute_cycle(network.iteration_limit) is None
+    assert devices.get_device(SW1).outputs[None] == devices.HIGH
+
+
+def test_generated_network_changes(new_network):
+    """Test if the kernel is generated again after the network changes, and
+    the sweep is used while the network is incomplete."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    [SW1, G1, G2, I1, I2] = names.lookup(["Sw1", "G1", "G2", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(G1, devices.AND, 2)
+    network.make_connection(SW1, None, G1, I1)
+    network.set_simulation_mode(network.GENERATED)
+
+    assert not network.execute_network()
+    assert network.generated_kernel is None
+
+    network.make_connection(SW1, None, G1, I2)
+    assert network.execute_network()
+    assert network.generated_kernel is not None
+    assert network.get_output_signal(G1, None) == devices.HIGH
+
+    devices.make_device(G2, devices.NOR, 1)
+    network.make_connection(G1, None, G2, I1)
+    assert network.execute_network()
+    assert network.get_output_signal(G2, None) == devices.LOW
+
+    # An oscillating network
+    [NOR1] = names.lookup(["Nor1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    assert not network.execute_network()
@@ -0,0 +1,122 @@
+"""Test the compact module."""
+import random
+
+import numpy as np
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from compact import CompactNetwork
+
+
+def test_compact_network_arrays():
+    """Test if the compact network stores signals and connections as
+    index arrays."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1, SW2, G1, G2, I1, I2, I3] = names.lookup(
+        ["Sw1", "Sw2", "G1", "G2", "I1", "I2", "I3"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(G1, devices.NAND, 2)
+    devices.make_device(G2, devices.NAND, 3)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(SW2, None, G1, I2)
+    network.make_connection(SW1, None, G2, I1)
+    network.make_connection(SW1, None, G2, I2)
+    network.make_connection(SW2, None, G2, I3)
+    network.build_fanout()
+    network.levelize()
+
+    compact_network = CompactNetwork(devices, network)
+    slots = compact_network.output_slots
+    assert compact_network.signals.dtype == np.int8
+    assert sorted(slots.values()) == list(range(4))
+    assert compact_network.get_output_signal(SW1, None) == devices.LOW
+    assert compact_network.get_output_signal(SW1, devices.Q_ID) is None
+
+    # Both NANDs are in one group, with G1 padded by the constant HIGH slot,
+    # and there are no sequential gates
+    [sequential_groups, groups] = compact_network.levels
+    [(output_slots, input_slots, x, y)] = groups
+    assert sequential_groups == []
+    rows = dict(zip(output_slots.tolist(), input_slots.tolist()))
+    assert rows == {
+        slots[(G1, None)]: [slots[(SW1, None)], slots[(SW2, None)],
+                            compact_network.high_slot],
+        slots[(G2, None)]: [slots[(SW1, None)], slots[(SW1, None)],
+                            slots[(SW2, None)]]}
+    assert (x, y) == (devices.HIGH, devices.LOW)
+
+    compact_network.steady_state = True
+    assert compact_network.execute_iteration()
+    assert not compact_network.steady_state
+    assert compact_network.get_output_signal(SW1, None) == devices.RISING
+    assert compact_network.get_output_signal(G1, None) == devices.RISING
+    assert compact_network.get_output_signal(G2, None) == devices.RISING
+    assert compact_network.execute_iteration()
+    assert compact_network.get_output_signal(G1, None) == devices.HIGH
+
+    # The devices are only updated by store_state
+    assert devices.get_device(G1).outputs[None] == devices.LOW
+    compact_network.store_state()
+    assert devices.get_device(G1).outputs[None] == devices.HIGH
+
+
+def make_d_type_chain(mode, seed):
+    """Return a network of chained D-types and the outputs of the D-types.
+
+    D1 is clocked by D4, which comes after it, and D2 and D3 by the D-type
+    before them, as in a ripple counter. The random seed fixes the start-up
+    state.
+    """
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_simulation_mode(mode)
+    [CLK1, SW1, D1, D2, D3, D4] = names.lookup(
+        ["Clk1", "Sw1", "D1", "D2", "D3", "D4"])
+    devices.make_device(CLK1, devices.CLOCK, 1)
+    devices.make_device(SW1, devices.SWITCH, 0)
+    d_type_ids = [D1, D2, D3, D4]
+    for d_type_id in d_type_ids:
+        devices.make_device(d_type_id, devices.D_TYPE)
+    connections = [(D4, devices.Q_ID, D1, devices.CLK_ID),
+                   (D1, devices.QBAR_ID, D1, devices.DATA_ID),
+                   (D1, devices.QBAR_ID, D2, devices.CLK_ID),
+                   (D2, devices.QBAR_ID, D2, devices.DATA_ID),
+                   (D2, devices.Q_ID, D3, devices.CLK_ID),
+                   (D1, devices.Q_ID, D3, devices.DATA_ID),
+                   (CLK1, None, D4, devices.CLK_ID),
+                   (D4, devices.QBAR_ID, D4, devices.DATA_ID)]
+    for d_type_id in d_type_ids:
+        connections.append((SW1, None, d_type_id, devices.SET_ID))
+        connections.append((SW1, None, d_type_id, devices.CLEAR_ID))
+    for connection in connections:
+        assert network.make_connection(*connection) == network.NO_ERROR
+    assert network.check_network()
+    return network, [(d_type_id, output_id) for d_type_id in d_type_ids
+                     for output_id in devices.dtype_output_ids]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_d_type_chain(seed):
+    """Test if chained D-types are executed in waves that give the signals
+    of executing them one after the other."""
+    sweep_network, outputs = make_d_type_chain(0, seed)
+    compact_network, outputs = make_d_type_chain(3, seed)
+    # D1 and D4 read the old outputs of the D-types after them, and D2 and
+    # D3 the new outputs of the D-types before them
+    assert [wave.tolist() for wave
+            in compact_network.compact_network.dtype_waves] == [[0, 3], [1],
+                                                                [2]]
+    for cycle in range(40):
+        assert sweep_network.execute_network()
+        assert compact_network.execute_network()
+        assert ([compact_network.get_output_signal(*output)
+                 for output in outputs] ==
+                [sweep_network.get_output_signal(*output)
+                 for output in outputs])
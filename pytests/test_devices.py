@@ -1,4 +1,6 @@
 """Test the devices module."""
+import random
+
 import pytest
 
 from names import Names
@@ -52,6 +54,61 @@ def test_find_devices(devices_with_items):
     assert devices.find_devices(devices.XOR) == []
 
 
+def test_device_indexes(new_devices):
+    """Test if the device indexes stay consistent with the devices list."""
+    devices = new_devices
+    names = devices.names
+    [AND1_ID, AND2_ID, CL_ID, D_ID] = names.lookup(["And1", "And2",
+                                                    "Clock1", "D1"])
+
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(CL_ID, devices.CLOCK, 3)
+    devices.make_device(D_ID, devices.D_TYPE)
+    devices.make_device(AND2_ID, devices.AND, 2)
+
+    assert devices.find_devices() == [device.device_id
+                                      for device in devices.devices_list]
+    assert devices.find_devices(devices.AND) == [AND1_ID, AND2_ID]
+    for device in devices.devices_list:
+        assert devices.get_device(device.device_id) is device
+
+    # Cold start-up changes device states but not the indexes
+    devices.cold_startup()
+    assert not devices.run_once
+    assert devices.find_devices(devices.CLOCK) == [CL_ID]
+    assert devices.get_device(CL_ID).clock_counter in range(3)
+    assert devices.get_device(D_ID).dtype_memory in [devices.LOW,
+                                                     devices.HIGH]
+
+
+def test_cold_startup_order(new_devices):
+    """Test if cold start-up draws the random states in the order of the
+    devices list."""
+    devices = new_devices
+    [D1_ID, CL1_ID, D2_ID, CL2_ID] = devices.names.lookup(
+        ["D1", "Clock1", "D2", "Clock2"])
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(CL1_ID, devices.CLOCK, 7)
+    devices.make_device(D2_ID, devices.D_TYPE)
+    devices.make_device(CL2_ID, devices.CLOCK, 9)
+
+    for seed in range(5):
+        random.seed(seed)
+        devices.cold_startup()
+        generator = random.Random(seed)
+        expected = []
+        for half_period in [None, 7, None, 9]:
+            expected.append(generator.choice([devices.LOW, devices.HIGH]))
+            if half_period is not None:
+                expected.append(generator.randrange(half_period))
+        [d1, clock1, d2, clock2] = [devices.get_device(device_id) for
+                                    device_id in [D1_ID, CL1_ID, D2_ID,
+                                                  CL2_ID]]
+        assert expected == [d1.dtype_memory, clock1.outputs[None],
+                            clock1.clock_counter, d2.dtype_memory,
+                            clock2.outputs[None], clock2.clock_counter]
+
+
 def test_make_device(new_devices):
     """Test if make_device correctly makes devices with their properties."""
     names = new_devices.names
@@ -148,3 +205,31 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_set_period(new_devices):
+    """Test if set_period changes clock and RC periods in their cycle."""
+    names = new_devices.names
+    [CL1_ID, RC1_ID, SW1_ID] = names.lookup(["Clock1", "Rc1", "Sw1"])
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 10)
+    new_devices.make_device(RC1_ID, new_devices.RC, 10)
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    clock = new_devices.get_device(CL1_ID)
+    rc = new_devices.get_device(RC1_ID)
+
+    clock.clock_counter = 3
+    assert new_devices.set_period(CL1_ID, 5)
+    assert clock.clock_half_period == 5
+    assert clock.clock_counter == 3
+    # A clock past its new half period switches on the next cycle
+    assert new_devices.set_period(CL1_ID, 2)
+    assert clock.clock_counter == 2
+
+    rc.clock_counter = 7
+    assert new_devices.set_period(RC1_ID, 4)
+    assert rc.rc_period == 4
+    assert rc.clock_counter == 4
+
+    assert not new_devices.set_period(CL1_ID, 0)
+    assert not new_devices.set_period(SW1_ID, 3)
+    assert not new_devices.set_period(names.query("Missing"), 3)
@@ -0,0 +1,211 @@
+"""Test the faults module."""
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from faults import FaultSimulator, simulate_fault_groups, main
+
+
+DEFINITION_DIRECTORY = Path.cwd() / "definition_files"
+
+
+def make_random_network(seed, fault=None):
+    """Make a random network of switches and gates with monitors.
+
+    With a fault (name, level), every connection from the named output is
+    made from a switch held at the level instead, and a monitor on the
+    output is moved to the switch. Return the monitors and the switch IDs.
+    """
+    rng = random.Random(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    switch_ids = names.lookup(["Sw" + str(index) for index in range(4)])
+    for switch_id in switch_ids:
+        devices.make_device(switch_id, devices.SWITCH, 0)
+    outputs = list(switch_ids)
+    for index in range(15):
+        [gate_id] = names.lookup(["G" + str(index)])
+        gate_kind = rng.choice(devices.gate_types)
+        devices.make_device(gate_id, gate_kind, None
+                            if gate_kind == devices.XOR
+                            else rng.randint(1, 3))
+        for input_id in devices.get_device(gate_id).inputs:
+            network.make_connection(gate_id, input_id, rng.choice(outputs),
+                                    None)
+        outputs.append(gate_id)
+    monitored = outputs[-4:]
+
+    if fault is not None:
+        [fault_name, level] = fault
+        [stuck_id, fault_id] = names.lookup(["Stuck", fault_name])
+        devices.make_device(stuck_id, devices.SWITCH, level)
+        for device in devices.devices_list:
+            for input_id, source in device.inputs.items():
+                if source == (fault_id, None):
+                    device.inputs[input_id] = (stuck_id, None)
+        monitored = [stuck_id if device_id == fault_id else device_id
+                     for device_id in monitored]
+    for device_id in monitored:
+        monitors.make_monitor(device_id, None)
+    return monitors, switch_ids
+
+
+def get_levels(network, monitors):
+    """Return the levels of the monitored outputs, 1 for HIGH or RISING."""
+    devices = network.devices
+    return [int(network.get_output_signal(*monitor) in [devices.HIGH,
+                                                       devices.RISING])
+            for monitor in monitors.monitors_dictionary]
+
+
+def get_vectors(switch_ids, cycles):
+    """Return switch settings that count through the switches, one step
+    every cycle."""
+    return [[(switch_id, (cycle >> bit) & 1)
+             for bit, switch_id in enumerate(switch_ids)]
+            for cycle in range(cycles)]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_faults_match_faulty_networks(seed):
+    """Test if each fault is detected on the cycle, and by the monitors, on
+    which a network with the faulty output replaced by a stuck switch
+    differs from the good network."""
+    monitors, switch_ids = make_random_network(seed)
+    simulator = FaultSimulator(monitors.names, monitors.devices,
+                               monitors.network, monitors, group_size=7)
+    vectors = get_vectors(switch_ids, 16)
+    results = simulator.run(16, vectors)
+    faults = simulator.get_faults()
+    assert [result["fault"] for result in results] == faults
+    assert len(faults) == 2 * (4 + 15)
+
+    good_levels = []
+    good_network = monitors.network
+    for vector in vectors:
+        for switch_id, switch_state in vector:
+            monitors.devices.set_switch(switch_id, switch_state)
+        assert good_network.execute_network()
+        good_levels.append(get_levels(good_network, monitors))
+
+    monitored = list(monitors.monitors_dictionary)
+    for (device_id, output_id, level), result in zip(faults, results):
+        fault_name = monitors.names.get_name_string(device_id)
+        faulty_monitors, switch_ids = make_random_network(
+            seed, (fault_name, level))
+        faulty_network = faulty_monitors.network
+        first_cycle = None
+        detected_by = set()
+        for cycle, vector in enumerate(vectors):
+            for switch_id, switch_state in vector:
+                faulty_monitors.devices.set_switch(switch_id, switch_state)
+            assert faulty_network.execute_network()
+            levels = get_levels(faulty_network, faulty_monitors)
+            for index, (good, faulty) in enumerate(zip(good_levels[cycle],
+                                                       levels)):
+                if good != faulty:
+                    detected_by.add(monitored[index])
+                    if first_cycle is None:
+                        first_cycle = cycle
+        assert result["first_cycle"] == first_cycle
+        assert set(result["detected_by"]) == detected_by
+        assert not result["oscillating"]
+
+
+def test_stuck_at_detection():
+    """Test if the faults of an AND gate are found by the vectors that
+    reach them."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1, SW2, A1, I1, I2] = names.lookup(["Sw1", "Sw2", "A1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(A1, devices.AND, 2)
+    network.make_connection(SW1, None, A1, I1)
+    network.make_connection(SW2, None, A1, I2)
+    monitors.make_monitor(A1, None)
+    simulator = FaultSimulator(names, devices, network, monitors)
+    faults = [(A1, None, devices.LOW), (A1, None, devices.HIGH),
+              (SW1, None, devices.LOW), (SW1, None, devices.HIGH)]
+
+    # With both switches LOW, only A1 stuck at HIGH shows
+    results = simulator.run(2, faults=faults)
+    assert [result["first_cycle"] for result in results] == [
+        None, 0, None, None]
+    # Setting both switches HIGH on the second cycle shows the LOW faults
+    results = simulator.run(3, [[], [(SW1, 1), (SW2, 1)]], faults=faults)
+    assert [result["first_cycle"] for result in results] == [1, 0, 1, None]
+    report = simulator.summarise(results)
+    assert report["faults"] == 4
+    assert report["detected"] == 3
+    assert report["coverage"] == 0.75
+    assert report["results"][2] == {"signal": "Sw1", "stuck_at": 0,
+                                    "first_cycle": 1, "detected_by": ["A1"],
+                                    "oscillating": False}
+
+
+def test_oscillating_faults():
+    """Test if faults that make the network oscillate are marked."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1, G1, I1, I2] = names.lookup(["Sw1", "G1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(G1, devices.NAND, 2)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(G1, None, G1, I2)
+    monitors.make_monitor(G1, None)
+    netlist = [names, devices, network, monitors]
+    # Lane 1 holds SW1 stuck at HIGH, so G1 oscillates
+    assert simulate_fault_groups(netlist, [[(SW1, None, devices.HIGH)]], 3,
+                                 [], 0)[0][2]
+    assert not simulate_fault_groups(netlist, [[(SW1, None, devices.LOW)]],
+                                     3, [], 0)[0][2]
+
+
+def test_pool_matches_serial():
+    """Test if the groups simulated in worker processes give the results of
+    a single process."""
+    monitors, switch_ids = make_random_network(7)
+    vectors = get_vectors(switch_ids, 10)
+    serial = FaultSimulator(monitors.names, monitors.devices,
+                            monitors.network, monitors, group_size=5,
+                            max_workers=1)
+    parallel = FaultSimulator(monitors.names, monitors.devices,
+                              monitors.network, monitors, group_size=5,
+                              max_workers=2)
+    assert parallel.run(10, vectors) == serial.run(10, vectors)
+
+
+def test_main(tmp_path, capsys):
+    """Test if the command line interface prints and writes the report."""
+    path = str(DEFINITION_DIRECTORY / "demonstration_files" /
+               "mixed_register.txt")
+    vector_path = tmp_path / "vectors.txt"
+    vector_path.write_text("SW1=1\nSW1=0\n")
+    report_path = tmp_path / "report.json"
+    main(["-r", "20", "-j", "1", "-g", "4", "-v", str(vector_path), "-o",
+          str(report_path), path])
+    report = json.loads(report_path.read_text())
+    assert capsys.readouterr().out == (
+        "{} of {} faults detected, coverage {}\n".format(
+            report["detected"], report["faults"], report["coverage"]))
+    assert 0 < report["detected"] <= report["faults"]
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-g", "x", path])
+    assert exit_info.value.code == 2
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-s", "SW9=1", path])
+    assert exit_info.value.code == 1
@@ -1,10 +1,12 @@
 """Test the monitors module."""
+import random
+
 import pytest
 
 from names import Names
 from network import Network
 from devices import Devices
-from monitors import Monitors
+from monitors import Monitors, SignalTrace, ChangeTrace
 
 
 @pytest.fixture
@@ -197,3 +199,228 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_signal_trace():
+    """Test if SignalTrace behaves like a list of signal levels."""
+    trace = SignalTrace([0, 1])
+    trace.append(2)
+    trace.extend([3, 4])
+    assert trace == [0, 1, 2, 3, 4]
+    assert len(trace) == 5
+    assert trace[1] == 1
+    assert trace[-1] == 4
+    assert list(trace[1:3]) == [1, 2]
+    assert list(trace) == [0, 1, 2, 3, 4]
+    assert trace.signals.itemsize == 1
+    with pytest.raises(IndexError):
+        trace[5]
+    with pytest.raises(ValueError):
+        SignalTrace(capacity=0)
+
+    # A ring buffer only keeps the last signals
+    ring = SignalTrace([0, 1, 0], capacity=4)
+    for signal in [1, 1, 0]:
+        ring.append(signal)
+    assert ring == [0, 1, 1, 0]
+    assert ring.discarded_signals == 2
+    assert (ring[0], ring[-1]) == (0, 0)
+    assert ring == SignalTrace([0, 1, 1, 0])
+    ring.extend([2, 3])
+    assert ring.tolist() == [1, 0, 2, 3]
+    ring.extend(range(10))
+    assert ring == [6, 7, 8, 9]
+    assert ring.discarded_signals == 14
+
+
+def test_trace_capacity(new_monitors):
+    """Test if monitors with a trace capacity keep the last cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, OR1_ID] = names.lookup(["Sw1", "Or1"])
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+
+    new_monitors.record_signals()
+    new_monitors.set_trace_capacity(3)
+    devices.set_switch(SW1_ID, HIGH)
+    for _ in range(4):
+        network.execute_network()
+        new_monitors.record_signals()
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [HIGH] * 3
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == [HIGH] * 3
+
+    new_monitors.reset_monitors()
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == []
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)].capacity == 3
+    new_monitors.remove_monitor(SW1_ID, None)
+    new_monitors.make_monitor(SW1_ID, None, 5)
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == (
+        [devices.BLANK] * 3)
+
+    # Fast-forwarded runs fill ring buffers with the latest cycles
+    devices.set_switch(SW1_ID, LOW)
+    assert network.execute_cycles(1000, new_monitors)
+    trace = new_monitors.monitors_dictionary[(OR1_ID, None)]
+    assert trace == [LOW] * 3
+    assert trace.discarded_signals == 997
+
+    new_monitors.set_trace_capacity(None)
+    assert network.execute_cycles(1000, new_monitors)
+    assert len(new_monitors.monitors_dictionary[(OR1_ID, None)]) == 1003
+
+
+def test_change_trace():
+    """Test if ChangeTrace only stores changes and behaves like a list."""
+    trace = ChangeTrace([0, 0, 1])
+    trace.extend([1, 1, 1, 0])
+    trace.append(0)
+    assert trace.get_changes() == [(0, 0), (2, 1), (6, 0)]
+    assert trace == [0, 0, 1, 1, 1, 1, 0, 0]
+    assert trace == SignalTrace([0, 0, 1, 1, 1, 1, 0, 0])
+    assert len(trace) == 8
+    assert [trace[cycle] for cycle in range(8)] == trace.tolist()
+    assert trace.get_signal(5) == 1
+    assert trace[-1] == 0
+    assert list(trace[1:4]) == [0, 1, 1]
+    assert list(trace) == trace.tolist()
+    with pytest.raises(IndexError):
+        trace[8]
+    assert ChangeTrace() == []
+
+    # Repeating a constant period only extends the trace
+    trace.repeat_signals(2, 1000)
+    assert len(trace) == 2008
+    assert trace.get_changes() == [(0, 0), (2, 1), (6, 0)]
+
+    # Repeating a changing period copies its changes
+    trace = ChangeTrace([1, 0, 0, 1, 0])
+    trace.repeat_signals(3, 2)
+    assert trace == [1, 0, 0, 1, 0, 0, 1, 0, 0, 1, 0]
+    assert trace.get_changes() == [(0, 1), (1, 0), (3, 1), (4, 0), (6, 1),
+                                   (7, 0), (9, 1), (10, 0)]
+
+
+def test_change_recording(new_monitors):
+    """Test if monitors recording changes give the same signals."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, OR1_ID] = names.lookup(["Sw1", "Or1"])
+    HIGH = devices.HIGH
+
+    new_monitors.record_signals()
+    new_monitors.set_change_recording(True)
+    trace = new_monitors.monitors_dictionary[(OR1_ID, None)]
+    assert isinstance(trace, ChangeTrace)
+    devices.set_switch(SW1_ID, HIGH)
+    assert network.execute_cycles(10000, new_monitors)
+    trace = new_monitors.monitors_dictionary[(OR1_ID, None)]
+    assert len(trace) == 10001
+    assert len(trace.get_changes()) == 2
+    assert trace[0] == devices.LOW
+    assert trace[10000] == HIGH
+
+    new_monitors.make_monitor(SW1_ID, None, 3)
+    new_monitors.remove_monitor(SW1_ID, None)
+    new_monitors.make_monitor(SW1_ID, None, 3)
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == (
+        [devices.BLANK] * 3)
+    new_monitors.reset_monitors()
+    assert isinstance(new_monitors.monitors_dictionary[(SW1_ID, None)],
+                      ChangeTrace)
+
+    new_monitors.set_change_recording(False)
+    assert isinstance(new_monitors.monitors_dictionary[(SW1_ID, None)],
+                      SignalTrace)
+
+
+def test_capture(new_monitors):
+    """Test if monitors made while capturing are filled in."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+
+    new_monitors.remove_monitor(OR1_ID, None)
+    network.set_pruning(True)
+    new_monitors.set_capture(True)
+    assert set(new_monitors.captured_signals) == {
+        (SW1_ID, None), (SW2_ID, None), (OR1_ID, None)}
+    # Unmonitored outputs must be executed
+    assert not network.pruning
+    for cycle in range(4):
+        devices.set_switch(SW2_ID, cycle % 2)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    # The new monitor is filled in, unlike one made without capturing
+    new_monitors.make_monitor(OR1_ID, None, 4)
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == [
+        LOW, HIGH, LOW, HIGH]
+    new_monitors.remove_monitor(OR1_ID, None)
+    new_monitors.make_monitor(OR1_ID, None, 6)
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == [
+        devices.BLANK] * 2 + [LOW, HIGH, LOW, HIGH]
+
+    # Captured signals follow fast-forwarded runs and resets
+    assert network.execute_cycles(100, new_monitors)
+    assert new_monitors.get_trace_length() == 104
+    new_monitors.reset_monitors()
+    assert new_monitors.get_trace_length() == 0
+    new_monitors.set_capture(False)
+    new_monitors.remove_monitor(SW2_ID, None)
+    new_monitors.make_monitor(SW2_ID, None, 4)
+    assert new_monitors.monitors_dictionary[(SW2_ID, None)] == [
+        devices.BLANK] * 4
+
+
+@pytest.mark.parametrize("capacity", [1, 3, 5, 8])
+def test_ring_matches_list(capacity):
+    """Test if a ring buffer keeps the last signals of the equivalent list
+    and counts the others as discarded."""
+    rng = random.Random(capacity)
+    ring = SignalTrace(capacity=capacity)
+    signals = []
+    for step in range(200):
+        if signals and rng.random() < 0.3:
+            period = rng.randint(1, min(len(ring), 4))
+            repeats = rng.randint(0, 6)
+            ring.repeat_signals(period, repeats)
+            signals.extend(signals[-period:] * repeats)
+        else:
+            new_signals = [rng.randint(0, 4)
+                           for _ in range(rng.randint(0, 2 * capacity))]
+            ring.extend(new_signals)
+            signals.extend(new_signals)
+        assert ring == signals[-capacity:]
+        assert ring.discarded_signals == len(signals) - len(ring)
+
+
+def test_ring_repeat_is_bounded():
+    """Test if repeating the signals of a ring buffer many times only builds
+    the signals it keeps."""
+    ring = SignalTrace([0, 1, 2], capacity=4)
+    ring.repeat_signals(3, 10 ** 12)
+    assert ring == [2, 0, 1, 2]
+    assert ring.discarded_signals == 3 * 10 ** 12 - 1
+    assert len(ring.signals) == 4
+
+
+@pytest.mark.parametrize("trace_class", [SignalTrace, ChangeTrace])
+def test_trace_slices(trace_class):
+    """Test if the slices of a trace match the slices of a list."""
+    signals = [0, 0, 1, 1, 1, 2, 0, 3, 3, 4, 4, 4]
+    if trace_class is SignalTrace:
+        trace = SignalTrace(capacity=7)  # wraps around the ring buffer
+    else:
+        trace = ChangeTrace()
+    trace.extend(signals)
+    kept = signals[-len(trace):]
+    for index in [slice(None), slice(2, 5), slice(-4, None), slice(3),
+                  slice(5, 2), slice(-20, 20), slice(None, None, 2),
+                  slice(None, None, -1)]:
+        assert list(trace[index]) == kept[index]
@@ -0,0 +1,110 @@
+"""Test the montecarlo module."""
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from montecarlo import (MonteCarloAnalysis, build_netlist,
+                        simulate_cold_starts, main)
+
+
+DEFINITION_DIRECTORY = Path.cwd() / "definition_files"
+DEFINITION_FILE = str(DEFINITION_DIRECTORY / "demonstration_files" /
+                      "mixed_register.txt")
+
+
+def test_simulate_cold_starts():
+    """Test if each run gives the signals of a simulation from the same
+    cold start-up."""
+    results = simulate_cold_starts(DEFINITION_FILE, 50, range(6))
+    assert [result["seed"] for result in results] == list(range(6))
+    for result in results:
+        [names, devices, network, monitors] = build_netlist(DEFINITION_FILE)
+        random.seed(result["seed"])
+        devices.cold_startup()
+        network.fast_forward = False
+        assert network.execute_cycles(50, monitors)
+        assert not result["oscillating"]
+        # The RC settles and the rest repeats every 6 cycles
+        assert result["period"] == 6
+        for monitor_result, signal_list in zip(
+                result["monitors"], monitors.monitors_dictionary.values()):
+            assert monitor_result["level"] == int(
+                signal_list[-1] in [devices.HIGH, devices.RISING])
+            settle_cycle = monitor_result["settle_cycle"]
+            assert settle_cycle <= result["settle_cycle"]
+            assert (signal_list[settle_cycle:-6] ==
+                    signal_list[settle_cycle + 6:])
+            if settle_cycle > 0:
+                assert signal_list[settle_cycle - 1] != (
+                    signal_list[settle_cycle + 5])
+    # The RC output ends LOW and only D1 depends on the start-up state
+    assert all(result["monitors"][0] == {"level": 0, "toggling": False,
+                                         "settle_cycle": 3}
+               for result in results)
+    assert len({result["monitors"][1]["toggling"]
+                for result in results}) == 2
+
+
+def test_simulate_cold_starts_errors(tmp_path):
+    """Test if invalid files, switches and oscillations are reported."""
+    path = str(DEFINITION_DIRECTORY / "syntax_error_files" /
+               "missing_colon.txt")
+    assert simulate_cold_starts(path, 10, [0]) is None
+    assert simulate_cold_starts(DEFINITION_FILE, 10, [0], ["SW9=1"]) is None
+
+    definition_file = tmp_path / "oscillating.txt"
+    definition_file.write_text("DEVICE: G1, NAND, 1;\n"
+                               "CONNECT: G1 = G1.I1;\n"
+                               "MONITOR: G1;\n")
+    [result] = simulate_cold_starts(str(definition_file), 10, [0])
+    assert result["oscillating"]
+    assert result["settle_cycle"] is None
+    assert result["monitors"] == [{"level": None, "toggling": None,
+                                   "settle_cycle": None}]
+
+
+def test_run_and_summarise():
+    """Test if the parallel runs match running the seeds in turn, and the
+    report counts every run."""
+    analysis = MonteCarloAnalysis(DEFINITION_FILE, cycles=40, runs=12,
+                                  first_seed=5, max_workers=2)
+    results = analysis.run()
+    assert results == simulate_cold_starts(DEFINITION_FILE, 40,
+                                           range(5, 17))
+
+    report = analysis.summarise(results)
+    assert report["runs"] == 12
+    assert report["oscillation_rate"] == 0
+    assert report["unsettled_runs"] == 0
+    assert report["period"]["counts"] == {"6": 12}
+    assert list(report["monitors"]) == ["RC1", "D1.Q", "D1.QBAR"]
+    assert report["monitors"]["RC1"]["levels"] == {"0": 12, "1": 0}
+    q_levels = report["monitors"]["D1.Q"]["levels"]
+    assert q_levels["0"] + q_levels["1"] == 12
+    assert report["monitors"]["D1.QBAR"]["levels"] == {
+        "0": q_levels["1"], "1": q_levels["0"]}
+
+    assert MonteCarloAnalysis(DEFINITION_FILE, runs=0).run() == []
+    assert MonteCarloAnalysis(str(DEFINITION_DIRECTORY / "missing"),
+                              runs=2, max_workers=1).run() is None
+
+
+def test_main(tmp_path, capsys):
+    """Test if the command line interface prints and writes the report."""
+    report_path = tmp_path / "report.json"
+    main(["-n", "8", "-r", "30", "-j", "2", "-s", "SW1=1", "-o",
+          str(report_path), DEFINITION_FILE])
+    assert capsys.readouterr().out.startswith(
+        "8 runs, oscillation rate 0.0\n")
+    report = json.loads(report_path.read_text())
+    # With SET held HIGH, the D-type always ends HIGH
+    assert report["monitors"]["D1.Q"]["levels"] == {"0": 0, "1": 8}
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-n", "x", DEFINITION_FILE])
+    assert exit_info.value.code == 2
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-n", "2", "-s", "SW9=1", DEFINITION_FILE])
+    assert exit_info.value.code == 1
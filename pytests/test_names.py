@@ -249,3 +249,17 @@ def test_get_name_string(used_names, new_names, name_id, expected_string):
     # new_names an instance of Names class and it has no stored
     # names in the name_string_list
     assert new_names.get_name_string(name_id) is None
+
+
+def test_intern_names(used_names):
+    """Checks that intern_names accepts any iterable and stays consistent
+    with names_list, query and lookup"""
+    name_ids = used_names.intern_names(
+        name for name in ["Bob", "Dave", "Eve", "Dave"])
+    assert name_ids == [1, 3, 4, 3]
+    assert used_names.names_list == ["Alice", "Bob", "Charlie", "Dave", "Eve"]
+    assert used_names.query("Eve") == 4
+    assert used_names.lookup(["Eve", "Frank"]) == [4, 5]
+    for name_id, name_string in enumerate(used_names.names_list):
+        assert used_names.query(name_string) == name_id
+        assert used_names.get_name_string(name_id) == name_string
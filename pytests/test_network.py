@@ -1,9 +1,12 @@
 """Test the network module."""
+import random
+
 import pytest
 
 from names import Names
 from devices import Devices
 from network import Network
+from monitors import Monitors
 
 
 @pytest.fixture
@@ -348,3 +351,524 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+
+
+def make_test_circuit(circuit, mode, seed):
+    """Return a network and its monitored outputs for the named circuit.
+
+    The random seed is fixed so that networks built with different simulation
+    modes start from the same cold start-up state.
+    """
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_simulation_mode(mode)
+
+    [I1, I2, I3] = names.lookup(["I1", "I2", "I3"])
+    if circuit == "sr_bistable":
+        [G1, G2, G3, G4, SET, RESET, CLK] = names.lookup(
+            ["G1", "G2", "G3", "G4", "SET", "RESET", "CLK"])
+        for gate_id in [G1, G2, G3, G4]:
+            devices.make_device(gate_id, devices.NAND, 2)
+        devices.make_device(SET, devices.SWITCH, 0)
+        devices.make_device(RESET, devices.SWITCH, 0)
+        devices.make_device(CLK, devices.CLOCK, 2)
+        connections = [(G4, None, G3, I2), (G1, None, G3, I1),
+                       (G2, None, G4, I2), (G3, None, G4, I1),
+                       (SET, None, G1, I1), (RESET, None, G2, I2),
+                       (CLK, None, G1, I2), (CLK, None, G2, I1)]
+        monitored = [(G3, None), (G4, None)]
+        switches = [SET, RESET]
+
+    elif circuit == "mixed_register":
+        [D1, RC1, SG1, SW1, CLK1] = names.lookup(
+            ["D1", "RC1", "SG1", "SW1", "CLK1"])
+        devices.make_device(D1, devices.D_TYPE)
+        devices.make_device(RC1, devices.RC, 3)
+        devices.make_device(SG1, devices.SIGGEN, "011101")
+        devices.make_device(SW1, devices.SWITCH, 0)
+        devices.make_device(CLK1, devices.CLOCK, 1)
+        connections = [(SW1, None, D1, devices.SET_ID),
+                       (SG1, None, D1, devices.DATA_ID),
+                       (CLK1, None, D1, devices.CLK_ID),
+                       (RC1, None, D1, devices.CLEAR_ID)]
+        monitored = [(RC1, None), (D1, devices.Q_ID), (D1, devices.QBAR_ID)]
+        switches = [SW1]
+
+    elif circuit == "gated_counter":
+        # A D-type clocked by a gate output, feeding back through a chain
+        [D1, D2, CLK1, SW1, SW2, A1, X1, N1] = names.lookup(
+            ["D1", "D2", "CLK1", "SW1", "SW2", "A1", "X1", "N1"])
+        devices.make_device(D1, devices.D_TYPE)
+        devices.make_device(D2, devices.D_TYPE)
+        devices.make_device(CLK1, devices.CLOCK, 1)
+        devices.make_device(SW1, devices.SWITCH, 1)
+        devices.make_device(SW2, devices.SWITCH, 0)
+        devices.make_device(A1, devices.AND, 2)
+        devices.make_device(X1, devices.XOR)
+        devices.make_device(N1, devices.NOR, 3)
+        connections = [(CLK1, None, A1, I1), (SW1, None, A1, I2),
+                       (A1, None, D1, devices.CLK_ID),
+                       (D1, devices.QBAR_ID, D1, devices.DATA_ID),
+                       (SW2, None, D1, devices.SET_ID),
+                       (SW2, None, D1, devices.CLEAR_ID),
+                       (D1, devices.Q_ID, X1, I1), (CLK1, None, X1, I2),
+                       (X1, None, D2, devices.CLK_ID),
+                       (D2, devices.QBAR_ID, D2, devices.DATA_ID),
+                       (SW2, None, D2, devices.SET_ID),
+                       (SW2, None, D2, devices.CLEAR_ID),
+                       (D1, devices.Q_ID, N1, I1), (D2, devices.Q_ID, N1, I2),
+                       (X1, None, N1, I3)]
+        monitored = [(D1, devices.Q_ID), (D2, devices.Q_ID), (X1, None),
+                     (N1, None)]
+        switches = [SW1, SW2]
+
+    for connection in connections:
+        assert network.make_connection(*connection) == network.NO_ERROR
+    return network, monitored, switches
+
+
+def run_test_circuit(network, monitored, switches, cycles):
+    """Run the network, toggling switches, and return the signal traces."""
+    devices = network.devices
+    traces = []
+    for cycle in range(cycles):
+        if cycle % 7 == 6:
+            switch_id = switches[(cycle // 7) % len(switches)]
+            switch = devices.get_device(switch_id)
+            devices.set_switch(switch_id,
+                               network.invert_signal(switch.switch_state))
+        steady = network.execute_network()
+        traces.append((steady, [network.get_output_signal(*output)
+                                for output in monitored]))
+    return traces
+
+
+def make_random_circuit(seed, mode):
+    """Return a random network with feedback and the switches in it.
+
+    Every input is connected to a random output, so gates and D-types form
+    loops and D-types can be clocked by gates or other D-types.
+    """
+    rng = random.Random(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_simulation_mode(mode)
+    switches = names.lookup(["Sw" + str(index)
+                             for index in range(rng.randint(1, 3))])
+    for switch_id in switches:
+        devices.make_device(switch_id, devices.SWITCH, rng.randint(0, 1))
+    for index in range(rng.randint(0, 2)):
+        [clock_id] = names.lookup(["Clk" + str(index)])
+        devices.make_device(clock_id, devices.CLOCK, rng.randint(1, 4))
+    if rng.random() < 0.5:
+        [RC1] = names.lookup(["Rc1"])
+        devices.make_device(RC1, devices.RC, rng.randint(1, 5))
+    if rng.random() < 0.5:
+        [SG1] = names.lookup(["Sg1"])
+        devices.make_device(SG1, devices.SIGGEN, "".join(
+            rng.choice("01") for _ in range(rng.randint(1, 6))))
+    for index in range(rng.randint(2, 12)):
+        [gate_id] = names.lookup(["G" + str(index)])
+        gate_kind = rng.choice(devices.gate_types)
+        devices.make_device(gate_id, gate_kind, None
+                            if gate_kind == devices.XOR
+                            else rng.randint(1, 3))
+    for index in range(rng.randint(0, 3)):
+        [d_type_id] = names.lookup(["D" + str(index)])
+        devices.make_device(d_type_id, devices.D_TYPE)
+
+    outputs = [(device.device_id, output_id)
+               for device in devices.devices_list
+               for output_id in device.outputs]
+    for device in devices.devices_list:
+        for input_id in device.inputs:
+            assert network.make_connection(
+                device.device_id, input_id,
+                *rng.choice(outputs)) == network.NO_ERROR
+    random.seed(seed)
+    devices.cold_startup()
+    return network, switches
+
+
+def run_random_circuit(network, switches, cycles):
+    """Run the network, toggling switches, and return the signals of every
+    output after each cycle, up to the first cycle that does not settle.
+
+    The signals left by a cycle that does not settle are not recorded, as
+    they depend on where the engine stopped.
+    """
+    devices = network.devices
+    traces = []
+    for cycle in range(cycles):
+        if cycle % 5 == 4:
+            switch_id = switches[(cycle // 5) % len(switches)]
+            switch = devices.get_device(switch_id)
+            devices.set_switch(switch_id,
+                               network.invert_signal(switch.switch_state))
+        if not network.execute_network():
+            traces.append(None)
+            break
+        traces.append([network.get_output_signal(device.device_id, output_id)
+                       for device in devices.devices_list
+                       for output_id in device.outputs])
+    return traces
+
+
+@pytest.mark.parametrize("mode", [1, 2, 3, 4])
+@pytest.mark.parametrize("seed", range(40))
+def test_random_circuits_match_sweep(mode, seed):
+    """Test if the engines give the signals of the sweep, including the
+    intermediate signals seen by feedback loops and D-types."""
+    sweep_network, switches = make_random_circuit(seed, 0)
+    network, switches = make_random_circuit(seed, mode)
+    assert (run_random_circuit(network, switches, 40) ==
+            run_random_circuit(sweep_network, switches, 40))
+
+
+@pytest.mark.parametrize("circuit", ["sr_bistable", "mixed_register",
+                                     "gated_counter"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_event_driven_matches_sweep(circuit, seed):
+    """Test if the event-driven engine gives the same signals as the sweep."""
+    sweep_network, monitored, switches = make_test_circuit(circuit, 0, seed)
+    event_network, monitored, switches = make_test_circuit(circuit, 1, seed)
+    assert event_network.simulation_mode == event_network.EVENT_DRIVEN
+
+    sweep_traces = run_test_circuit(sweep_network, monitored, switches, 40)
+    event_traces = run_test_circuit(event_network, monitored, switches, 40)
+    assert event_traces == sweep_traces
+
+    # Cold start-up must force the event-driven engine to update everything
+    random.seed(seed)
+    sweep_network.devices.cold_startup()
+    random.seed(seed)
+    event_network.devices.cold_startup()
+    assert (run_test_circuit(event_network, monitored, switches, 20) ==
+            run_test_circuit(sweep_network, monitored, switches, 20))
+
+
+def test_event_driven_oscillating_network(new_network):
+    """Test if the event-driven engine detects oscillating networks."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    assert network.set_simulation_mode(network.EVENT_DRIVEN)
+    assert not network.set_simulation_mode(len(network.simulation_modes))
+
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+
+    assert not network.execute_network()
+    # The unsettled device is carried over to the next cycle
+    assert not network.execute_network()
+
+
+@pytest.mark.parametrize("circuit", ["sr_bistable", "mixed_register"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_levelized_matches_sweep(circuit, seed):
+    """Test if the levelized engine gives the same signals as the sweep."""
+    sweep_network, monitored, switches = make_test_circuit(circuit, 0, seed)
+    levelized_network, monitored, switches = make_test_circuit(circuit, 2,
+                                                               seed)
+    assert levelized_network.simulation_mode == levelized_network.LEVELIZED
+
+    assert (run_test_circuit(levelized_network, monitored, switches, 40) ==
+            run_test_circuit(sweep_network, monitored, switches, 40))
+
+
+def test_levelize(new_network):
+    """Test if levelize keeps the gates of feedback loops in the order of
+    the sweep and orders the feed-forward gates."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [G1, G2, G3, G4, G5, G6, SW1, SW2, I1, I2] = names.lookup(
+        ["G1", "G2", "G3", "G4", "G5", "G6", "Sw1", "Sw2", "I1", "I2"])
+    # G4 and G3 form an SR latch driven by G1 and G2, and read by G6 and G5
+    for gate_id in [G4, G3, G2, G1, G6, G5]:
+        devices.make_device(gate_id, devices.NAND, 2)
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(SW2, devices.SWITCH, 1)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(SW2, None, G1, I2)
+    network.make_connection(SW1, None, G2, I1)
+    network.make_connection(G1, None, G2, I2)
+    network.make_connection(G2, None, G3, I1)
+    network.make_connection(G4, None, G3, I2)
+    network.make_connection(G3, None, G4, I1)
+    network.make_connection(SW2, None, G4, I2)
+    network.make_connection(G3, None, G5, I1)
+    network.make_connection(SW1, None, G5, I2)
+    network.make_connection(G5, None, G6, I1)
+    network.make_connection(G4, None, G6, I2)
+
+    network.build_fanout()
+    network.levelize()
+    schedule = [[(sequential, [step[0].device_id for step in steps])
+                 for sequential, steps in level]
+                for level in network.schedule]
+    assert schedule == [[(True, [G4, G3, G2, G1])], [(False, [G5])],
+                        [(False, [G6])]]
+    assert network.boundary_devices == [SW1, SW2]
+
+
+def test_levelized_deep_chain(new_network):
+    """Test if the levelized engine settles chains the sweep cannot."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, I1] = names.lookup(["Sw1", "I1"])
+    gate_ids = names.lookup(["G" + str(i) for i in range(30)])
+    # Make the gates in reverse order so the sweep moves one gate per pass
+    for gate_id in reversed(gate_ids):
+        devices.make_device(gate_id, devices.NAND, 1)
+    devices.make_device(SW1, devices.SWITCH, 0)
+    network.make_connection(SW1, None, gate_ids[0], I1)
+    for previous_id, gate_id in zip(gate_ids, gate_ids[1:]):
+        network.make_connection(previous_id, None, gate_id, I1)
+
+    assert not network.execute_network()
+
+    network.set_simulation_mode(network.LEVELIZED)
+    for switch_state in [devices.HIGH, devices.LOW, devices.HIGH]:
+        devices.set_switch(SW1, switch_state)
+        assert network.execute_network()
+        # An even number of inverters, so the output follows the switch
+        assert network.get_output_signal(gate_ids[-1], None) == switch_state
+
+
+@pytest.mark.parametrize("circuit", ["sr_bistable", "mixed_register",
+                                     "gated_counter"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_compact_matches_levelized(circuit, seed):
+    """Test if the compact engine gives the same signals as the levelized
+    engine, including after cold start-up."""
+    levelized_network, monitored, switches = make_test_circuit(circuit, 2,
+                                                               seed)
+    compact_network, monitored, switches = make_test_circuit(circuit, 3,
+                                                             seed)
+    assert compact_network.simulation_mode == compact_network.COMPACT
+
+    assert (run_test_circuit(compact_network, monitored, switches, 40) ==
+            run_test_circuit(levelized_network, monitored, switches, 40))
+
+    random.seed(seed)
+    levelized_network.devices.cold_startup()
+    random.seed(seed)
+    compact_network.devices.cold_startup()
+    assert (run_test_circuit(compact_network, monitored, switches, 20) ==
+            run_test_circuit(levelized_network, monitored, switches, 20))
+
+
+def test_compact_mode_switch(new_network):
+    """Test if leaving the compact mode hands the state back to devices."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, SW2, CL1, D1, G1, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "Clock1", "D1", "G1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(CL1, devices.CLOCK, 2)
+    devices.make_device(D1, devices.D_TYPE)
+    devices.make_device(G1, devices.AND, 2)
+    network.make_connection(SW1, None, D1, devices.DATA_ID)
+    network.make_connection(CL1, None, D1, devices.CLK_ID)
+    network.make_connection(G1, None, D1, devices.SET_ID)
+    network.make_connection(G1, None, D1, devices.CLEAR_ID)
+    network.make_connection(SW1, None, G1, I1)
+
+    # The compact network is only built for a complete network
+    network.set_simulation_mode(network.COMPACT)
+    assert not network.check_network()
+    assert network.compact_network is None
+    network.make_connection(SW2, None, G1, I2)
+    assert network.check_network()
+    assert network.compact_network is not None
+
+    for _ in range(6):
+        assert network.execute_network()
+    signals = [network.get_output_signal(D1, devices.Q_ID),
+               network.get_output_signal(G1, None)]
+    assert signals[0] == devices.HIGH
+
+    network.set_simulation_mode(network.SWEEP)
+    assert network.compact_network is None
+    d_type = devices.get_device(D1)
+    assert [d_type.outputs[devices.Q_ID],
+            devices.get_device(G1).outputs[None]] == signals
+    assert d_type.dtype_memory == devices.HIGH
+    assert network.execute_network()
+
+
+@pytest.mark.parametrize("mode", [0, 1, 2, 3, 4])
+def test_execute_cycles_fast_forward(mode, monkeypatch):
+    """Test if execute_cycles replays periodic networks without changing
+    the recorded signals or the final state."""
+    results = []
+    for fast_forward in [False, True]:
+        network, monitored, switches = make_test_circuit("mixed_register",
+                                                         mode, 0)
+        monitors = Monitors(network.names, network.devices, network)
+        for device_id, output_id in monitored:
+            monitors.make_monitor(device_id, output_id)
+        network.fast_forward = fast_forward
+
+        executed_cycles = []
+        execute_network = network.execute_network
+
+        def count_cycles():
+            executed_cycles.append(None)
+            return execute_network()
+        monkeypatch.setattr(network, "execute_network", count_cycles)
+
+        assert network.execute_cycles(1000, monitors)
+        assert network.execute_cycles(77, monitors)
+        results.append((dict(monitors.monitors_dictionary),
+                        network.get_state(), len(executed_cycles)))
+
+    (signals, state, cycles) = results[0]
+    (fast_signals, fast_state, fast_cycles) = results[1]
+    assert cycles == 1077
+    assert all(len(signal_list) == 1077 for signal_list in signals.values())
+    assert fast_signals == signals
+    assert fast_state == state
+    # The RC settles and the rest repeats every 6 cycles
+    assert fast_cycles < 100
+
+
+@pytest.mark.parametrize("mode", [0, 1, 2, 3, 4])
+def test_set_device_period(mode):
+    """Test if a new clock period applies from the next cycle on."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [CL1, D1] = names.lookup(["Clock1", "D1"])
+    devices.make_device(CL1, devices.CLOCK, 2)
+    devices.make_device(D1, devices.NAND, 1)
+    network.make_connection(CL1, None, D1, names.query("I1"))
+    network.set_simulation_mode(mode)
+    monitors.make_monitor(CL1, None)
+    devices.get_device(CL1).clock_counter = 0
+    devices.get_device(CL1).outputs[None] = devices.LOW
+
+    assert network.execute_cycles(8, monitors)
+    assert network.set_device_period(CL1, 3)
+    assert network.execute_cycles(12, monitors)
+    assert not network.set_device_period(D1, 3)
+    levels = [devices.HIGH if signal in [devices.HIGH, devices.RISING]
+              else devices.LOW
+              for signal in monitors.monitors_dictionary[(CL1, None)]]
+    assert levels == [0, 0, 1, 1, 0, 0, 1, 1,
+                      1, 0, 0, 0, 1, 1, 1, 0, 0, 0, 1, 1]
+
+
+def test_execute_cycles_oscillating(new_network):
+    """Test if execute_cycles stops on an oscillating network."""
+    network = new_network
+    devices = network.devices
+    [NOR1, I1] = devices.names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    assert not network.execute_cycles(10)
+
+
+@pytest.mark.parametrize("mode", [0, 1, 2, 4])
+def test_cone_of_influence_pruning(new_network, mode):
+    """Test if pruning only executes the devices monitored outputs need,
+    and follows the monitors as they are made and removed."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    monitors = Monitors(names, devices, network)
+    network.set_simulation_mode(mode)
+
+    [SW1, SW2, G1, G2, G3, D1, CL1, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "G1", "G2", "G3", "D1", "Clock1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(G1, devices.NOR, 2)
+    devices.make_device(G2, devices.NAND, 1)
+    devices.make_device(G3, devices.OR, 1)
+    devices.make_device(D1, devices.D_TYPE)
+    devices.make_device(CL1, devices.CLOCK, 1)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(SW2, None, G1, I2)
+    network.make_connection(G1, None, G2, I1)
+    network.make_connection(SW2, None, G3, I1)
+    for input_id in [devices.DATA_ID, devices.SET_ID, devices.CLEAR_ID]:
+        network.make_connection(G1, None, D1, input_id)
+    network.make_connection(CL1, None, D1, devices.CLK_ID)
+
+    assert network.get_fan_in(D1) == {D1, G1, SW1, SW2, CL1}
+    network.set_pruning(True)
+    monitors.make_monitor(G2, None)
+    assert network.monitored_outputs == {(G2, None): {G2, G1, SW1, SW2}}
+    assert network.get_active_devices(devices.NAND) == [G2]
+    assert network.get_active_devices(devices.OR) == []
+    assert network.get_active_devices(devices.D_TYPE) == []
+    assert network.get_active_devices(devices.SWITCH) == [SW1, SW2]
+
+    devices.set_switch(SW2, devices.HIGH)
+    devices.set_switch(SW1, devices.LOW)
+    assert network.execute_cycles(2, monitors)
+    assert network.get_output_signal(G2, None) == devices.HIGH
+    # G3 is outside the cone, so it has not been executed
+    assert network.get_output_signal(G3, None) == devices.LOW
+
+    monitors.make_monitor(G3, None)
+    monitors.make_monitor(D1, devices.Q_ID)
+    assert network.cone_references[G1] == 2
+    assert network.execute_cycles(1, monitors)
+    assert network.get_output_signal(G3, None) == devices.HIGH
+
+    monitors.remove_monitor(G2, None)
+    monitors.remove_monitor(D1, devices.Q_ID)
+    assert set(network.cone_references) == {G3, SW2}
+    assert network.get_active_devices(devices.NOR) == []
+
+    # New connections rebuild the cones
+    [G4] = names.lookup(["G4"])
+    devices.make_device(G4, devices.AND, 1)
+    assert (network.make_connection(G4, None, G3, I1) ==
+            network.INPUT_CONNECTED)
+    network.make_connection(G1, None, G4, I1)
+    assert network.get_active_devices(devices.AND) == []
+    monitors.make_monitor(G4, None)
+    assert network.get_active_devices(devices.AND) == [G4]
+    assert network.get_active_devices(devices.NOR) == [G1]
+
+    network.set_pruning(False)
+    assert network.get_active_devices(devices.OR) == [G3]
+
+
+@pytest.mark.parametrize("mode", [0, 1, 2, 4])
+def test_pruning_ignores_unmonitored_oscillation(new_network, mode):
+    """Test if an oscillation outside the monitored cones is only detected
+    without pruning."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    monitors = Monitors(names, devices, network)
+    network.set_simulation_mode(mode)
+    [SW1, G1, NOR1, I1] = names.lookup(["Sw1", "G1", "Nor1", "I1"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(G1, devices.AND, 1)
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(SW1, None, G1, I1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    monitors.make_monitor(G1, None)
+
+    network.set_pruning(True)
+    assert network.execute_cycles(5, monitors)
+    assert monitors.get_trace_length() == 5
+    network.set_pruning(False)
+    assert not network.execute_network()
@@ -0,0 +1,82 @@
+"""Test the regression module."""
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from regression import RegressionRunner, simulate_definition_file
+
+
+DEFINITION_DIRECTORY = Path.cwd() / "definition_files"
+
+
+@pytest.fixture
+def test_files():
+    """Return the paths of the device test files."""
+    runner = RegressionRunner()
+    return runner.find_definition_files(str(DEFINITION_DIRECTORY /
+                                            "test_files"))
+
+
+def test_simulate_definition_file():
+    """Test if simulate_definition_file reports parses and simulations."""
+    path = str(DEFINITION_DIRECTORY / "demonstration_files" /
+               "mixed_register.txt")
+    result = simulate_definition_file(path, 50, 0)
+    assert result["status"] == "passed"
+    assert result["monitors"] == 3
+    assert result["errors"] == []
+    # The same seed gives the same traces
+    assert simulate_definition_file(path, 50, 0)["trace_digest"] == (
+        result["trace_digest"])
+    assert simulate_definition_file(path, 51, 0)["trace_digest"] != (
+        result["trace_digest"])
+
+    path = str(DEFINITION_DIRECTORY / "syntax_error_files" /
+               "missing_semicolon.txt")
+    result = simulate_definition_file(path, 50, 0)
+    assert result["status"] == "parse_error"
+    assert result["trace_digest"] is None
+    assert result["errors"][0]["name"] == "MissingPunctuationError"
+    assert result["errors"][0]["row"] is not None
+
+    result = simulate_definition_file(str(DEFINITION_DIRECTORY / "missing"),
+                                      50, 0)
+    assert result["status"] == "crashed"
+
+
+def test_run(test_files):
+    """Test if the parallel results match simulating each file in turn."""
+    assert len(test_files) == 8
+    runner = RegressionRunner(cycles=30, seed=3, max_workers=2)
+    results = runner.run(test_files)
+    assert [result["path"] for result in results] == test_files
+    for result in results:
+        serial_result = simulate_definition_file(result["path"], 30, 3)
+        assert result["status"] == serial_result["status"] == "passed"
+        assert result["trace_digest"] == serial_result["trace_digest"]
+    assert runner.run([]) == []
+
+
+def test_write_report(tmp_path, test_files):
+    """Test if the results are written as JSON and CSV reports."""
+    runner = RegressionRunner(cycles=10)
+    results = [simulate_definition_file(path, 10, 0) for path in test_files]
+
+    json_path = str(tmp_path / "report.json")
+    assert runner.write_report(results, json_path)
+    with open(json_path) as file:
+        report = json.load(file)
+    assert report["cycles"] == 10
+    assert report["results"] == results
+
+    csv_path = str(tmp_path / "report.csv")
+    assert runner.write_report(results, csv_path)
+    with open(csv_path, newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["path"] for row in rows] == test_files
+    assert [row["trace_digest"] for row in rows] == [
+        result["trace_digest"] for result in results]
+
+    assert not runner.write_report(results, str(tmp_path / "missing" / "r"))
@@ -274,3 +274,32 @@ def test_connection_recognition(connections_scanner):
     assert connections_scanner.current_character == '.'
     connections_scanner.advance()
     assert connections_scanner.get_name() == 'I1'
+
+
+@pytest.mark.parametrize("file_name", [
+    "demonstration_files/mixed_register.txt",
+    "demonstration_files/empty_file.txt",
+    "scanner_test_files/scan_device.txt",
+    "scanner_test_files/scan_connections.txt",
+    "scanner_test_files/scan_sequence.txt",
+])
+def test_buffered_scanner(file_name):
+    """Tests that the buffered mode of Scanner() translates a file into
+    the same symbols, positions and error markers as the default mode.
+    """
+    path = Path.cwd() / "definition_files" / file_name
+    char_scanner = Scanner(path, Names())
+    buffered_scanner = Scanner(path, Names(), buffered=True)
+    while True:
+        symbol = char_scanner.get_symbol()
+        buffered_symbol = buffered_scanner.get_symbol()
+        assert (buffered_symbol.type, buffered_symbol.id) == \
+            (symbol.type, symbol.id)
+        assert (buffered_symbol.row, buffered_symbol.col) == \
+            (symbol.row, symbol.col)
+        assert (buffered_scanner.start_of_symbol_row,
+                buffered_scanner.start_of_symbol_col) == \
+            (char_scanner.start_of_symbol_row,
+             char_scanner.start_of_symbol_col)
+        if symbol.type == char_scanner.EOF:
+            break
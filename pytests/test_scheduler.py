@@ -0,0 +1,130 @@
+"""Test the scheduler module and the scheduled clocks and RCs."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+
+
+@pytest.fixture
+def new_network():
+    """Return a new instance of the Network class."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    return Network(new_names, new_devices)
+
+
+def count_cycles(counter, period, cycles):
+    """Return the counters and switch cycles of a clock or RC counted one
+    cycle at a time, as before the scheduler."""
+    counters = []
+    switches = []
+    for cycle in range(cycles):
+        if counter == period:
+            counter = 0
+            switches.append(cycle)
+        counter += 1
+        counters.append(counter)
+    return counters, switches
+
+
+@pytest.mark.parametrize("period, counter", [
+    (1, 0), (1, 1), (3, 0), (3, 2), (3, 3), (4, 6), (7, 5)])
+def test_pop_due_devices(new_network, period, counter):
+    """Test if the scheduled clocks and RCs switch on the same cycles as
+    when they are counted on every cycle."""
+    devices = new_network.devices
+    [CL1, RC1] = devices.names.lookup(["Clock1", "Rc1"])
+    devices.make_device(CL1, devices.CLOCK, period)
+    devices.make_device(RC1, devices.RC, period)
+    scheduler = devices.source_scheduler
+    for device_id in [CL1, RC1]:
+        devices.get_device(device_id).clock_counter = counter
+
+    expected_counters, expected_switches = count_cycles(counter, period, 30)
+    counters = {CL1: [], RC1: []}
+    switches = {CL1: [], RC1: []}
+    for cycle in range(30):
+        for device_kind, device_id in [(devices.CLOCK, CL1),
+                                       (devices.RC, RC1)]:
+            if scheduler.pop_due_devices(device_kind) == [device_id]:
+                switches[device_id].append(cycle)
+        scheduler.advance_cycle()
+        for device_id in [CL1, RC1]:
+            counters[device_id].append(
+                devices.get_device(device_id).clock_counter)
+    for device_id in [CL1, RC1]:
+        assert counters[device_id] == expected_counters
+        assert switches[device_id] == expected_switches
+
+
+def test_set_counter_and_period(new_network):
+    """Test if setting the counter or period schedules the device again."""
+    devices = new_network.devices
+    [CL1] = devices.names.lookup(["Clock1"])
+    devices.make_device(CL1, devices.CLOCK, 10)
+    scheduler = devices.source_scheduler
+    clock = devices.get_device(CL1)
+    clock.clock_counter = 0
+    for _ in range(3):
+        assert scheduler.pop_due_devices(devices.CLOCK) == []
+        scheduler.advance_cycle()
+    assert clock.clock_counter == 3
+
+    # Old heap entries are skipped
+    clock.clock_half_period = 4
+    clock.clock_half_period = 5
+    assert scheduler.pop_due_devices(devices.CLOCK) == []
+    scheduler.advance_cycle()
+    assert scheduler.pop_due_devices(devices.CLOCK) == []
+    scheduler.advance_cycle()
+    assert scheduler.pop_due_devices(devices.CLOCK) == [CL1]
+    assert clock.clock_counter == 0
+    scheduler.advance_cycle()
+    assert clock.clock_counter == 1
+
+    # A counter past the period is never due, as when counting every cycle
+    clock.clock_counter = 7
+    for _ in range(20):
+        assert scheduler.pop_due_devices(devices.CLOCK) == []
+        scheduler.advance_cycle()
+    assert clock.clock_counter == 27
+
+
+def test_rc_falls_every_period(new_network):
+    """Test if an RC keeps falling at the end of every period."""
+    network = new_network
+    devices = network.devices
+    [RC1] = devices.names.lookup(["Rc1"])
+    devices.make_device(RC1, devices.RC, 3)
+    rc = devices.get_device(RC1)
+    falls = []
+    for cycle in range(12):
+        if network.update_sources() == [RC1]:
+            falls.append(cycle)
+        rc.outputs[None] = devices.LOW  # as executing the RC does
+    assert falls == [3, 6, 9]
+
+
+def test_many_slow_clocks(new_network):
+    """Test if only the due clocks switch and the state repeats."""
+    network = new_network
+    devices = network.devices
+    clock_ids = devices.names.lookup(["Clock" + str(i) for i in range(200)])
+    for device_id in clock_ids:
+        devices.make_device(device_id, devices.CLOCK, 50)
+    random.seed(0)
+    devices.cold_startup()
+    switched = []
+    for _ in range(50):
+        switched.extend(network.update_sources())
+    # Each clock switches at most once in 50 cycles
+    assert len(switched) == len(set(switched)) > 0
+
+    assert network.execute_network()
+    state = network.get_state()
+    for _ in range(100):
+        assert network.execute_network()
+    assert network.get_state() == state
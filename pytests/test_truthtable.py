@@ -0,0 +1,181 @@
+"""Test the truthtable module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from truthtable import TruthTable, TruthTableGenerator, get_gray_code
+
+
+@pytest.fixture
+def new_monitors():
+    """Return a new instance of the Monitors class."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    return Monitors(new_names, new_devices, new_network)
+
+
+def make_full_adder(monitors):
+    """Make a full adder of three switches and monitor its outputs.
+
+    Return the switch IDs and the sum and carry outputs.
+    """
+    names = monitors.names
+    devices = monitors.devices
+    network = monitors.network
+    [A, B, C, X1, X2, A1, A2, O1, I1, I2] = names.lookup(
+        ["A", "B", "C", "X1", "X2", "A1", "A2", "O1", "I1", "I2"])
+    for switch_id in [A, B, C]:
+        devices.make_device(switch_id, devices.SWITCH, 0)
+    devices.make_device(X1, devices.XOR)
+    devices.make_device(X2, devices.XOR)
+    devices.make_device(A1, devices.AND, 2)
+    devices.make_device(A2, devices.AND, 2)
+    devices.make_device(O1, devices.OR, 2)
+    for connection in [(A, None, X1, I1), (B, None, X1, I2),
+                       (X1, None, X2, I1), (C, None, X2, I2),
+                       (A, None, A1, I1), (B, None, A1, I2),
+                       (X1, None, A2, I1), (C, None, A2, I2),
+                       (A1, None, O1, I1), (A2, None, O1, I2)]:
+        assert network.make_connection(*connection) == network.NO_ERROR
+    monitors.make_monitor(X2, None)
+    monitors.make_monitor(O1, None)
+    return [A, B, C], [(X2, None), (O1, None)]
+
+
+def test_gray_code():
+    """Test if consecutive Gray codes differ in a single bit."""
+    codes = [get_gray_code(step) for step in range(16)]
+    assert sorted(codes) == list(range(16))
+    for code, next_code in zip(codes, codes[1:]):
+        assert bin(code ^ next_code).count("1") == 1
+
+
+@pytest.mark.parametrize("lane_bits, shards", [(12, 1), (1, 1), (0, 1),
+                                               (1, 2), (0, 3)])
+def test_full_adder(new_monitors, lane_bits, shards):
+    """Test if the truth table of a full adder is found however the switches
+    are split between lanes, Gray-code steps and shards."""
+    monitors = new_monitors
+    switch_ids, outputs = make_full_adder(monitors)
+    generator = TruthTableGenerator(monitors.names, monitors.devices,
+                                    monitors.network, monitors,
+                                    lane_bits=lane_bits)
+    table = generator.generate(shards=shards)
+    assert table.switch_ids == switch_ids
+    assert table.outputs == outputs
+    assert table.row_count == 8
+    for row in range(8):
+        total = bin(row).count("1")
+        assert table.get_row(row) == [total & 1, total >> 1]
+        assert table.is_settled(row)
+    # Eight rows are packed into a byte, the first in the lowest bit
+    assert table.columns[outputs[0]] == bytearray([0b10010110])
+    assert table.columns[outputs[1]] == bytearray([0b11101000])
+    assert table.get_output(outputs[0], 8) is None
+    assert table.get_output((switch_ids[0], None), 0) is None
+
+    # A subset of the switches, the others keep their state
+    table = generator.generate(switch_ids[1:], [outputs[1]])
+    assert [table.get_output(outputs[1], row) for row in range(4)] == [
+        0, 0, 0, 1]
+
+
+@pytest.mark.parametrize("shards", [1, 2])
+def test_random_network(shards):
+    """Test if every row matches executing the network with the switches
+    set to the row."""
+    rng = random.Random(0)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    switch_ids = names.lookup(["Sw" + str(index) for index in range(7)])
+    for switch_id in switch_ids:
+        devices.make_device(switch_id, devices.SWITCH, 0)
+    outputs = [(switch_id, None) for switch_id in switch_ids]
+    for index in range(30):
+        [gate_id] = names.lookup(["G" + str(index)])
+        gate_kind = rng.choice(devices.gate_types)
+        devices.make_device(gate_id, gate_kind, None
+                            if gate_kind == devices.XOR
+                            else rng.randint(1, 4))
+        for input_id in devices.get_device(gate_id).inputs:
+            network.make_connection(gate_id, input_id, *rng.choice(outputs))
+        outputs.append((gate_id, None))
+    for output in outputs[-5:]:
+        monitors.make_monitor(*output)
+
+    table = TruthTableGenerator(names, devices, network, monitors,
+                                lane_bits=3).generate(shards=shards)
+    assert table.row_count == 128
+    for row in range(128):
+        for bit, switch_id in enumerate(switch_ids):
+            devices.set_switch(switch_id, (row >> bit) & 1)
+        assert network.execute_network()
+        levels = [int(network.get_output_signal(*output) in [devices.HIGH,
+                                                             devices.RISING])
+                  for output in outputs[-5:]]
+        assert table.get_row(row) == levels
+
+
+def test_unsettled_rows(new_monitors):
+    """Test if the rows on which the network oscillates are marked."""
+    monitors = new_monitors
+    names = monitors.names
+    devices = monitors.devices
+    network = monitors.network
+    [SW1, SW2, G1, I1, I2] = names.lookup(["Sw1", "Sw2", "G1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(G1, devices.NAND, 2)
+    network.make_connection(SW2, None, G1, I1)
+    network.make_connection(G1, None, G1, I2)
+    monitors.make_monitor(G1, None)
+
+    table = TruthTableGenerator(names, devices, network, monitors,
+                                lane_bits=1).generate()
+    # G1 oscillates while SW2 is HIGH
+    assert [table.is_settled(row) for row in range(4)] == [
+        True, True, False, False]
+    assert table.get_row(0) == table.get_row(1) == [1]
+
+
+def test_invalid_networks(new_monitors):
+    """Test if sequential networks and invalid inputs are rejected."""
+    monitors = new_monitors
+    switch_ids, outputs = make_full_adder(monitors)
+    names = monitors.names
+    devices = monitors.devices
+    generator = TruthTableGenerator(names, devices, monitors.network,
+                                    monitors)
+    with pytest.raises(ValueError):
+        generator.generate([outputs[0][0]])
+    with pytest.raises(ValueError):
+        generator.generate(outputs=[(switch_ids[0], devices.Q_ID)])
+
+    [D1] = names.lookup(["D1"])
+    devices.make_device(D1, devices.D_TYPE)
+    with pytest.raises(ValueError):
+        TruthTableGenerator(names, devices, monitors.network, monitors)
+
+
+def test_truth_table_rows():
+    """Test if blocks of rows are stored as packed bits."""
+    table = TruthTable([1, 2, 3, 4], [(5, None)])
+    table.set_rows(8, 8, [0b10000001], 0b1)
+    assert table.columns[(5, None)] == bytearray([0, 0b10000001])
+    assert [table.get_output((5, None), row) for row in [7, 8, 9, 15]] == [
+        0, 1, 0, 1]
+    assert not table.is_settled(8)
+    assert table.is_settled(9)
+
+    # Blocks of fewer than eight rows share a byte
+    table.set_rows(2, 2, [0b11], 0)
+    table.set_rows(4, 2, [0b01], 0b10)
+    assert table.columns[(5, None)][0] == 0b011100
+    assert table.unsettled[0] == 0b100000
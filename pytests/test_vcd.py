@@ -0,0 +1,142 @@
+"""Test the vcd module."""
+import pytest
+
+from monitors import Monitors, SignalTrace, ChangeTrace
+from userint import UserInterface
+from vcd import VcdWriter
+from test_network import make_test_circuit
+
+
+def read_vcd(path):
+    """Return the signal names and the values of each cycle in a VCD file.
+
+    The values are returned as {signal name: list of values}, with one value
+    for each cycle up to the end time.
+    """
+    with open(path) as file:
+        tokens = file.read().split()
+    signal_names = {}  # {identifier: signal name}
+    position = tokens.index("$enddefinitions")
+    for index, token in enumerate(tokens[:position]):
+        if token == "$var":
+            signal_names[tokens[index + 3]] = tokens[index + 4]
+    values = {identifier: "x" for identifier in signal_names}
+    traces = {name: [] for name in signal_names.values()}
+    time = 0
+    for token in tokens[position:]:
+        if token.startswith("#"):
+            new_time = int(token[1:])
+            for identifier, name in signal_names.items():
+                traces[name].extend(values[identifier] * (new_time - time))
+            time = new_time
+        elif token[0] in "01xz":
+            values[token[1:]] = token[0]
+    return signal_names, traces
+
+
+@pytest.fixture
+def monitored_network():
+    """Return a network and monitors set on a sequential test circuit."""
+    # Levelized simulation mode
+    network, monitored, switches = make_test_circuit("gated_counter", 2, 0)
+    monitors = Monitors(network.names, network.devices, network)
+    for device_id, output_id in monitored:
+        monitors.make_monitor(device_id, output_id)
+    return network, monitors
+
+
+def get_values(monitors, signal_list):
+    """Return the VCD values of a list of signal levels."""
+    devices = monitors.devices
+    values = {devices.LOW: "0", devices.HIGH: "1", devices.RISING: "1",
+              devices.FALLING: "0", devices.BLANK: "x"}
+    return [values[signal] for signal in signal_list]
+
+
+def test_vcd_matches_monitors(tmp_path, monitored_network):
+    """Test if the VCD file holds the signals recorded by the monitors."""
+    network, monitors = monitored_network
+    devices = network.devices
+    path = tmp_path / "run.vcd"
+    vcd_writer = VcdWriter(network.names, devices, monitors, path)
+    assert network.execute_cycles(1000, monitors)
+    vcd_writer.close()
+    assert monitors.signal_listeners == []
+
+    signal_names, traces = read_vcd(path)
+    # Every output is declared, monitored or not
+    assert len(signal_names) == sum(len(device.outputs)
+                                    for device in devices.devices_list)
+    assert len(set(signal_names)) == len(signal_names)
+    for (device_id, output_id), signal_list in (
+            monitors.monitors_dictionary.items()):
+        signal_name = devices.get_signal_name(device_id, output_id)
+        assert traces[signal_name] == get_values(monitors, signal_list)
+    assert traces["SW1"] == ["x"] * 1000
+
+
+def test_vcd_late_monitors(tmp_path, monitored_network):
+    """Test if monitors made and removed while writing are written."""
+    network, monitors = monitored_network
+    devices = network.devices
+    [SW2, X1] = network.names.lookup(["SW2", "X1"])
+    path = tmp_path / "run.vcd"
+    vcd_writer = VcdWriter(network.names, devices, monitors, path)
+    assert network.execute_cycles(5, monitors)
+    assert monitors.make_monitor(SW2, None, 5) == monitors.NO_ERROR
+    assert monitors.remove_monitor(X1, None)
+    assert network.execute_cycles(5, monitors)
+    vcd_writer.close()
+
+    signal_names, traces = read_vcd(path)
+    assert traces["SW2"] == ["x"] * 5 + ["0"] * 5
+    assert traces["X1"][5:] == ["x"] * 5
+    assert "x" not in traces["X1"][:5]
+
+
+def test_vcd_values(tmp_path, monitored_network):
+    """Test if every signal level has a VCD value."""
+    network, monitors = monitored_network
+    devices = network.devices
+    vcd_writer = VcdWriter(network.names, devices, monitors,
+                           tmp_path / "run.vcd")
+    assert vcd_writer.get_value(devices.LOW) == "0"
+    assert vcd_writer.get_value(devices.HIGH) == "1"
+    assert vcd_writer.get_value(devices.RISING) == "1"
+    assert vcd_writer.get_value(devices.FALLING) == "0"
+    assert vcd_writer.get_value(devices.BLANK) == "x"
+    identifiers = [vcd_writer.get_identifier(index) for index in range(10000)]
+    assert len(set(identifiers)) == 10000
+    assert all(" " not in identifier for identifier in identifiers)
+    vcd_writer.close()
+
+
+def test_vcd_command(tmp_path, monitored_network):
+    """Test if the command line interface only records signal changes while
+    it writes a VCD file."""
+    network, monitors = monitored_network
+    user_interface = UserInterface(network.names, network.devices, network,
+                                   monitors)
+    path = tmp_path / "run.vcd"
+    user_interface.line = "v " + str(path)
+    user_interface.cursor = 1
+    user_interface.vcd_command()
+    assert monitors.record_changes
+    assert all(isinstance(signal_list, ChangeTrace)
+               for signal_list in monitors.monitors_dictionary.values())
+    assert network.execute_cycles(12, monitors)
+    signal_lists = {signal_list_key: signal_list.tolist()
+                    for signal_list_key, signal_list
+                    in monitors.monitors_dictionary.items()}
+
+    user_interface.line = "v"
+    user_interface.vcd_command()
+    assert user_interface.vcd_writer is None
+    assert not monitors.record_changes
+    for monitor, signal_list in monitors.monitors_dictionary.items():
+        assert isinstance(signal_list, SignalTrace)
+        assert signal_list.tolist() == signal_lists[monitor]
+    signal_names, traces = read_vcd(path)
+    for monitor, signal_list in signal_lists.items():
+        name = network.devices.get_signal_name(*monitor)
+        assert traces[name] == get_values(monitors, signal_list)
@@ -0,0 +1,234 @@
+"""Test the waveform module."""
+import numpy as np
+import pytest
+
+from monitors import SignalTrace, ChangeTrace
+from waveform import WaveformGeometry
+
+
+def get_immediate_trace(signal, position):
+    """Return the line strip vertices drawn one cycle at a time.
+
+    Consecutive repeated vertices and the inner vertices of horizontal lines
+    are removed, as they do not change the drawn line.
+    """
+    vertices = []
+    for i in range(len(signal)):
+        y = 930 + 50 * int(signal[i]) - 90 * position
+        vertices.extend([(i * 50 + 30, y), ((i * 50) + 80, y)])
+    strip = []
+    for vertex in vertices:
+        if strip and strip[-1] == vertex:
+            continue
+        if len(strip) >= 2 and strip[-2][1] == strip[-1][1] == vertex[1]:
+            strip[-1] = vertex
+        else:
+            strip.append(vertex)
+    return strip
+
+
+def get_immediate_markers(cycles, position):
+    """Return the marker vertices drawn one marker at a time."""
+    vertices = []
+    for i in range(cycles + 1):
+        x = (i * 50) + 30
+        y = 930 - 5 - 90 * position
+        if i % 5 == 0:
+            y_next = 930 - 30 - 90 * position
+        else:
+            y_next = 930 - 15 - 90 * position
+        vertices.extend([(x, y), (x, y_next)])
+    return vertices
+
+
+@pytest.mark.parametrize("signal", [
+    [], [0], [1, 1, 1], [0, 1, 0, 1], [0, 0, 1, 1, 1, 0, 4, 4, 2, 3]])
+@pytest.mark.parametrize("position", [0, 3])
+def test_build_trace_vertices(signal, position):
+    """Test if the trace vertices draw the same line as immediate mode."""
+    geometry = WaveformGeometry()
+    vertices = geometry.build_trace_vertices(signal, position)
+    assert vertices.dtype == np.float32
+    assert [tuple(vertex) for vertex in vertices.tolist()] == (
+        get_immediate_trace(signal, position))
+
+
+@pytest.mark.parametrize("cycles", [0, 1, 12])
+def test_build_marker_vertices(cycles):
+    """Test if the marker vertices match the immediate mode markers."""
+    geometry = WaveformGeometry()
+    vertices = geometry.build_marker_vertices(cycles)
+    assert len(vertices) == geometry.get_marker_vertex_count(cycles)
+    assert [tuple(vertex) for vertex in vertices.tolist()] == (
+        get_immediate_markers(cycles, 0))
+
+
+def test_build():
+    """Test if build packs every trace into one vertex array."""
+    geometry = WaveformGeometry()
+    signals = [[0, 1, 1, 0], [1] * 6, []]
+    signals_list = [["A", SignalTrace(signals[0])],
+                    ["B", ChangeTrace(signals[1])],
+                    ["C", signals[2]]]
+    geometry.build(signals_list)
+    assert geometry.trace_lengths == [4, 6, 0]
+    assert geometry.trace_ranges == [(0, 6), (6, 2), (8, 0)]
+    for position, (first_vertex, vertex_count) in enumerate(
+            geometry.trace_ranges):
+        vertices = geometry.trace_vertices[first_vertex:
+                                           first_vertex + vertex_count]
+        assert [tuple(vertex) for vertex in vertices.tolist()] == (
+            get_immediate_trace(signals[position], position))
+    assert len(geometry.marker_vertices) == (
+        geometry.get_marker_vertex_count(6))
+
+    # A long steady trace only needs two vertices
+    geometry.build([["A", ChangeTrace([1] * 100000)]])
+    assert len(geometry.trace_vertices) == 2
+
+    geometry.build([])
+    assert len(geometry.trace_vertices) == 0
+    assert len(geometry.marker_vertices) == 2
+
+
+def test_build_pyramid():
+    """Test if each pyramid level holds the lowest and highest signals."""
+    geometry = WaveformGeometry()
+    signals = np.array([0, 1, 1, 1, 0, 0, 4, 1, 0, 0, 0], dtype=np.int16)
+    pyramid = geometry.build_pyramid(signals)
+    assert len(pyramid) == 5
+    for level, (lowest, highest) in enumerate(pyramid):
+        group_cycles = 2 ** level
+        groups = [signals[start:start + group_cycles]
+                  for start in range(0, len(signals), group_cycles)]
+        assert lowest.tolist() == [min(group) for group in groups]
+        assert highest.tolist() == [max(group) for group in groups]
+    assert len(pyramid[-1][0]) == 1
+    assert len(geometry.build_pyramid(signals[:0])) == 1
+
+
+def test_extend_pyramid():
+    """Test if extending a pyramid in chunks gives the pyramid of all the
+    signals, and reuses the spare room of its arrays."""
+    generator = np.random.default_rng(5)
+    geometry = WaveformGeometry()
+    signals = generator.integers(0, 5, 300)
+    pyramid = geometry.build_pyramid(signals[:0])
+    buffer = None
+    copies = 0
+    for start in range(0, 300, 7):
+        pyramid = geometry.extend_pyramid(pyramid, signals[start:start + 7])
+        if pyramid[0][0].base is not buffer:
+            buffer = pyramid[0][0].base
+            copies += 1
+    built = geometry.build_pyramid(signals)
+    assert len(pyramid) == len(built)
+    for (lowest, highest), (built_lowest, built_highest) in zip(pyramid,
+                                                                 built):
+        assert lowest.tolist() == built_lowest.tolist()
+        assert highest.tolist() == built_highest.tolist()
+    # The signals are only copied when their array is full
+    assert copies < 10
+
+
+def test_level_of_detail():
+    """Test if the visible cycles are drawn at the right level of detail."""
+    geometry = WaveformGeometry()
+    signals = [0] * 1000 + [0, 1] * 500 + [1] * 1000
+    geometry.build([["A", signals], ["B", [1] * 10]])
+    assert geometry.get_level(0.5) == 0
+    assert geometry.get_level(1) == 0
+    assert geometry.get_level(2) == 1
+    assert geometry.get_level(1000) == 9
+
+    # Cycles between two x coordinates, clamped to the trace
+    assert geometry.get_visible_cycles(30, 30 + 50 * 10, 3000) == (0, 10)
+    assert geometry.get_visible_cycles(80 - 1, 80 + 1, 3000) == (0, 2)
+    assert geometry.get_visible_cycles(-1000, 1e9, 3000) == (0, 3000)
+    assert geometry.get_visible_cycles(-1000, 0, 3000) == (0, 0)
+
+    # Traces between two y coordinates
+    assert geometry.get_visible_positions(-1e9, 1e9) == (0, 2)
+    assert geometry.get_visible_positions(930, 1000) == (0, 1)
+    assert geometry.get_visible_positions(0, 100) == (2, 2)
+
+    # The vertices of a range of cycles cover the runs in the range
+    [first_vertex, vertex_count] = geometry.get_trace_range(0, 990, 1010)
+    vertices = geometry.trace_vertices[first_vertex:
+                                       first_vertex + vertex_count]
+    assert vertices[0, 0] <= 30 + 50 * 990
+    assert vertices[-1, 0] >= 30 + 50 * 1010
+    # The run of LOW up to cycle 1000 and the runs of cycles 1001 to 1009
+    assert vertex_count == 2 * 10
+    assert geometry.get_trace_range(1, 0, 10) == (
+        geometry.trace_ranges[1][0], 2)
+    assert geometry.get_trace_range(0, 5, 5)[1] == 0
+
+    # A level has two vertices for each group, plus the end of the strip
+    vertices = geometry.build_level_vertices(0, 3, 0, 3000)
+    assert len(vertices) == 2 * 375 + 1
+    heights = (vertices[:-1, 1] - 930).reshape(-1, 2) / 50
+    assert heights[:125].tolist() == [[0, 0]] * 125
+    assert heights[125:250].tolist() == [[0, 1]] * 125
+    assert heights[250:].tolist() == [[1, 1]] * 125
+    assert vertices[-1].tolist() == [30 + 50 * 3000, 980]
+    vertices = geometry.build_level_vertices(1, 20, 0, 10)
+    assert vertices[:, 0].tolist() == [30, 30, 30 + 50 * 10]
+    assert len(geometry.build_level_vertices(0, 3, 10, 10)) == 0
+
+
+def test_append():
+    """Test if appending cycles gives the vertices of a full build."""
+    generator = np.random.default_rng(3)
+    signals = [[0, 0, 1], [], [1] * 5, [2, 0]]
+    geometry = WaveformGeometry()
+    geometry.build([[str(position), signal_list]
+                    for position, signal_list in enumerate(signals)])
+    # Vertex buffers, updated as the canvas does
+    trace_buffer = geometry.trace_vertices.copy()
+    marker_buffer = geometry.marker_vertices.copy()
+    laid_out_again = 0
+    for length in [1, 0, 7, 40, 3] + [20] * 40:
+        chunks = [generator.integers(0, 2, length).tolist(),
+                  [1] * length, generator.integers(0, 5, length).tolist(),
+                  [0, 1] * (length // 2)]
+        for signal_list, chunk in zip(signals, chunks):
+            signal_list.extend(chunk)
+        if geometry.append(chunks):
+            for first_vertex, stop_vertex in geometry.trace_updates:
+                trace_buffer[first_vertex:stop_vertex] = (
+                    geometry.trace_vertices[first_vertex:stop_vertex])
+            [first_vertex, stop_vertex] = geometry.marker_update
+            marker_buffer[first_vertex:stop_vertex] = (
+                geometry.marker_vertices[first_vertex:stop_vertex])
+        else:
+            laid_out_again += 1
+            trace_buffer = geometry.trace_vertices.copy()
+            marker_buffer = geometry.marker_vertices.copy()
+
+        built = WaveformGeometry()
+        built.build([[str(position), signal_list]
+                     for position, signal_list in enumerate(signals)])
+        assert geometry.trace_lengths == built.trace_lengths
+        assert geometry.highest_signal == built.highest_signal
+        for position in range(len(signals)):
+            [first_vertex, vertex_count] = geometry.trace_ranges[position]
+            [built_first, built_count] = built.trace_ranges[position]
+            assert vertex_count == built_count
+            assert (trace_buffer[first_vertex:first_vertex + vertex_count]
+                    == built.trace_vertices[built_first:
+                                            built_first + built_count]).all()
+            assert (geometry.trace_run_starts[position].tolist()
+                    == built.trace_run_starts[position].tolist())
+            assert len(geometry.pyramids[position]) == len(
+                built.pyramids[position])
+            for level, (lowest, highest) in enumerate(
+                    geometry.pyramids[position]):
+                assert lowest.tolist() == (
+                    built.pyramids[position][level][0].tolist())
+                assert highest.tolist() == (
+                    built.pyramids[position][level][1].tolist())
+        assert (marker_buffer[:geometry.marker_count]
+                == built.marker_vertices).all()
+    # The spare room doubles, so the arrays are rarely laid out again
+    assert 0 < laid_out_again < 10
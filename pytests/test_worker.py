@@ -0,0 +1,109 @@
+"""Test the worker module."""
+import random
+from pathlib import Path
+
+from worker import SimulationWorker
+from test_cache import parse_netlist
+
+
+DEFINITION_FILE = str(Path.cwd() / "definition_files" /
+                      "demonstration_files" / "mixed_register.txt")
+
+
+def run_worker(cycles, cancel_after=None, path=DEFINITION_FILE, **kwargs):
+    """Run a worker in the background and return its chunks and outcome.
+
+    If cancel_after is given, the worker is cancelled after that many chunks.
+    """
+    [names, devices, network, monitors] = parse_netlist(path)
+    random.seed(1)
+    devices.cold_startup()
+    chunks = []
+    done = []
+
+    def on_chunk(cycles_completed, chunk):
+        chunks.append((cycles_completed, chunk))
+        if cancel_after is not None and len(chunks) == cancel_after:
+            worker.cancel()
+
+    def on_done(cycles_completed, outcome):
+        done.append((cycles_completed, outcome))
+
+    worker = SimulationWorker(network, monitors, cycles, on_chunk, on_done,
+                              **kwargs)
+    worker.start()
+    worker.join()
+    return monitors, chunks, done
+
+
+def test_run():
+    """Test if the chunks add up to the same traces as a direct run."""
+    [names, devices, network, monitors] = parse_netlist(DEFINITION_FILE)
+    random.seed(1)
+    devices.cold_startup()
+    assert network.execute_cycles(500, monitors)
+
+    worker_monitors, chunks, done = run_worker(500, chunk_time=1e-4)
+    assert done == [(500, SimulationWorker.DONE)]
+    assert len(chunks) > 1
+    assert chunks[-1][0] == 500
+    assert [cycles for cycles, chunk in chunks] == sorted(
+        cycles for cycles, chunk in chunks)
+    for monitor, signal_list in monitors.monitors_dictionary.items():
+        streamed = []
+        for cycles, chunk in chunks:
+            streamed.extend(chunk[monitor])
+        assert streamed == signal_list.tolist()
+        assert worker_monitors.monitors_dictionary[monitor] == signal_list
+
+
+def test_cancel():
+    """Test if a cancelled worker stops after the current chunk."""
+    monitors, chunks, done = run_worker(10 ** 6, cancel_after=2,
+                                        chunk_time=1e-4)
+    assert len(chunks) == 2
+    [(cycles_completed, outcome)] = done
+    assert outcome == SimulationWorker.CANCELLED
+    assert cycles_completed == chunks[-1][0] < 10 ** 6
+    assert monitors.get_trace_length() == cycles_completed
+
+
+def test_post():
+    """Test if the callbacks are called through post."""
+    posted = []
+
+    def post(callback, *args):
+        posted.append(callback.__name__)
+        callback(*args)
+
+    monitors, chunks, done = run_worker(20, post=post)
+    assert posted[-1] == "on_done"
+    assert posted.count("on_chunk") == len(chunks)
+    assert done == [(20, SimulationWorker.DONE)]
+
+
+def test_oscillating(tmp_path):
+    """Test if the cycles recorded before the network oscillates are passed
+    on before the outcome."""
+    path = tmp_path / "oscillating.txt"
+    # G1 oscillates once the RC falls
+    path.write_text("DEVICE: RC1, RC, 20;\n"
+                    "DEVICE: G1, NOR, 2;\n"
+                    "CONNECT: RC1 = G1.I1, G1 = G1.I2;\n"
+                    "MONITOR: RC1, G1;\n")
+    [names, devices, network, monitors] = parse_netlist(str(path))
+    random.seed(1)
+    devices.cold_startup()
+    assert not network.execute_cycles(100, monitors)
+    recorded_cycles = monitors.get_trace_length()
+    assert recorded_cycles > SimulationWorker.FIRST_CHUNK_CYCLES
+
+    worker_monitors, chunks, done = run_worker(100, path=str(path))
+    assert done == [(recorded_cycles, SimulationWorker.OSCILLATING)]
+    assert chunks[-1][0] == recorded_cycles
+    for monitor, signal_list in monitors.monitors_dictionary.items():
+        streamed = []
+        for cycles, chunk in chunks:
+            streamed.extend(chunk[monitor])
+        assert streamed == signal_list.tolist()
+    assert worker_monitors.signal_listeners == []